@@ -0,0 +1,41 @@
+"""keyset_pagination_indexes
+
+Revision ID: a1c4e7f20b36
+Revises: 6758bca691bf
+Create Date: 2026-10-19 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e7f20b36'
+down_revision: Union[str, Sequence[str], None] = '6758bca691bf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Composite (sort_key, id) indexes backing cursor pagination
+    op.create_index('ix_machines_created_at_machine_id', 'machines', ['created_at', 'machine_id'], unique=False)
+    op.create_index('ix_anomaly_reports_created_at_report_id', 'anomaly_reports', ['created_at', 'report_id'], unique=False)
+    op.create_index('ix_knowledge_base_contents_created_at_kb_id', 'knowledge_base_contents', ['created_at', 'kb_id'], unique=False)
+    op.create_index('ix_users_created_at_user_id', 'users', ['created_at', 'user_id'], unique=False)
+    op.create_index('ix_error_codes_manufacturer_origin_code', 'error_codes', ['manufacturer_origin', 'code'], unique=False)
+    op.create_index('ix_error_codes_severity_code', 'error_codes', ['severity', 'code'], unique=False)
+    op.create_index('ix_chat_sessions_user_id_updated_at_session_id', 'chat_sessions', ['user_id', 'updated_at', 'session_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_sessions_user_id_updated_at_session_id', table_name='chat_sessions')
+    op.drop_index('ix_error_codes_severity_code', table_name='error_codes')
+    op.drop_index('ix_error_codes_manufacturer_origin_code', table_name='error_codes')
+    op.drop_index('ix_users_created_at_user_id', table_name='users')
+    op.drop_index('ix_knowledge_base_contents_created_at_kb_id', table_name='knowledge_base_contents')
+    op.drop_index('ix_anomaly_reports_created_at_report_id', table_name='anomaly_reports')
+    op.drop_index('ix_machines_created_at_machine_id', table_name='machines')
@@ -0,0 +1,34 @@
+"""rag_chunk_owners
+
+Revision ID: a6d2f8b4c0e3
+Revises: f3a7c9e1b5d8
+Create Date: 2026-10-19 23:16:27.550143
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2f8b4c0e3'
+down_revision: Union[str, Sequence[str], None] = 'f3a7c9e1b5d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rag_chunks', sa.Column('kb_id', sa.Integer(), nullable=True))
+    op.add_column('rag_chunks', sa.Column('document_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_rag_chunks_kb_id'), 'rag_chunks', ['kb_id'], unique=False)
+    op.create_index(op.f('ix_rag_chunks_document_id'), 'rag_chunks', ['document_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_rag_chunks_document_id'), table_name='rag_chunks')
+    op.drop_index(op.f('ix_rag_chunks_kb_id'), table_name='rag_chunks')
+    op.drop_column('rag_chunks', 'document_id')
+    op.drop_column('rag_chunks', 'kb_id')
@@ -0,0 +1,52 @@
+"""kb_jsonb_gin_indexes
+
+Revision ID: b7d52e9c4a18
+Revises: a1c4e7f20b36
+Create Date: 2026-10-19 10:03:27.881930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d52e9c4a18'
+down_revision: Union[str, Sequence[str], None] = 'a1c4e7f20b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('knowledge_base_contents', 'tags',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               existing_nullable=True,
+               postgresql_using='tags::jsonb')
+    op.alter_column('knowledge_base_contents', 'applies_to_models',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               existing_nullable=True,
+               postgresql_using='applies_to_models::jsonb')
+    op.create_index('ix_knowledge_base_contents_tags_gin', 'knowledge_base_contents', ['tags'],
+               unique=False, postgresql_using='gin', postgresql_ops={'tags': 'jsonb_path_ops'})
+    op.create_index('ix_knowledge_base_contents_applies_to_models_gin', 'knowledge_base_contents', ['applies_to_models'],
+               unique=False, postgresql_using='gin', postgresql_ops={'applies_to_models': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_knowledge_base_contents_applies_to_models_gin', table_name='knowledge_base_contents')
+    op.drop_index('ix_knowledge_base_contents_tags_gin', table_name='knowledge_base_contents')
+    op.alter_column('knowledge_base_contents', 'applies_to_models',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='applies_to_models::json')
+    op.alter_column('knowledge_base_contents', 'tags',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='tags::json')
@@ -0,0 +1,34 @@
+"""rag_chunk_namespace_key
+
+Revision ID: b9e3c5a7d1f4
+Revises: a6d2f8b4c0e3
+Create Date: 2026-10-20 10:42:13.208417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e3c5a7d1f4'
+down_revision: Union[str, Sequence[str], None] = 'a6d2f8b4c0e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Vector ids are unique per namespace only; the key now leads with namespace,
+    # which also serves the namespace lookups the separate index was for
+    op.drop_constraint('rag_chunks_pkey', 'rag_chunks', type_='primary')
+    op.create_primary_key('rag_chunks_pkey', 'rag_chunks', ['namespace', 'vector_id'])
+    op.drop_index(op.f('ix_rag_chunks_namespace'), table_name='rag_chunks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_rag_chunks_namespace'), 'rag_chunks', ['namespace'], unique=False)
+    op.drop_constraint('rag_chunks_pkey', 'rag_chunks', type_='primary')
+    op.create_primary_key('rag_chunks_pkey', 'rag_chunks', ['vector_id'])
@@ -0,0 +1,29 @@
+"""chat_messages_session_timestamp_index
+
+Revision ID: c3f81a5d92e7
+Revises: b7d52e9c4a18
+Create Date: 2026-10-19 13:47:05.318842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f81a5d92e7'
+down_revision: Union[str, Sequence[str], None] = 'b7d52e9c4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Backs incremental before/after message paging within a session
+    op.create_index('ix_chat_messages_session_id_timestamp', 'chat_messages', ['session_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_messages_session_id_timestamp', table_name='chat_messages')
@@ -0,0 +1,31 @@
+"""chat_sessions_created_at_paging
+
+Revision ID: c4a8e2f6b0d3
+Revises: b9e3c5a7d1f4
+Create Date: 2026-10-20 14:05:37.614290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e2f6b0d3'
+down_revision: Union[str, Sequence[str], None] = 'b9e3c5a7d1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Session lists page on the immutable created_at instead of updated_at
+    op.create_index('ix_chat_sessions_user_id_created_at_session_id', 'chat_sessions', ['user_id', 'created_at', 'session_id'], unique=False)
+    op.drop_index('ix_chat_sessions_user_id_updated_at_session_id', table_name='chat_sessions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_chat_sessions_user_id_updated_at_session_id', 'chat_sessions', ['user_id', 'updated_at', 'session_id'], unique=False)
+    op.drop_index('ix_chat_sessions_user_id_created_at_session_id', table_name='chat_sessions')
@@ -0,0 +1,74 @@
+"""token_usage_metering
+
+Revision ID: e8b4c1d6f2a9
+Revises: d5a2e6b17c40
+Create Date: 2026-10-19 17:42:05.318224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4c1d6f2a9'
+down_revision: Union[str, Sequence[str], None] = 'd5a2e6b17c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('token_usage',
+        sa.Column('usage_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('company_name', sa.String(length=255), nullable=True),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('message_id', sa.Integer(), nullable=True),
+        sa.Column('purpose', sa.String(length=50), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False),
+        sa.Column('total_tokens', sa.Integer(), nullable=False),
+        sa.Column('cost_usd', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+        sa.ForeignKeyConstraint(['session_id'], ['chat_sessions.session_id'], ),
+        sa.PrimaryKeyConstraint('usage_id')
+    )
+    op.create_index('ix_token_usage_user_id_created_at', 'token_usage', ['user_id', 'created_at'], unique=False)
+
+    op.create_table('token_usage_daily',
+        sa.Column('rollup_id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('scope_key', sa.String(length=255), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('request_count', sa.Integer(), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False),
+        sa.Column('total_tokens', sa.Integer(), nullable=False),
+        sa.Column('cost_usd', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('rollup_id'),
+        sa.UniqueConstraint('scope', 'scope_key', 'day', 'model', name='uq_token_usage_daily_scope_day_model')
+    )
+
+    op.create_table('token_budgets',
+        sa.Column('budget_id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('scope_key', sa.String(length=255), nullable=False),
+        sa.Column('monthly_token_limit', sa.Integer(), nullable=True),
+        sa.Column('monthly_cost_limit', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('budget_id'),
+        sa.UniqueConstraint('scope', 'scope_key', name='uq_token_budgets_scope_key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('token_budgets')
+    op.drop_table('token_usage_daily')
+    op.drop_index('ix_token_usage_user_id_created_at', table_name='token_usage')
+    op.drop_table('token_usage')
@@ -0,0 +1,42 @@
+"""rag_chunk_store
+
+Revision ID: f3a7c9e1b5d8
+Revises: e8b4c1d6f2a9
+Create Date: 2026-10-19 21:08:44.901532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7c9e1b5d8'
+down_revision: Union[str, Sequence[str], None] = 'e8b4c1d6f2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rag_chunks',
+        sa.Column('vector_id', sa.String(length=255), nullable=False),
+        sa.Column('namespace', sa.String(length=255), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=False),
+        sa.Column('document_type', sa.String(length=100), nullable=True),
+        sa.Column('machine_type', sa.String(length=255), nullable=True),
+        sa.Column('company', sa.String(length=255), nullable=True),
+        sa.Column('chunk_index', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('vector_id')
+    )
+    op.create_index(op.f('ix_rag_chunks_namespace'), 'rag_chunks', ['namespace'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_rag_chunks_namespace'), table_name='rag_chunks')
+    op.drop_table('rag_chunks')
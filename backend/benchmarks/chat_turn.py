@@ -0,0 +1,120 @@
+"""
+Chat turn benchmark.
+
+Drives POST /chat/ai/chat in-process against a file-backed SQLite database
+and reports per-turn latency, SQL statements, commits and how long each turn
+keeps a pooled DB connection checked out. --llm-latency simulates the model
+call so connection hold time during generation is visible.
+
+    DATABASE_URL=sqlite:///./bench.db JWT_SECRET_KEY=bench \\
+        python -m benchmarks.chat_turn --sessions 10 --turns 5 --llm-latency 0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, event
+from sqlmodel import Session, SQLModel
+
+from src.main import app
+from src.model.models import User, UserRole
+from src.rag.services.rag_service import rag_service
+from src.routes import chat as chat_routes
+from src.routes.utils.auth import get_current_user
+from src.routes.utils.database import get_session
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _setup(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(user_id=1, email="bench@bench.local", password_hash="x",
+                         full_name="Bench", role=UserRole.TECHNICIAN))
+        session.commit()
+        user = session.get(User, 1)
+        session.expunge(user)
+
+    counters = {"statements": 0, "commits": 0}
+    held = []
+    checked_out = {}
+
+    event.listen(engine, "before_cursor_execute",
+                 lambda *args: counters.__setitem__("statements", counters["statements"] + 1))
+    event.listen(engine, "commit", lambda conn: counters.__setitem__("commits", counters["commits"] + 1))
+    event.listen(engine, "checkout", lambda dbapi_conn, record, proxy: checked_out.__setitem__(id(record), time.perf_counter()))
+    event.listen(engine, "checkin", lambda dbapi_conn, record: held.append(time.perf_counter() - checked_out.pop(id(record), time.perf_counter())))
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[get_current_user] = lambda: user
+    # Background summary refreshes would use the app engine; keep them out of the numbers
+    chat_routes.history_service.schedule_refresh = lambda *args, **kwargs: None
+    return counters, held
+
+
+async def _run(sessions: int, turns: int, counters, held):
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def conversation(i):
+            session_id = None
+            for turn in range(turns):
+                payload = {"message": f"Machine {i} shows alarm E{turn}, what should I check?"}
+                if session_id:
+                    payload["session_id"] = session_id
+                started = time.perf_counter()
+                response = await client.post("/chat/ai/chat", json=payload)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+                session_id = response.json()["session_id"]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(conversation(i) for i in range(sessions)))
+        elapsed = time.perf_counter() - started
+
+    total = sessions * turns
+    print(f"turns               {total} in {elapsed:.2f}s ({total / elapsed:.1f}/s)")
+    print(f"turn p50/p95        {statistics.median(latencies) * 1000:.1f} / {_percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"statements/turn     {counters['statements'] / total:.1f}")
+    print(f"commits/turn        {counters['commits'] / total:.2f}")
+    print(f"conn held/turn      {sum(held) / total * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated LLM seconds per turn")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.disable(logging.INFO)
+
+    if args.llm_latency:
+        generate = rag_service._generate_rag_response
+
+        async def slow_generate(*gen_args, **gen_kwargs):
+            await asyncio.sleep(args.llm_latency)
+            return await generate(*gen_args, **gen_kwargs)
+
+        rag_service._generate_rag_response = slow_generate # type: ignore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        counters, held = _setup(os.path.join(tmp, "chat_bench.db"))
+        asyncio.run(_run(args.sessions, args.turns, counters, held))
+
+
+if __name__ == "__main__":
+    main()
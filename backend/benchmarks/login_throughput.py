@@ -0,0 +1,112 @@
+"""
+Login throughput benchmark.
+
+Fires concurrent /token logins at the app in-process while probing /health,
+and reports login throughput plus how long the event loop stalls. Run with
+--inline to hash on the event loop (the old behaviour) for comparison.
+
+    DATABASE_URL=sqlite:///./bench.db JWT_SECRET_KEY=bench \\
+        python -m benchmarks.login_throughput --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.main import app
+from src.model.models import User, UserRole
+from src.routes.utils import auth
+from src.routes.utils.database import get_session
+
+PASSWORD = "Bench!mark1"
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _setup_db(users: int):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    password_hash = auth.pwd_context.hash(PASSWORD)
+    with Session(engine) as session:
+        for i in range(users):
+            session.add(User(email=f"user{i}@bench.local", password_hash=password_hash,
+                             full_name=f"User {i}", role=UserRole.CUSTOMER))
+        session.commit()
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+
+
+async def _run(logins: int, concurrency: int, users: int):
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    login_latencies, probe_latencies, statuses = [], [], {}
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(i):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/token", data={"username": f"user{i % users}@bench.local", "password": PASSWORD}
+                )
+                login_latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe():
+            # Time a 10 ms sleep plus a /health call; any excess is event-loop stall
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                await client.get("/health")
+                probe_latencies.append(time.perf_counter() - started - 0.01)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    print(f"logins            {logins} in {elapsed:.2f}s ({logins / elapsed:.1f}/s)")
+    print(f"status codes      {statuses}")
+    print(f"login p50/p95     {statistics.median(login_latencies) * 1000:.0f} / "
+          f"{_percentile(login_latencies, 95) * 1000:.0f} ms")
+    print(f"loop stall p50/max {statistics.median(probe_latencies) * 1000:.1f} / "
+          f"{max(probe_latencies) * 1000:.1f} ms")
+    print(f"hash executor     {auth.password_hash_executor.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.inline:
+        async def run_inline(func, *func_args):
+            return func(*func_args)
+        auth.password_hash_executor.run = run_inline # type: ignore
+
+    _setup_db(args.users)
+    asyncio.run(_run(args.logins, args.concurrency, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Vector quantization benchmark.
+
+Builds the local vector index (flat scan or HNSW graph) over clustered
+synthetic embeddings in each storage mode and reports memory, per-query
+latency and recall@k against an exact float32 scan.
+
+    python -m benchmarks.vector_quantization --vectors 20000 --dim 1024 --queries 100
+    python -m benchmarks.vector_quantization --index hnsw --vectors 10000 --dim 384
+"""
+import argparse
+import logging
+import statistics
+import time
+
+import numpy as np
+
+from src.rag.services.hnsw_index import HNSWIndex
+from src.rag.services.local_vector_index import FlatVectorIndex
+
+MODES = [
+    ("float32", {"quantization": "float32"}),
+    ("int8", {"quantization": "int8"}),
+    ("int8+rescore", {"quantization": "int8", "rescore": True}),
+    ("pq", {"quantization": "pq"}),
+    ("pq+rescore", {"quantization": "pq", "rescore": True}),
+]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _dataset(n: int, dim: int, queries: int, seed: int = 0):
+    # Topic clusters plus low-rank variation, like sentence embeddings, and a little noise
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, n // 200), dim)).astype(np.float32)
+    basis = rng.normal(size=(64, dim)).astype(np.float32) / 8
+    data = (
+        centers[rng.integers(0, len(centers), n)]
+        + rng.normal(size=(n, 64)).astype(np.float32) @ basis
+        + 0.1 * rng.normal(size=(n, dim)).astype(np.float32)
+    )
+    picks = rng.choice(n, size=queries, replace=False)
+    probes = data[picks] + 0.3 * rng.normal(size=(queries, dim)).astype(np.float32)
+    return data, probes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", choices=["flat", "hnsw"], default="flat")
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--pq-subvectors", type=int, default=64)
+    parser.add_argument("--rescore-factor", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    data, probes = _dataset(args.vectors, args.dim, args.queries)
+    ids = [str(i) for i in range(len(data))]
+    unit = data / np.linalg.norm(data, axis=1, keepdims=True)
+    truth = [set(np.argsort(-(unit @ (q / np.linalg.norm(q))))[:args.top_k].tolist()) for q in probes]
+
+    print(f"{args.index} index, {args.vectors} x {args.dim} vectors, {args.queries} queries, recall@{args.top_k}")
+    print(f"{'mode':<14}{'memory MB':>10}{'build s':>9}{'p50 ms':>9}{'p95 ms':>9}{'recall':>8}")
+    for name, options in MODES:
+        options = dict(options, dim=args.dim, pq_subvectors=args.pq_subvectors, rescore_factor=args.rescore_factor)
+        if args.index == "hnsw":
+            index = HNSWIndex(ef_search=args.ef_search, **options)
+        else:
+            index = FlatVectorIndex(**options)
+        started = time.perf_counter()
+        index.add(ids, data)
+        build = time.perf_counter() - started
+
+        latencies = []
+        hits = 0
+        for q, expected in zip(probes, truth):
+            started = time.perf_counter()
+            found = index.search(q, top_k=args.top_k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += len(expected & {int(vector_id) for vector_id, _, _ in found})
+
+        print(
+            f"{name:<14}{index.memory_bytes() / 2**20:>10.1f}{build:>9.2f}"
+            f"{statistics.median(latencies):>9.2f}{_percentile(latencies, 95):>9.2f}"
+            f"{hits / (args.top_k * len(probes)):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 # src/main.py
 from contextlib import asynccontextmanager
+import asyncio
+import os
 from fastapi import FastAPI,Depends
 from sqlmodel import Session, select
 
@@ -14,10 +16,15 @@ from .routes.knowledge_base import router as know_base
 from .routes.anamoly_report import router as anomaly_router
 from .routes.utils.auth import get_current_active_admin
 from .routes.chat import router as chat_router
-from .routes.utils.database import get_session
+from .routes.usage import router as usage_router
+from .routes.utils.database import get_session, engine
+from .routes.utils.error_code_cache import error_code_cache
+from .routes.utils.email_service import email_queue
 from .model.models import Machine, User, Ticket, AnomalyReport, KnowledgeBaseContent, ErrorCode
 
 from .rag.routes.rag_documents import router as rag_router
+from .rag.services.vector_gc import vector_sweeper
+from .rag.services.pinecone_service import pinecone_service
 
 # The lifespan context manager is typically used for startup/shutdown events.
 # With Alembic, we do NOT call create_db_and_tables() here.
@@ -26,8 +33,23 @@ from .rag.routes.rag_documents import router as rag_router
 async def lifespan(app: FastAPI):
     # Optional: Any other startup logic not related to DB schema creation
     print("FastAPI app starting up...")
+    if os.getenv("ERROR_CODE_CACHE_PRELOAD", "true").lower() == "true":
+        try:
+            with Session(engine) as session:
+                error_code_cache.preload(session)
+        except Exception as e:
+            # The cache is read-through, so a cold start only costs latency
+            print(f"Error code cache preload skipped: {e}")
+    email_queue.start()
+    vector_sweeper.start()
     yield
     print("FastAPI app shutting down...")
+    # Give queued mail a chance to go out before the process exits
+    # Joining the workers blocks, so do it off the event loop
+    await asyncio.to_thread(email_queue.stop)
+    await vector_sweeper.stop()
+    # After the sweeper, so no vector deletes are still in flight
+    await pinecone_service.close()
 
 app = FastAPI(
     title="AI Machine Tool Support Backend",
@@ -43,6 +65,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Has-More", "ETag"],  # pagination and chat polling
 )
 
 # Include your API routers
@@ -54,6 +77,7 @@ app.include_router(employee)
 app.include_router(error_code)
 app.include_router(know_base)
 app.include_router(chat_router)
+app.include_router(usage_router)
 # Anomaly reports
 app.include_router(anomaly_router)
 # app.include_router(chat_router)
@@ -1,12 +1,15 @@
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy import Column, String, Text, JSON, DateTime
+from sqlalchemy import Column, String, Text, JSON, DateTime, Index
 from sqlmodel import Field, SQLModel, Relationship
 from .enums import AnomalyStatus, AnomalyPriority
 
 # --- 5. AnomalyReport Model ---
 class AnomalyReport(SQLModel, table=True):
     __tablename__ = "anomaly_reports" # type: ignore
+    __table_args__ = (
+        Index("ix_anomaly_reports_created_at_report_id", "created_at", "report_id"),
+    )
 
     report_id: Optional[int] = Field(default=None, primary_key=True)
     reporter_id: int = Field(foreign_key="users.user_id", nullable=False)
@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy import Column, String, Text, DateTime, JSON, Index
 from sqlmodel import Field, SQLModel, Relationship
 from pydantic import validator
 from .enums import MessageRole
@@ -8,6 +8,10 @@ from .enums import MessageRole
 # --- Chat Models ---
 class ChatSession(SQLModel, table=True):
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        # Sessions are listed by creation; updated_at moves on every turn and would reshuffle pages
+        Index("ix_chat_sessions_user_id_created_at_session_id", "user_id", "created_at", "session_id"),
+    )
 
     session_id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.user_id", nullable=False)
@@ -22,12 +26,20 @@ class ChatSession(SQLModel, table=True):
         sa_column=Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     )
     is_active: bool = Field(default=True)
+    # Rolling summary of turns older than the recent history window
+    summary: Optional[str] = Field(
+        default=None, sa_column=Column(Text, nullable=True)
+    )
+    summary_message_id: Optional[int] = Field(default=None, nullable=True)
 
     # Relationships
     messages: List["ChatMessage"] = Relationship(back_populates="session")
 
 class ChatMessage(SQLModel, table=True):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_id_timestamp", "session_id", "timestamp"),
+    )
 
     message_id: Optional[int] = Field(default=None, primary_key=True)
     session_id: int = Field(foreign_key="chat_sessions.session_id", nullable=False)
@@ -136,4 +136,18 @@ class MessageRole(str, Enum):
             for member in cls:
                 if member.value.upper() == value.upper():
                     return member
-        return None
\ No newline at end of file
+        return None
+
+
+class UsageScope(str, Enum):
+    USER = "user"
+    COMPANY = "company"
+
+    @classmethod
+    def _missing_(cls, value):
+        # Handle case-insensitive matching
+        if isinstance(value, str):
+            for member in cls:
+                if member.value.upper() == value.upper():
+                    return member
+        return None
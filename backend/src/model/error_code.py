@@ -1,12 +1,16 @@
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy import Column, String, JSON, Text, DateTime
+from sqlalchemy import Column, String, JSON, Text, DateTime, Index
 from sqlmodel import Field, SQLModel, Relationship
 from .enums import ErrorSeverity, ManufacturerOrigin
 
 # --- 3. ErrorCode Model ---
 class ErrorCode(SQLModel, table=True):
     __tablename__ = "error_codes" # type: ignore
+    __table_args__ = (
+        Index("ix_error_codes_manufacturer_origin_code", "manufacturer_origin", "code"),
+        Index("ix_error_codes_severity_code", "severity", "code"),
+    )
 
     error_code_id: Optional[int] = Field(default=None, primary_key=True)
     related_machine_model: Optional[List[str]] = Field(sa_column=Column(JSON, nullable=True))
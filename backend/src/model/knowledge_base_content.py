@@ -1,12 +1,27 @@
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy import Column, String, Text, JSON, DateTime
+from sqlalchemy import Column, String, Text, JSON, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import Field, SQLModel, Relationship
 from .enums import ContentType
 
+# JSONB on Postgres (GIN-indexable containment), plain JSON elsewhere
+JSONBList = JSON().with_variant(JSONB(), "postgresql")
+
 # --- 4. KnowledgeBaseContent Model ---
 class KnowledgeBaseContent(SQLModel, table=True):
     __tablename__ = "knowledge_base_contents" # type: ignore
+    __table_args__ = (
+        Index("ix_knowledge_base_contents_created_at_kb_id", "created_at", "kb_id"),
+        Index(
+            "ix_knowledge_base_contents_tags_gin", "tags",
+            postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"}
+        ),
+        Index(
+            "ix_knowledge_base_contents_applies_to_models_gin", "applies_to_models",
+            postgresql_using="gin", postgresql_ops={"applies_to_models": "jsonb_path_ops"}
+        ),
+    )
 
     kb_id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(sa_column=Column(String(255), nullable=False))
@@ -16,10 +31,10 @@ class KnowledgeBaseContent(SQLModel, table=True):
     content_text: Optional[str] = Field(sa_column=Column(Text, nullable=True))
     external_url: Optional[str] = Field(sa_column=Column(String(500), nullable=True))
     tags: Optional[List[str]] = Field(
-        default_factory=list, sa_column=Column(JSON, nullable=True)
+        default_factory=list, sa_column=Column(JSONBList, nullable=True)
     )
     applies_to_models: Optional[List[str]] = Field(
-        default_factory=list, sa_column=Column(JSON, nullable=True)
+        default_factory=list, sa_column=Column(JSONBList, nullable=True)
     )
     uploader_id: int = Field(foreign_key="users.user_id", nullable=False)
     related_error_code_id: Optional[int] = Field(
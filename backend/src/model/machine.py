@@ -1,11 +1,14 @@
 from typing import Optional, List
 from datetime import datetime, date
-from sqlalchemy import Column, String, DateTime, Date, Boolean
+from sqlalchemy import Column, String, DateTime, Date, Boolean, Index
 from sqlmodel import Field, SQLModel, Relationship
 
 # --- 2. Machine Model ---
 class Machine(SQLModel, table=True):
     __tablename__ = "machines" # type: ignore
+    __table_args__ = (
+        Index("ix_machines_created_at_machine_id", "created_at", "machine_id"),
+    )
 
     machine_id: Optional[int] = Field(default=None, primary_key=True)
     serial_number: str = Field(sa_column=Column(String(100), nullable=False, unique=True, index=True))
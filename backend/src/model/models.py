@@ -11,6 +11,8 @@ from .chat_session import *
 from .machine_model import *
 from .employee import *
 from .document import *
+from .token_usage import *
+from .rag_chunk import *
 
 # Rebuild models to resolve forward references
 from .user import UserReadWithDetails
@@ -0,0 +1,30 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Column, String, Text, DateTime, Integer
+from sqlmodel import Field, SQLModel
+
+# --- RAG Chunk Store ---
+class RagChunk(SQLModel, table=True):
+    """
+    Full text of each indexed chunk, keyed by namespace and vector id (ids
+    are unique per namespace, as in Pinecone). The vector index keeps only
+    small filterable metadata; text is fetched from here by id.
+    """
+    __tablename__ = "rag_chunks"
+
+    namespace: str = Field(sa_column=Column(String(255), primary_key=True))
+    vector_id: str = Field(sa_column=Column(String(255), primary_key=True))
+    title: str = Field(sa_column=Column(String(500), nullable=False))
+    document_type: Optional[str] = Field(sa_column=Column(String(100), nullable=True))
+    machine_type: Optional[str] = Field(sa_column=Column(String(255), nullable=True))
+    company: Optional[str] = Field(sa_column=Column(String(255), nullable=True))
+    chunk_index: int = Field(sa_column=Column(Integer, nullable=False, default=0))
+    # Owning rows, when known; the vector sweeper reclaims chunks whose owner is gone
+    kb_id: Optional[int] = Field(sa_column=Column(Integer, nullable=True, index=True))
+    document_id: Optional[int] = Field(sa_column=Column(Integer, nullable=True, index=True))
+    content: str = Field(sa_column=Column(Text, nullable=False))
+    # sha256 of content; also the suffix of the vector id, so re-ingesting unchanged text is idempotent
+    content_hash: str = Field(sa_column=Column(String(64), nullable=False))
+    created_at: datetime = Field(
+        sa_column=Column(DateTime, nullable=False, default=datetime.utcnow)
+    )
@@ -0,0 +1,105 @@
+from typing import Optional, List
+from datetime import datetime, date
+from sqlalchemy import Column, String, DateTime, Date, Index, UniqueConstraint
+from sqlmodel import Field, SQLModel
+from .enums import UsageScope
+
+# --- Token Usage Ledger ---
+class TokenUsage(SQLModel, table=True):
+    """One row per metered LLM call; the source of truth for the rollups."""
+    __tablename__ = "token_usage"
+    __table_args__ = (
+        Index("ix_token_usage_user_id_created_at", "user_id", "created_at"),
+    )
+
+    usage_id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.user_id", nullable=False)
+    # Copied at write time so company rollups do not depend on later user edits
+    company_name: Optional[str] = Field(sa_column=Column(String(255), nullable=True))
+    session_id: Optional[int] = Field(default=None, foreign_key="chat_sessions.session_id", nullable=True)
+    message_id: Optional[int] = Field(default=None, nullable=True)
+    purpose: str = Field(sa_column=Column(String(50), nullable=False, default="chat"))
+    model: str = Field(sa_column=Column(String(100), nullable=False))
+    prompt_tokens: int = Field(default=0, nullable=False)
+    completion_tokens: int = Field(default=0, nullable=False)
+    total_tokens: int = Field(default=0, nullable=False)
+    cost_usd: float = Field(default=0.0, nullable=False)
+    created_at: datetime = Field(
+        sa_column=Column(DateTime, nullable=False, default=datetime.utcnow)
+    )
+
+class TokenUsageDaily(SQLModel, table=True):
+    """Per day, scope (user or company) and model totals, maintained on every ledger write."""
+    __tablename__ = "token_usage_daily"
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_key", "day", "model", name="uq_token_usage_daily_scope_day_model"),
+    )
+
+    rollup_id: Optional[int] = Field(default=None, primary_key=True)
+    scope: UsageScope = Field(sa_column=Column(String(20), nullable=False))
+    scope_key: str = Field(sa_column=Column(String(255), nullable=False))
+    day: date = Field(sa_column=Column(Date, nullable=False))
+    model: str = Field(sa_column=Column(String(100), nullable=False))
+    request_count: int = Field(default=0, nullable=False)
+    prompt_tokens: int = Field(default=0, nullable=False)
+    completion_tokens: int = Field(default=0, nullable=False)
+    total_tokens: int = Field(default=0, nullable=False)
+    cost_usd: float = Field(default=0.0, nullable=False)
+
+class TokenBudget(SQLModel, table=True):
+    __tablename__ = "token_budgets"
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_key", name="uq_token_budgets_scope_key"),
+    )
+
+    budget_id: Optional[int] = Field(default=None, primary_key=True)
+    scope: UsageScope = Field(sa_column=Column(String(20), nullable=False))
+    scope_key: str = Field(sa_column=Column(String(255), nullable=False))
+    monthly_token_limit: Optional[int] = Field(default=None, nullable=True)
+    monthly_cost_limit: Optional[float] = Field(default=None, nullable=True)
+    updated_at: datetime = Field(
+        sa_column=Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    )
+
+# --- Usage Pydantic Models for API ---
+class TokenUsageDailyRead(SQLModel):
+    day: date
+    model: str
+    request_count: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    cost_usd: float
+
+class UsageByModel(SQLModel):
+    model: str
+    request_count: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    cost_usd: float
+
+class UsageSummary(SQLModel):
+    scope: UsageScope
+    scope_key: str
+    start: date
+    end: date
+    request_count: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    by_model: List[UsageByModel] = Field(default_factory=list)
+
+class TokenBudgetUpdate(SQLModel):
+    monthly_token_limit: Optional[int] = Field(default=None, ge=0)
+    monthly_cost_limit: Optional[float] = Field(default=None, ge=0)
+
+class TokenBudgetRead(SQLModel):
+    scope: UsageScope
+    scope_key: str
+    monthly_token_limit: Optional[int] = None
+    monthly_cost_limit: Optional[float] = None
+    month_tokens: int = 0
+    month_cost_usd: float = 0.0
+    exceeded: bool = False
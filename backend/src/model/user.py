@@ -1,12 +1,15 @@
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index
 from sqlmodel import Field, SQLModel, Relationship
 from .enums import UserRole
 
 # --- 1. User Model ---
 class User(SQLModel, table=True):
     __tablename__ = "users"  # type: ignore
+    __table_args__ = (
+        Index("ix_users_created_at_user_id", "created_at", "user_id"),
+    )
 
     user_id: Optional[int] = Field(default=None, primary_key=True)
     email: str = Field(sa_column=Column(String(255), nullable=False, unique=True, index=True))
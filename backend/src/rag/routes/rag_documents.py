@@ -4,8 +4,10 @@ from typing import Optional, Dict, Any
 import logging
 from ..services.rag_service import rag_service
 from ..services.document_service import document_service
+from ..services.vector_gc import vector_sweeper
 from ...routes.utils.database import get_session
 from ...routes.utils.auth import get_current_active_admin, get_current_user
+from ...routes.utils.usage_meter import usage_meter
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,6 +21,7 @@ async def upload_document_for_rag(
     document_type: str = Form("manual"),
     machine_type: Optional[str] = Form(None),
     use_smart_chunking: bool = Form(True),
+    company: Optional[str] = Form(None),
     session: Session = Depends(get_session),
     current_user: dict = Depends(get_current_active_admin)
 ):
@@ -31,7 +34,7 @@ async def upload_document_for_rag(
     1. Extracts text from the uploaded file
     2. Chunks the text using smart chunking
     3. Generates embeddings for each chunk
-    4. Stores vectors in Pinecone
+    4. Stores vectors in Pinecone (in company's own shard when given)
     5. Returns processing statistics
     """
     try:
@@ -61,7 +64,8 @@ async def upload_document_for_rag(
             title=title,
             document_type=document_type,
             machine_type=machine_type,
-            use_smart_chunking=use_smart_chunking
+            use_smart_chunking=use_smart_chunking,
+            company=company
         )
         
         # Step 3: Compile comprehensive response
@@ -95,6 +99,7 @@ async def query_rag_system(
     machine_type: Optional[str] = Form(None),
     chunk_type_filter: Optional[str] = Form(None),
     context_limit: int = Form(3),
+    session: Session = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -105,20 +110,39 @@ async def query_rag_system(
     2. Searches Pinecone for relevant context
     3. Generates AI response using retrieved context
     4. Returns the response with metadata
+
+    Tokens count towards the caller's monthly budget, the same as chat turns.
     """
     try:
         logger.info(f"Processing RAG query: {query[:100]}...")
+        user_id = current_user.user_id # type: ignore
+        company_name = current_user.company_name # type: ignore
+        # Refuse before spending tokens once the monthly budget is used up
+        usage_meter.check_budget(session, user_id, company_name)
+        # Hand the connection back to the pool while the LLM call runs
+        session.close()
         
         # Generate RAG response
         rag_response = await rag_service.generate_rag_response(
             query=query,
             machine_type=machine_type,
-            context_limit=context_limit
+            context_limit=context_limit,
+            company=company_name
         )
+
+        # A coalesced answer shares another request's LLM call, which that request meters
+        if not rag_response.get("coalesced"):
+            usage_meter.record(
+                session, user_id, company_name, rag_response.get("model"), rag_response.get("usage"),
+                purpose="rag_query"
+            )
+            session.commit()
         
         logger.info(f"RAG query completed successfully")
         return rag_response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing RAG query: {str(e)}")
         raise HTTPException(
@@ -126,6 +150,48 @@ async def query_rag_system(
             detail=f"Failed to process RAG query: {str(e)}"
         )
 
+@router.delete("/tenants/{company}", status_code=status.HTTP_200_OK)
+async def delete_tenant_documents(
+    company: str,
+    current_user: dict = Depends(get_current_active_admin)
+):
+    """
+    Remove every vector uploaded for one company (e.g. before reindexing it).
+    Shared documents and other tenants are not touched.
+    """
+    try:
+        namespaces = await rag_service.delete_tenant_vectors(company)
+        return {"company": company, "deleted_namespaces": namespaces}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting tenant documents: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete tenant documents: {str(e)}"
+        )
+
+@router.post("/gc", status_code=status.HTTP_200_OK)
+async def sweep_orphaned_vectors(
+    current_user: dict = Depends(get_current_active_admin)
+):
+    """
+    Run one garbage-collection pass now: remove vectors and chunks whose
+    knowledge base entry or document has been deleted.
+    """
+    try:
+        return await vector_sweeper.sweep()
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error sweeping orphaned vectors: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to sweep orphaned vectors: {str(e)}"
+        )
+
 @router.get("/health", status_code=status.HTTP_200_OK)
 async def rag_health_check():
     """
@@ -6,6 +6,7 @@ RAG-related services:
 - document_service: Document processing and chunking
 - embedding_service: Text embedding generation
 - rag_service: Main RAG orchestration service
+- history_service: Token-budgeted chat history and rolling summaries
 """
 
 from .rag_service import rag_service
@@ -1,18 +1,22 @@
 import os
+import json
 import logging
-from typing import List, Dict, Any, Optional
-import requests
+from typing import AsyncIterator, List, Dict, Any, Optional
 from fastapi import HTTPException, status
 from dotenv import load_dotenv
 import numpy as np
 import hashlib
 
+from .llm_client import ResilientLLMClient
+
 load_dotenv('/home/jovanijo/Desktop/mst/backend/.env')
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
 class AIService:
     def __init__(self):
         """Initialize AI service with Groq API only."""
@@ -22,6 +26,7 @@ class AIService:
         self.groq_temperature = float(os.getenv("GROQ_TEMPERATURE", "0.7"))
         
         self._enabled = bool(self.groq_api_key)
+        self.llm_client = ResilientLLMClient(GROQ_CHAT_URL)
         
         if self._enabled:
             logger.info(f"AIService initialized with model: {self.groq_model}")
@@ -31,6 +36,14 @@ class AIService:
     def is_enabled(self) -> bool:
         """Check if AI service is enabled."""
         return self._enabled
+
+    def is_available(self) -> bool:
+        """Enabled and not failing fast (circuit breaker open)."""
+        return self._enabled and self.llm_client.is_available()
+
+    def llm_stats(self) -> Dict[str, Any]:
+        """Breaker, latency and concurrency state of the provider client."""
+        return self.llm_client.stats()
     
     async def generate_embeddings(self, text: str) -> List[float]:
         """Generate embeddings for text using a simple fallback method."""
@@ -85,43 +98,10 @@ class AIService:
             )
         
         try:
-            # Prepare messages for Groq API
-            formatted_messages = []
-            
-            # Add system message with context
-            system_content = "You are an expert AI assistant for machine tool technical support. You help customers with troubleshooting, maintenance, and operation of manufacturing equipment."
-            if context:
-                system_content += f"\n\nContext Information:\n{context}"
-            
-            formatted_messages.append({"role": "system", "content": system_content})
-            
-            # Add user messages
-            for msg in messages:
-                if msg.get('role') in ['user', 'assistant']:
-                    formatted_messages.append({"role": msg['role'], "content": msg['content']})
-            
-            headers = {
-                "Authorization": f"Bearer {self.groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": self.groq_model,
-                "messages": formatted_messages,
-                "max_tokens": max_tokens or self.groq_max_tokens,
-                "temperature": temperature or self.groq_temperature,
-                "stream": False
-            }
-            
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions", 
-                headers=headers, 
-                json=payload, 
-                timeout=60
+            data = await self.llm_client.post_json(
+                self._build_payload(messages, context, max_tokens, temperature, stream=False),
+                self._headers()
             )
-            response.raise_for_status()
-            
-            data = response.json()
             
             return {
                 "response": data["choices"][0]["message"]["content"],
@@ -130,12 +110,8 @@ class AIService:
                 "confidence": self._calculate_confidence(data["usage"])
             }
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Groq API request failed: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"AI service unavailable: {str(e)}"
-            )
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Chat completion failed: {str(e)}")
             raise HTTPException(
@@ -143,6 +119,89 @@ class AIService:
                 detail=f"Failed to generate completion: {str(e)}"
             )
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat completion from Groq.
+
+        Yields {"delta": text} for each token chunk, then one final
+        {"model", "usage", "confidence"} item. Closing the generator (e.g. on
+        cancellation) closes the upstream HTTP stream.
+        """
+        if not self._enabled:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI service is not configured. Please set GROQ_API_KEY."
+            )
+
+        payload = self._build_payload(messages, context, max_tokens, temperature, stream=True)
+        model = self.groq_model
+        usage: Optional[Dict[str, int]] = None
+        completion_chars = 0
+        async with self.llm_client.stream(payload, self._headers()) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                model = chunk.get("model", model)
+                # Groq reports usage on the last chunk under x_groq
+                usage = chunk.get("usage") or chunk.get("x_groq", {}).get("usage") or usage
+                for choice in chunk.get("choices", []):
+                    delta = choice.get("delta", {}).get("content")
+                    if delta:
+                        completion_chars += len(delta)
+                        yield {"delta": delta}
+
+        if not usage:
+            completion_tokens = max(1, completion_chars // 4)
+            usage = {"prompt_tokens": 0, "completion_tokens": completion_tokens, "total_tokens": completion_tokens}
+        yield {"model": model, "usage": usage, "confidence": self._calculate_confidence(usage)}
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.groq_api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        context: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        stream: bool
+    ) -> Dict[str, Any]:
+        """Prepare the Groq request: system prompt with context, then user/assistant turns."""
+        formatted_messages = []
+        
+        # Add system message with context
+        system_content = "You are an expert AI assistant for machine tool technical support. You help customers with troubleshooting, maintenance, and operation of manufacturing equipment."
+        if context:
+            system_content += f"\n\nContext Information:\n{context}"
+        
+        formatted_messages.append({"role": "system", "content": system_content})
+        
+        # Add user messages
+        for msg in messages:
+            if msg.get('role') in ['user', 'assistant']:
+                formatted_messages.append({"role": msg['role'], "content": msg['content']})
+        
+        return {
+            "model": self.groq_model,
+            "messages": formatted_messages,
+            "max_tokens": max_tokens or self.groq_max_tokens,
+            "temperature": temperature or self.groq_temperature,
+            "stream": stream
+        }
+
     def _calculate_confidence(self, usage: Dict[str, int]) -> float:
         """Calculate confidence score based on response characteristics."""
         # Simple confidence calculation based on token usage
@@ -0,0 +1,204 @@
+# Chunk Store - full chunk text keyed by vector id, outside the vector index
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cachetools import LRUCache
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from ...model.rag_chunk import RagChunk
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_STORE_CACHE_SIZE = int(os.getenv("CHUNK_STORE_CACHE_SIZE", 5000))
+# Ids per IN (...) lookup or delete
+CHUNK_STORE_BATCH = int(os.getenv("CHUNK_STORE_BATCH", 500))
+
+# Vector ids are unique within a namespace only, as in Pinecone
+ChunkKey = Tuple[str, str]  # (namespace, vector_id)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_vector_id(title: str, chunk_index: int, text: str, owner: Optional[str] = None) -> str:
+    """
+    Stable id: the same chunk of the same document always maps to the same
+    vector. owner (e.g. the knowledge base entry) is part of it, so two
+    entries holding the same manual never share, and delete, each other's
+    vectors. The title is hashed to keep ids short.
+    """
+    source = hashlib.sha256(f"{owner or ''}\x00{title}".encode("utf-8")).hexdigest()[:16]
+    return f"{source}_{chunk_index}_{content_hash(text)[:16]}"
+
+
+class ChunkStore:
+    """
+    Chunk text in the rag_chunks table, so vector metadata holds only the
+    small fields used for filtering. Search returns ids and scores; the text
+    of the candidates is then fetched in one batched lookup, with an LRU in
+    front for chunks that keep winning (popular manuals, common alarms).
+    Rows are keyed by (namespace, vector_id), like the vectors themselves.
+
+    Calls are blocking; the async wrappers run them in a worker thread.
+    """
+
+    def __init__(self, engine=None, cache_size: int = CHUNK_STORE_CACHE_SIZE):
+        self._engine = engine
+        self._lock = threading.Lock()
+        self._texts: LRUCache = LRUCache(maxsize=cache_size)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from ...routes.utils.database import engine
+            self._engine = engine
+        return self._engine
+
+    # --- Writes ---
+    def put_many(self, chunks: Sequence[Dict[str, Any]], namespace: str) -> int:
+        """
+        Store chunks ({"vector_id", "content", "title", "chunk_index" and
+        optional "document_type", "machine_type", "company", "kb_id",
+        "document_id"}), replacing any rows with the same vector ids in
+        namespace.
+        """
+        if not chunks:
+            return 0
+        now = datetime.utcnow()
+        rows = [
+            {
+                "vector_id": chunk["vector_id"],
+                "namespace": namespace,
+                "title": chunk.get("title") or "Untitled",
+                "document_type": chunk.get("document_type"),
+                "machine_type": chunk.get("machine_type"),
+                "company": chunk.get("company"),
+                "chunk_index": chunk.get("chunk_index", 0),
+                "kb_id": chunk.get("kb_id"),
+                "document_id": chunk.get("document_id"),
+                "content": chunk["content"],
+                "content_hash": content_hash(chunk["content"]),
+                "created_at": now,
+            }
+            for chunk in chunks
+        ]
+        ids = [row["vector_id"] for row in rows]
+        with Session(self.engine) as db:
+            for batch in _batches(ids, CHUNK_STORE_BATCH):
+                db.exec(delete(RagChunk).where( # type: ignore
+                    RagChunk.namespace == namespace, RagChunk.vector_id.in_(batch) # type: ignore
+                ))
+            db.execute(insert(RagChunk.__table__), rows) # type: ignore
+            db.commit()
+        self._forget([(namespace, vector_id) for vector_id in ids])
+        return len(rows)
+
+    def delete_many(self, keys: Iterable[ChunkKey]) -> int:
+        keys = list(keys)
+        removed = 0
+        with Session(self.engine) as db:
+            for namespace, ids in _by_namespace(keys).items():
+                for batch in _batches(ids, CHUNK_STORE_BATCH):
+                    removed += db.exec(delete(RagChunk).where( # type: ignore
+                        RagChunk.namespace == namespace, RagChunk.vector_id.in_(batch) # type: ignore
+                    )).rowcount
+            db.commit()
+        self._forget(keys)
+        return removed
+
+    def delete_namespaces(self, namespaces: Sequence[str]) -> int:
+        if not namespaces:
+            return 0
+        with Session(self.engine) as db:
+            removed = db.exec(delete(RagChunk).where(RagChunk.namespace.in_(namespaces))).rowcount # type: ignore
+            db.commit()
+        self.clear()
+        return removed
+
+    # --- Reads ---
+    def get_many(self, keys: Iterable[ChunkKey]) -> Dict[ChunkKey, str]:
+        """Text by (namespace, vector_id); keys with no stored chunk are left out"""
+        found: Dict[ChunkKey, str] = {}
+        missing: List[ChunkKey] = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                text = self._texts.get(key)
+                if text is None:
+                    missing.append(key)
+                else:
+                    found[key] = text
+            self.hits += len(found)
+            self.misses += len(missing)
+        if not missing:
+            return found
+
+        loaded: Dict[ChunkKey, str] = {}
+        with Session(self.engine) as db:
+            for namespace, ids in _by_namespace(missing).items():
+                for batch in _batches(ids, CHUNK_STORE_BATCH):
+                    rows = db.exec(
+                        select(RagChunk.vector_id, RagChunk.content).where(
+                            RagChunk.namespace == namespace, RagChunk.vector_id.in_(batch) # type: ignore
+                        )
+                    ).all()
+                    loaded.update({(namespace, vector_id): content for vector_id, content in rows})
+        with self._lock:
+            for key, text in loaded.items():
+                self._texts[key] = text
+        found.update(loaded)
+        return found
+
+    async def aput_many(self, chunks: Sequence[Dict[str, Any]], namespace: str) -> int:
+        return await asyncio.to_thread(self.put_many, chunks, namespace)
+
+    async def aget_many(self, keys: Iterable[ChunkKey]) -> Dict[ChunkKey, str]:
+        return await asyncio.to_thread(self.get_many, list(keys))
+
+    async def adelete_many(self, keys: Iterable[ChunkKey]) -> int:
+        return await asyncio.to_thread(self.delete_many, list(keys))
+
+    async def adelete_namespaces(self, namespaces: Sequence[str]) -> int:
+        return await asyncio.to_thread(self.delete_namespaces, namespaces)
+
+    # --- Cache ---
+    def _forget(self, keys: Iterable[ChunkKey]) -> None:
+        with self._lock:
+            for key in keys:
+                self._texts.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._texts.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"cached": len(self._texts), "hits": self.hits, "misses": self.misses}
+
+
+def _by_namespace(keys: Iterable[ChunkKey]) -> Dict[str, List[str]]:
+    grouped: Dict[str, List[str]] = defaultdict(list)
+    for namespace, vector_id in keys:
+        grouped[namespace].append(vector_id)
+    return grouped
+
+
+def _batches(items: Sequence[str], size: int) -> Iterable[Sequence[str]]:
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# Create global instance
+chunk_store = ChunkStore()
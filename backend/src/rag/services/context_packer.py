@@ -0,0 +1,128 @@
+# Context Packer - MMR selection of retrieved chunks within a token budget
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .history_service import estimate_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Candidates fetched per chunk finally used, so MMR has alternatives to choose from
+CONTEXT_OVERSAMPLE = int(os.getenv("CONTEXT_OVERSAMPLE", 4))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1200))
+# 1.0 ranks purely by relevance, 0.0 purely by novelty
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", 0.7))
+# Candidates at least this similar to a selected chunk are treated as duplicates
+CONTEXT_DUPLICATE_SIMILARITY = float(os.getenv("CONTEXT_DUPLICATE_SIMILARITY", 0.95))
+# Shared text shorter than this is coincidence, not chunk overlap
+CONTEXT_MIN_OVERLAP_CHARS = int(os.getenv("CONTEXT_MIN_OVERLAP_CHARS", 20))
+CONTEXT_MAX_OVERLAP_CHARS = int(os.getenv("CONTEXT_MAX_OVERLAP_CHARS", 200))
+
+
+class ContextPacker:
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        mmr_lambda: float = CONTEXT_MMR_LAMBDA,
+        duplicate_similarity: float = CONTEXT_DUPLICATE_SIMILARITY
+    ):
+        """Initialize context packer."""
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_similarity = duplicate_similarity
+
+    def pack(
+        self,
+        candidates: List[Dict[str, Any]],
+        max_chunks: int,
+        token_budget: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Choose which retrieved chunks go into the prompt.
+
+        candidates are search matches ({"score", "metadata", optional
+        "values"}). Each step takes the candidate with the best maximal
+        marginal relevance per token that still fits the budget: relevance is
+        the search score and redundancy the highest cosine similarity to an
+        already chosen chunk, using the stored vectors. Text a chunk shares
+        with a chosen neighbour (the splitter's overlap) is trimmed before it
+        is costed. Returns the chosen matches in selection order, each with
+        the trimmed "text" to use.
+        """
+        budget = token_budget or self.token_budget
+        pool = [c for c in candidates if (c.get("metadata") or {}).get("chunk_text")]
+        if not pool:
+            return []
+
+        vectors = self._unit_vectors(pool)
+        relevance = np.array([float(c.get("score") or 0.0) for c in pool])
+        max_similarity = np.zeros(len(pool))
+        remaining = set(range(len(pool)))
+        chosen: List[Dict[str, Any]] = []
+        chosen_texts: List[str] = []
+        used = 0
+
+        while remaining and len(chosen) < max_chunks:
+            best = None
+            best_density = 0.0
+            best_text = ""
+            best_cost = 0
+            for i in list(remaining):
+                if chosen and max_similarity[i] >= self.duplicate_similarity:
+                    remaining.discard(i)  # near-identical passage, e.g. another manual revision
+                    continue
+                text = _trim_overlap(pool[i]["metadata"]["chunk_text"], chosen_texts)
+                if len(text.strip()) < CONTEXT_MIN_OVERLAP_CHARS:
+                    remaining.discard(i)  # nothing new once the overlap is removed
+                    continue
+                cost = estimate_tokens(text)
+                if used + cost > budget:
+                    continue
+                score = self.mmr_lambda * relevance[i] - (1 - self.mmr_lambda) * max_similarity[i]
+                density = score / cost
+                if best is None or density > best_density:
+                    best, best_density, best_text, best_cost = i, density, text, cost
+            if best is None or best_density <= 0:
+                break
+
+            remaining.discard(best)
+            chosen.append(dict(pool[best], text=best_text))
+            chosen_texts.append(best_text)
+            used += best_cost
+            if vectors is not None:
+                max_similarity = np.maximum(max_similarity, vectors @ vectors[best])
+
+        logger.info(f"Packed {len(chosen)} of {len(pool)} candidate chunks into {used} tokens")
+        return chosen
+
+    @staticmethod
+    def _unit_vectors(pool: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Row-normalised candidate vectors, or None if the search omitted them"""
+        if not all(c.get("values") for c in pool):
+            return None
+        matrix = np.asarray([c["values"] for c in pool], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def _trim_overlap(text: str, chosen_texts: List[str]) -> str:
+    """Drop a leading or trailing run of text that a chosen chunk already contains"""
+    for other in chosen_texts:
+        limit = min(len(text), len(other), CONTEXT_MAX_OVERLAP_CHARS)
+        for size in range(limit, CONTEXT_MIN_OVERLAP_CHARS - 1, -1):
+            if other.endswith(text[:size]):
+                text = text[size:]
+                break
+            if other.startswith(text[-size:]):
+                text = text[:-size]
+                break
+    return text
+
+
+# Create global instance
+context_packer = ContextPacker()
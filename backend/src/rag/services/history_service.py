@@ -0,0 +1,155 @@
+# History Service - token-budgeted chat history with rolling summaries
+import os
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import or_, update
+from sqlmodel import Session, select, func
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 1500))
+# Summarise once this many messages have slid out of the recent window
+HISTORY_SUMMARY_BATCH = int(os.getenv("HISTORY_SUMMARY_BATCH", 6))
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", 300))
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a machine tool support conversation. "
+    "Merge the new messages into the existing summary. Keep machine details, "
+    "error codes, symptoms, steps already tried and their outcomes. Write at "
+    "most 200 words of plain prose."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+
+class HistoryService:
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET):
+        """Initialize history service."""
+        self.token_budget = token_budget
+        self._refreshing: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def pack(
+        self,
+        messages: List[Dict[str, Any]],
+        summary: Optional[str] = None,
+        token_budget: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Keep the newest messages (oldest first) that fit the token budget.
+
+        The budget includes the summary, so prompt size stays constant however
+        long the session runs. The latest message is always kept, truncated
+        if it alone exceeds the budget.
+        """
+        budget = (token_budget or self.token_budget) - (estimate_tokens(summary) if summary else 0)
+        packed: List[Dict[str, Any]] = []
+        used = 0
+        for message in reversed(messages):
+            cost = estimate_tokens(message["content"])
+            if used + cost > budget:
+                if not packed:
+                    packed.append(dict(message, content=message["content"][:max(budget, 1) * 4]))
+                break
+            packed.append(message)
+            used += cost
+        packed.reverse()
+        return packed
+
+    # --- Rolling summary ---
+    def schedule_refresh(self, engine, session_id: int, window_start_message_id: Optional[int]) -> None:
+        """
+        Refresh the session summary in the background when enough messages
+        have fallen out of the recent window. Never blocks the chat turn.
+        """
+        if window_start_message_id is None or session_id in self._refreshing:
+            return
+        self._refreshing.add(session_id)
+        task = asyncio.create_task(self._refresh(engine, session_id, window_start_message_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, engine, session_id: int, window_start_message_id: int) -> None:
+        from ...model.models import ChatMessage, ChatSession, User
+        from ...routes.utils.usage_meter import usage_meter
+        from .ai_service import ai_service
+
+        try:
+            if not ai_service.is_enabled():
+                return
+            with Session(engine) as db:
+                chat_session = db.get(ChatSession, session_id)
+                if not chat_session:
+                    return
+                summarised_up_to = chat_session.summary_message_id or 0
+                pending = db.exec(
+                    select(func.count(ChatMessage.message_id))
+                    .where(ChatMessage.session_id == session_id)
+                    .where(ChatMessage.message_id > summarised_up_to)
+                    .where(ChatMessage.message_id < window_start_message_id)
+                ).one()
+                if pending < HISTORY_SUMMARY_BATCH:
+                    return
+
+                new_messages = db.exec(
+                    select(ChatMessage)
+                    .where(ChatMessage.session_id == session_id)
+                    .where(ChatMessage.message_id > summarised_up_to)
+                    .where(ChatMessage.message_id < window_start_message_id)
+                    .order_by(ChatMessage.message_id.asc())
+                ).all()
+                transcript = "\n".join(f"{msg.role}: {msg.content}" for msg in new_messages)
+                previous_summary = chat_session.summary or "(none yet)"
+                last_message_id = new_messages[-1].message_id
+                user_id = chat_session.user_id
+                owner = db.get(User, user_id)
+                company_name = owner.company_name if owner else None
+
+            result = await ai_service.chat_completion(
+                messages=[{
+                    "role": "user",
+                    "content": f"Existing summary:\n{previous_summary}\n\nNew messages:\n{transcript}"
+                }],
+                context=SUMMARY_PROMPT,
+                max_tokens=HISTORY_SUMMARY_MAX_TOKENS,
+                temperature=0.2
+            )
+
+            with Session(engine) as db:
+                # Conditional so a refresh that already got further is not undone.
+                # updated_at is pinned: it versions the in-memory history windows.
+                db.exec(
+                    update(ChatSession)
+                    .where(ChatSession.session_id == session_id)
+                    .where(or_(
+                        ChatSession.summary_message_id.is_(None), # type: ignore
+                        ChatSession.summary_message_id < last_message_id
+                    ))
+                    .values(
+                        summary=result["response"],
+                        summary_message_id=last_message_id,
+                        updated_at=ChatSession.updated_at
+                    )
+                )
+                # Summaries are spent on the user's behalf, so they count towards the budget
+                usage_meter.record(
+                    db, user_id, company_name, result.get("model"), result.get("usage"),
+                    purpose="summary", session_id=session_id
+                )
+                db.commit()
+            logger.info(f"Refreshed summary for chat session {session_id} up to message {last_message_id}")
+        except Exception as e:
+            logger.error(f"Summary refresh failed for chat session {session_id}: {str(e)}")
+        finally:
+            self._refreshing.discard(session_id)
+
+
+# Create global instance
+history_service = HistoryService()
@@ -0,0 +1,365 @@
+# HNSW Index - approximate nearest-neighbour graph over the local vector store
+import os
+import math
+import heapq
+import random
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .local_vector_index import LOCAL_INDEX_DIM, LOCAL_INDEX_QUANTIZATION, FlatVectorIndex, Match, MetadataPredicate, _normalize
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Links per node (2 * M on the bottom layer); more links, better recall, more memory
+HNSW_M = int(os.getenv("HNSW_M", 16))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", 200))
+# Candidate list size per query; raise for recall, lower for latency
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 64))
+# Rebuild the graph once this share of its nodes are deleted or overwritten (0 disables)
+HNSW_COMPACT_RATIO = float(os.getenv("HNSW_COMPACT_RATIO", 0.3))
+
+# (score, row)
+Scored = Tuple[float, int]
+
+
+class HNSWIndex(FlatVectorIndex):
+    """
+    Hierarchical navigable small world graph (Malkov & Yashunin) on top of
+    the flat vector store, so every storage mode (float32, int8, pq) works.
+
+    Inserts link each new node into the graph incrementally. Deletes and
+    overwrites leave tombstones: the node keeps routing searches but is never
+    returned, and once tombstones pass HNSW_COMPACT_RATIO the graph is
+    rebuilt on a background thread and swapped in. Metadata filters are applied during the search; if
+    a selective filter leaves fewer than top_k matches among the visited
+    nodes, the search falls back to an exact scan of the matching rows.
+    """
+
+    update_in_place = False
+
+    def __init__(
+        self,
+        dim: int = LOCAL_INDEX_DIM,
+        quantization: str = LOCAL_INDEX_QUANTIZATION,
+        m: int = HNSW_M,
+        ef_construction: int = HNSW_EF_CONSTRUCTION,
+        ef_search: int = HNSW_EF_SEARCH,
+        compact_ratio: float = HNSW_COMPACT_RATIO,
+        seed: int = 0,
+        **options: Any
+    ):
+        self.m = max(2, m)
+        self.m0 = 2 * self.m
+        self.ef_construction = max(ef_construction, self.m)
+        self.ef_search = ef_search
+        self.compact_ratio = compact_ratio
+        self._level_mult = 1 / math.log(self.m)
+        self._rng = random.Random(seed)
+        # Writes made while a compaction builds its graph, replayed onto it before the swap
+        self._journal: Optional[List[Tuple[str, tuple]]] = None
+        self._compaction: Optional[threading.Thread] = None
+        self._compact_lock = threading.Lock()
+        super().__init__(dim=dim, quantization=quantization, **options)
+
+    def _reset(self) -> None:
+        super()._reset()
+        # Bottom layer as a fixed-width matrix (-1 = empty slot); upper layers are sparse
+        self._links0 = np.full((0, self.m0), -1, dtype=np.int32)
+        self._upper: Dict[int, List[List[int]]] = {}
+        self._entry = -1
+        self._max_level = -1
+
+    def _grow(self, capacity: int) -> None:
+        super()._grow(capacity)
+        links = np.full((capacity, self.m0), -1, dtype=np.int32)
+        links[:len(self._links0)] = self._links0
+        self._links0 = links
+
+    # --- Writes ---
+    def add(self, ids: Sequence[str], vectors: Any, metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None) -> List[int]:
+        """Rows are valid until the next compaction renumbers them"""
+        with self._lock:
+            rows = super().add(ids, vectors, metadata)
+            for row in rows:
+                self._insert(row)
+            if self._journal is not None:
+                self._journal.append(("add", (list(ids), np.array(vectors, dtype=np.float32), metadata)))
+            # Overwrites tombstone the old rows too (re-ingesting a document rewrites its ids)
+            self._schedule_compaction()
+            return rows
+
+    def delete(self, ids: Sequence[str]) -> int:
+        with self._lock:
+            removed = super().delete(ids)
+            if self._journal is not None:
+                self._journal.append(("delete", (list(ids),)))
+            self._schedule_compaction()
+            return removed
+
+    def _should_compact(self) -> bool:
+        return bool(self.compact_ratio) and self._tombstones > self.compact_ratio * max(self._size, 1)
+
+    def _schedule_compaction(self) -> None:
+        """Start a background compaction if one is due and none is running (lock held)"""
+        if self._compaction is None and self._should_compact():
+            self._compaction = threading.Thread(target=self._compact_in_background, name="hnsw-compact", daemon=True)
+            self._compaction.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            while True:
+                self.compact()
+                with self._lock:
+                    # Writes replayed during the swap may have tombstoned enough for another round
+                    if not self._should_compact():
+                        return
+        except Exception as e:
+            logger.error(f"HNSW compaction failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._compaction = None
+
+    def compact(self) -> None:
+        """
+        Rebuild the graph from live vectors only, dropping tombstones. The
+        new graph is built from a copy of the live rows without holding the
+        lock, so searches and writes carry on; writes made in the meantime
+        are replayed onto it before it replaces the old one.
+        """
+        with self._compact_lock:
+            with self._lock:
+                rows = np.array(sorted(self._rows.values()), dtype=np.int64)
+                ids = [self._ids[row] for row in rows]
+                metadata = [self._metadata[row] for row in rows]
+                vectors = self.vectors(rows) if len(rows) else np.zeros((0, self.dim), dtype=np.float32)
+                dropped = self._tombstones
+                # A trained quantizer is never retrained, so both graphs can share it
+                quantizer = self.quantizer if self.quantized else None
+                self._journal = []
+
+            try:
+                fresh = HNSWIndex(**dict(self.settings(), compact_ratio=0))
+                if quantizer is not None:
+                    fresh.quantizer = quantizer
+                if ids:
+                    fresh.add(ids, vectors, metadata) # type: ignore
+                with self._lock:
+                    for op, args in self._journal:
+                        getattr(fresh, op)(*args)
+                    self._adopt(fresh)
+            finally:
+                with self._lock:
+                    self._journal = None
+            logger.info(f"Compacted HNSW index: {len(ids)} vectors kept, {dropped} tombstones dropped")
+
+    def _adopt(self, other: "HNSWIndex") -> None:
+        """Take over another index's vectors and graph (lock held)"""
+        for name in (
+            "quantizer", "_codes", "_full", "_live", "_size", "_ids", "_metadata", "_rows", "_free",
+            "_tombstones", "_links0", "_upper", "_entry", "_max_level",
+        ):
+            setattr(self, name, getattr(other, name))
+
+    def _insert(self, row: int) -> None:
+        score = self.scorer(self.vector(row))
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        if level:
+            self._upper[row] = [[] for _ in range(level)]
+        if self._entry < 0:
+            self._entry, self._max_level = row, level
+            return
+
+        entry = [(float(score(np.array([self._entry]))[0]), self._entry)]
+        for layer in range(self._max_level, level, -1):
+            entry = [max(self._search_layer(score, entry, 1, layer))]
+        for layer in range(min(level, self._max_level), -1, -1):
+            found = self._search_layer(score, entry, self.ef_construction, layer)
+            neighbours = self._select(row, found, self.m)
+            self._set_links(row, layer, neighbours)
+            for neighbour in neighbours:
+                self._connect(neighbour, row, layer)
+            entry = found
+        if level > self._max_level:
+            self._entry, self._max_level = row, level
+
+    def _select(self, row: int, found: List[Scored], limit: int) -> List[int]:
+        """
+        Neighbour selection heuristic: walking candidates from the closest,
+        keep one only if it is closer to row than to every neighbour already
+        kept, so links spread in different directions instead of clustering.
+        """
+        ordered = sorted((item for item in found if item[1] != row), reverse=True)
+        if len(ordered) <= limit:
+            return [candidate for _, candidate in ordered]
+        vectors = self.vectors(np.array([candidate for _, candidate in ordered]))
+        kept: List[int] = []
+        for i, (similarity, _) in enumerate(ordered):
+            if kept and float((vectors[kept] @ vectors[i]).max()) > similarity:
+                continue
+            kept.append(i)
+            if len(kept) == limit:
+                break
+        return [ordered[i][1] for i in kept]
+
+    def _connect(self, row: int, new: int, layer: int) -> None:
+        links = self._neighbours(row, layer).tolist()
+        limit = self.m0 if layer == 0 else self.m
+        if len(links) < limit:
+            self._set_links(row, layer, links + [new])
+            return
+        candidates = np.array(links + [new])
+        similarities = self.vectors(candidates) @ self.vector(row)
+        self._set_links(row, layer, self._select(row, list(zip(similarities.tolist(), candidates.tolist())), limit))
+
+    def _neighbours(self, row: int, layer: int) -> np.ndarray:
+        if layer == 0:
+            links = self._links0[row]
+            return links[links >= 0]
+        return np.array(self._upper[row][layer - 1], dtype=np.int32)
+
+    def _set_links(self, row: int, layer: int, links: List[int]) -> None:
+        if layer == 0:
+            self._links0[row] = -1
+            self._links0[row, :len(links)] = links
+        else:
+            self._upper[row][layer - 1] = links
+
+    def _search_layer(
+        self,
+        score: Callable[[np.ndarray], np.ndarray],
+        entry: List[Scored],
+        ef: int,
+        layer: int,
+        accept: Optional[Callable[[int], bool]] = None,
+        accepted: Optional[List[Scored]] = None
+    ) -> List[Scored]:
+        """
+        Best-first search of one layer from the entry points. Returns the ef
+        closest nodes seen; when accept is given, nodes passing it are also
+        collected (best ef) into accepted, without changing the route.
+        """
+        visited = np.zeros(self._size, dtype=bool)
+        visited[[row for _, row in entry]] = True
+        candidates = [(-similarity, row) for similarity, row in entry]
+        heapq.heapify(candidates)
+        nearest = list(entry)
+        heapq.heapify(nearest)
+        if accept is not None and accepted is not None:
+            for item in entry:
+                if accept(item[1]):
+                    _keep(accepted, item, ef)
+
+        while candidates:
+            negative, row = heapq.heappop(candidates)
+            if len(nearest) >= ef and -negative < nearest[0][0]:
+                break
+            fresh = self._neighbours(row, layer)
+            fresh = fresh[~visited[fresh]]
+            if not len(fresh):
+                continue
+            visited[fresh] = True
+            for neighbour, similarity in zip(fresh.tolist(), score(fresh).tolist()):
+                if len(nearest) < ef or similarity > nearest[0][0]:
+                    heapq.heappush(candidates, (-similarity, neighbour))
+                    _keep(nearest, (similarity, neighbour), ef)
+                    if accept is not None and accepted is not None and accept(neighbour):
+                        _keep(accepted, (similarity, neighbour), ef)
+        return nearest
+
+    # --- Reads ---
+    def search(
+        self,
+        query: Any,
+        top_k: int = 5,
+        allowed: Optional[np.ndarray] = None,
+        predicate: Optional[MetadataPredicate] = None,
+        ef: Optional[int] = None
+    ) -> List[Match]:
+        with self._lock:
+            if not self._rows:
+                return []
+            q = _normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+            score = self.scorer(q)
+            wanted = top_k * self.rescore_factor if self.rescore and self.quantized else top_k
+            ef = max(ef or self.ef_search, wanted)
+
+            def accept(row: int) -> bool:
+                return bool(self._live[row]) and (allowed is None or bool(allowed[row])) and (
+                    predicate is None or predicate(self._metadata[row])
+                )
+
+            entry = [(float(score(np.array([self._entry]))[0]), self._entry)]
+            for layer in range(self._max_level, 0, -1):
+                entry = [max(self._search_layer(score, entry, 1, layer))]
+            accepted: List[Scored] = []
+            self._search_layer(score, entry, ef, 0, accept, accepted)
+
+            if len(accepted) < top_k and (allowed is not None or predicate is not None):
+                # Selective filter: too few matches along the route, so scan them exactly
+                return super().search(q, top_k, allowed=allowed, predicate=predicate)
+
+            ranked = sorted(accepted, reverse=True)[:wanted]
+            if self.rescore and self.quantized and ranked:
+                rows = np.array([row for _, row in ranked])
+                ranked = sorted(zip(self.exact_scores(q, rows).tolist(), rows.tolist()), reverse=True)
+            return [(self._ids[row], float(similarity), self._metadata[row]) for similarity, row in ranked[:top_k]] # type: ignore
+
+    # --- Persistence ---
+    def settings(self) -> Dict[str, Any]:
+        return dict(
+            super().settings(),
+            m=self.m,
+            ef_construction=self.ef_construction,
+            ef_search=self.ef_search,
+            compact_ratio=self.compact_ratio,
+        )
+
+    def export_state(self) -> Dict[str, Any]:
+        with self._lock:
+            state = super().export_state()
+            # Upper layers as one padded (nodes, levels, m) block; only ~1/M of nodes have any
+            rows = sorted(self._upper)
+            levels = max((len(self._upper[row]) for row in rows), default=0)
+            upper = np.full((len(rows), levels, self.m), -1, dtype=np.int32)
+            for i, row in enumerate(rows):
+                for level, links in enumerate(self._upper[row]):
+                    upper[i, level, :len(links)] = links
+            state["type"] = "hnsw"
+            state["arrays"].update(
+                links0=self._links0[:self._size],
+                upper_rows=np.array(rows, dtype=np.int64),
+                upper_levels=np.array([len(self._upper[row]) for row in rows], dtype=np.int32),
+                upper=upper,
+            )
+            state["layout"].update(entry=self._entry, max_level=self._max_level)
+            return state
+
+    def _restore(self, state: Dict[str, Any]) -> None:
+        super()._restore(state)
+        arrays = state["arrays"]
+        self._links0 = arrays["links0"]
+        self._upper = {}
+        for row, depth, levels in zip(arrays["upper_rows"].tolist(), arrays["upper_levels"].tolist(), arrays["upper"]):
+            self._upper[row] = [[n for n in links if n >= 0] for links in levels[:depth].tolist()]
+        self._entry = state["layout"]["entry"]
+        self._max_level = state["layout"]["max_level"]
+
+    def memory_bytes(self) -> int:
+        upper = sum(8 * len(links) for levels in self._upper.values() for links in levels)
+        return super().memory_bytes() + self._links0[:self._size].nbytes + upper
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(super().stats(), index="hnsw", m=self.m, ef_search=self.ef_search, levels=self._max_level + 1)
+
+
+def _keep(heap: List[Scored], item: Scored, limit: int) -> None:
+    """Push onto a min-heap holding the best limit items"""
+    if len(heap) < limit:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
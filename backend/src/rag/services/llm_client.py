@@ -0,0 +1,390 @@
+# LLM Client - bounded, adaptive and fail-fast access to the completion provider
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", 32))
+# Whole-request budget across retries and hedges
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", 45))
+LLM_TIMEOUT_MIN_SECONDS = float(os.getenv("LLM_TIMEOUT_MIN_SECONDS", 5))
+LLM_TIMEOUT_MAX_SECONDS = float(os.getenv("LLM_TIMEOUT_MAX_SECONDS", 30))
+LLM_TIMEOUT_P99_MULTIPLIER = float(os.getenv("LLM_TIMEOUT_P99_MULTIPLIER", 2.0))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", 3))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", 2))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_LATENCY_SAMPLES = int(os.getenv("LLM_LATENCY_SAMPLES", 200))
+# Adaptive timeouts and hedging stay off until this many successes were seen
+LLM_LATENCY_MIN_SAMPLES = int(os.getenv("LLM_LATENCY_MIN_SAMPLES", 20))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", 20))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", 5))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", 0.5))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", 30))
+
+
+class LLMProviderError(Exception):
+    """One failed attempt. retryable failures also count against the breaker."""
+
+    def __init__(self, message: str, retryable: bool = True, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status_code = status_code
+
+
+# ============================================================================
+# LATENCY TRACKING
+# ============================================================================
+class LatencyTracker:
+    """Latencies of the most recent successful attempts, for percentiles"""
+
+    def __init__(self, size: int = LLM_LATENCY_SAMPLES):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self._samples),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+# ============================================================================
+# CIRCUIT BREAKER
+# ============================================================================
+class CircuitBreaker:
+    """
+    Opens when the failure rate over the last window_size attempts reaches
+    failure_rate (given at least min_calls), rejecting calls for
+    open_seconds. Then one probe is let through (half-open): success closes
+    the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window_size: int = LLM_BREAKER_WINDOW, min_calls: int = LLM_BREAKER_MIN_CALLS,
+                 failure_rate: float = LLM_BREAKER_FAILURE_RATE, open_seconds: float = LLM_BREAKER_OPEN_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_after(self) -> int:
+        if self._state != self.OPEN:
+            return 1
+        return max(1, int(self.open_seconds - (self._clock() - self._opened_at)))
+
+    def record_success(self) -> None:
+        if self._state == self.HALF_OPEN:
+            logger.info("LLM circuit breaker closed")
+            self._state = self.CLOSED
+            self._outcomes.clear()
+        self._probe_in_flight = False
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        self._outcomes.append(False)
+        if self._state == self.HALF_OPEN:
+            self._open()
+            return
+        failures = self._outcomes.count(False)
+        if (self._state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate):
+            self._open()
+
+    def release(self) -> None:
+        """An attempt ended without an outcome (e.g. a cancelled hedge)"""
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        logger.warning("LLM circuit breaker opened")
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+        self.times_opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "recent_failures": self._outcomes.count(False),
+            "recent_calls": len(self._outcomes),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+class ResilientLLMClient:
+    """
+    Async client for an OpenAI-compatible completion endpoint.
+
+    - at most max_in_flight provider attempts at once; beyond that callers
+      get an immediate 503 instead of queueing behind a slow provider;
+    - per-attempt timeouts follow observed latency (p99 x multiplier,
+      clamped), all inside one deadline for the whole request;
+    - optionally, a second (hedged) attempt starts once the first has taken
+      longer than p95, and whichever finishes first wins;
+    - a circuit breaker turns a provider outage into instant 503s, so
+      callers serve their degraded response without waiting.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        deadline_seconds: float = LLM_DEADLINE_SECONDS,
+        max_attempts: int = LLM_MAX_ATTEMPTS,
+        hedge_enabled: bool = LLM_HEDGE_ENABLED,
+        breaker: Optional[CircuitBreaker] = None,
+        latency: Optional[LatencyTracker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self.max_in_flight = max_in_flight
+        self.deadline_seconds = deadline_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.hedge_enabled = hedge_enabled
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = latency or LatencyTracker()
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._stats = {"requests": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                       "shed": 0, "failures": 0, "fast_failed": 0}
+
+    # --- Policy ---
+    def attempt_timeout(self) -> float:
+        p99 = self.latency.percentile(99)
+        if p99 is None or len(self.latency) < LLM_LATENCY_MIN_SAMPLES:
+            return LLM_TIMEOUT_MAX_SECONDS
+        return min(LLM_TIMEOUT_MAX_SECONDS, max(LLM_TIMEOUT_MIN_SECONDS, p99 * LLM_TIMEOUT_P99_MULTIPLIER))
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge_enabled or len(self.latency) < LLM_LATENCY_MIN_SAMPLES:
+            return None
+        return self.latency.percentile(95)
+
+    def is_available(self) -> bool:
+        """False while the breaker is open (callers can skip straight to a fallback)"""
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    # --- Requests ---
+    async def post_json(self, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        """POST payload and return the decoded JSON body, raising HTTPException on failure"""
+        self._stats["requests"] += 1
+        deadline = time.monotonic() + self.deadline_seconds
+        last_error: Optional[LLMProviderError] = None
+
+        for attempt in range(self.max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt:
+                self._stats["retries"] += 1
+                await asyncio.sleep(min(remaining / 2, random.uniform(0.1, 0.3)))
+            try:
+                return await self._hedged(payload, headers, deadline)
+            except LLMProviderError as e:
+                last_error = e
+                if not e.retryable:
+                    break
+
+        self._stats["failures"] += 1
+        detail = str(last_error) if last_error else "deadline exceeded"
+        if last_error is not None and last_error.status_code and not last_error.retryable:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"AI service error: {detail}")
+        raise self._unavailable(f"AI service unavailable: {detail}")
+
+    @asynccontextmanager
+    async def stream(self, payload: Dict[str, Any], headers: Dict[str, str]) -> AsyncIterator[httpx.Response]:
+        """
+        Open a streaming POST. Streams are admitted and count towards the
+        breaker, but are neither retried nor hedged once tokens may have
+        reached the caller.
+        """
+        self._stats["requests"] += 1
+        self._admit()
+        timeout = httpx.Timeout(self.attempt_timeout(), connect=LLM_CONNECT_TIMEOUT_SECONDS)
+        outcome: Optional[bool] = None
+        try:
+            async with self._get_client().stream("POST", self.url, headers=headers, json=payload,
+                                                 timeout=timeout) as response:
+                if response.status_code == 429 or response.status_code >= 500:
+                    outcome = False
+                    raise self._unavailable(f"AI service unavailable: HTTP {response.status_code}")
+                if response.status_code >= 400:
+                    outcome = True
+                    await response.aread()
+                    raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY,
+                                        detail=f"AI service error: HTTP {response.status_code}")
+                yield response
+                outcome = True
+        except httpx.HTTPError as e:
+            outcome = False
+            logger.error(f"LLM streaming request failed: {str(e)}")
+            raise self._unavailable(f"AI service unavailable: {str(e)}")
+        finally:
+            self._in_flight -= 1
+            self._settle(outcome)
+
+    async def _hedged(self, payload: Dict[str, Any], headers: Dict[str, str], deadline: float) -> Dict[str, Any]:
+        timeout = min(self.attempt_timeout(), deadline - time.monotonic())
+        primary = asyncio.ensure_future(self._attempt(payload, headers, timeout))
+        tasks = {primary}
+        try:
+            delay = self.hedge_delay()
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._in_flight < self.max_in_flight and self.breaker.state == CircuitBreaker.CLOSED:
+                    self._stats["hedges"] += 1
+                    hedge_timeout = min(timeout, deadline - time.monotonic())
+                    tasks.add(asyncio.ensure_future(self._attempt(payload, headers, hedge_timeout)))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error # type: ignore
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _attempt(self, payload: Dict[str, Any], headers: Dict[str, str], timeout: float) -> Dict[str, Any]:
+        self._admit()
+        self._stats["attempts"] += 1
+        started = time.monotonic()
+        outcome: Optional[bool] = None
+        try:
+            response = await self._get_client().post(
+                self.url, headers=headers, json=payload,
+                timeout=httpx.Timeout(timeout, connect=min(timeout, LLM_CONNECT_TIMEOUT_SECONDS))
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                outcome = False
+                raise LLMProviderError(f"HTTP {response.status_code}", status_code=response.status_code)
+            # A 4xx is our request's fault; the provider itself answered fine
+            outcome = True
+            if response.status_code >= 400:
+                raise LLMProviderError(f"HTTP {response.status_code}: {response.text[:200]}",
+                                       retryable=False, status_code=response.status_code)
+            self.latency.record(time.monotonic() - started)
+            return response.json()
+        except httpx.HTTPError as e:
+            outcome = False
+            logger.warning(f"LLM attempt failed after {time.monotonic() - started:.2f}s: {type(e).__name__} {str(e)}")
+            raise LLMProviderError(f"{type(e).__name__} {str(e)}".strip())
+        finally:
+            self._in_flight -= 1
+            self._settle(outcome)
+
+    # --- Internals ---
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            self._stats["fast_failed"] += 1
+            raise self._unavailable("AI service temporarily unavailable (circuit open)", self.breaker.retry_after())
+        if self._in_flight >= self.max_in_flight:
+            self.breaker.release()
+            self._stats["shed"] += 1
+            raise self._unavailable("AI service busy, please retry shortly")
+        self._in_flight += 1
+
+    def _settle(self, outcome: Optional[bool]) -> None:
+        if outcome is True:
+            self.breaker.record_success()
+        elif outcome is False:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    @staticmethod
+    def _unavailable(detail: str, retry_after: int = 1) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to one event loop; tests and CLIs may run several
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "attempt_timeout": round(self.attempt_timeout(), 3),
+            "hedge_delay": self.hedge_delay(),
+            "breaker": self.breaker.stats(),
+            "latency": self.latency.stats(),
+            **self._stats,
+        }
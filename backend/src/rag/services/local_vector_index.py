@@ -0,0 +1,617 @@
+# Local Vector Index - in-process vector storage with optional quantization
+import os
+import logging
+import time
+import threading
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .quantization import ProductQuantizer, ScalarQuantizer
+from .vector_persistence import DirectoryLock, SnapshotStore, WriteAheadLog
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOCAL_INDEX_DIM = int(os.getenv("LOCAL_INDEX_DIM", 1024))
+# float32 | int8 | pq
+LOCAL_INDEX_QUANTIZATION = os.getenv("LOCAL_INDEX_QUANTIZATION", "int8").lower()
+LOCAL_INDEX_PQ_SUBVECTORS = int(os.getenv("LOCAL_INDEX_PQ_SUBVECTORS", 64))
+# Re-score the best approximate candidates with exact float32 vectors (kept alongside the codes)
+LOCAL_INDEX_RESCORE = os.getenv("LOCAL_INDEX_RESCORE", "false").lower() == "true"
+LOCAL_INDEX_RESCORE_FACTOR = int(os.getenv("LOCAL_INDEX_RESCORE_FACTOR", 10))
+# Vectors stay float32 until this many have arrived, then the quantizer trains on them
+# and everything is encoded (0 = the mode's default: 1000 for int8, ~10k for pq)
+LOCAL_INDEX_MIN_TRAIN_SIZE = int(os.getenv("LOCAL_INDEX_MIN_TRAIN_SIZE", 0))
+# Training sample cap
+LOCAL_INDEX_TRAIN_SIZE = int(os.getenv("LOCAL_INDEX_TRAIN_SIZE", 10000))
+# hnsw | flat (exact scan)
+LOCAL_INDEX_TYPE = os.getenv("LOCAL_INDEX_TYPE", "hnsw").lower()
+# Directory for the write-ahead log and snapshots; unset keeps the index in memory only
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "")
+LOCAL_INDEX_SNAPSHOT_WAL_BYTES = int(os.getenv("LOCAL_INDEX_SNAPSHOT_WAL_BYTES", 64 * 1024 * 1024))
+
+QUANTIZATION_MODES = ("float32", "int8", "pq")
+
+# (id, score, metadata)
+Match = Tuple[str, float, Optional[Dict[str, Any]]]
+MetadataPredicate = Callable[[Optional[Dict[str, Any]]], bool]
+
+
+class FlatVectorIndex:
+    """
+    Exact-scan vector index over (optionally) quantized vectors.
+
+    Vectors are L2-normalised on insert, so scores are cosine similarities.
+    In "int8" and "pq" mode only codes are stored (1 KB or 64 bytes per
+    1024-dim vector instead of 4 KB as float32) and queries are scored
+    asymmetrically against the codes. With rescore enabled the float32
+    vectors are kept as well and the top top_k * rescore_factor approximate
+    candidates are re-ranked exactly, trading memory for recall.
+
+    Until min_train vectors have arrived the index stores and scores float32
+    vectors exactly; a quantizer trained on the first upsert batch (often a
+    handful of chunks) would fit the whole index to that one document. Once
+    enough are in, the quantizer trains on a sample of them (up to
+    LOCAL_INDEX_TRAIN_SIZE), every row is encoded, and the float32 copies
+    are dropped unless rescoring needs them. Small namespaces never get
+    there and simply stay exact.
+    """
+
+    # Subclasses that reference rows elsewhere (e.g. graph links) set this to
+    # False: overwrites and deletes then leave tombstones instead of reusing rows
+    update_in_place = True
+
+    def __init__(
+        self,
+        dim: int = LOCAL_INDEX_DIM,
+        quantization: str = LOCAL_INDEX_QUANTIZATION,
+        pq_subvectors: int = LOCAL_INDEX_PQ_SUBVECTORS,
+        rescore: bool = LOCAL_INDEX_RESCORE,
+        rescore_factor: int = LOCAL_INDEX_RESCORE_FACTOR,
+        min_train: int = LOCAL_INDEX_MIN_TRAIN_SIZE,
+    ):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {quantization}")
+        self.dim = dim
+        self.quantization = quantization
+        self.pq_subvectors = pq_subvectors
+        self.rescore = rescore or quantization == "float32"
+        self.rescore_factor = max(1, rescore_factor)
+        if quantization == "int8":
+            self.quantizer: Optional[Any] = ScalarQuantizer(dim)
+        elif quantization == "pq":
+            self.quantizer = ProductQuantizer(dim, m=pq_subvectors)
+        else:
+            self.quantizer = None
+        self.min_train = min_train or (self.quantizer.min_train_size if self.quantizer is not None else 0)
+
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop all vectors (a trained quantizer is kept)"""
+        self._codes: Optional[np.ndarray] = None
+        self._full: Optional[np.ndarray] = None
+        self._live = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._ids: List[Optional[str]] = []
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def quantized(self) -> bool:
+        """True once rows are stored as codes (False in float32 mode and before training)"""
+        return self.quantizer is not None and self.quantizer.is_trained
+
+    # --- Writes ---
+    def add(self, ids: Sequence[str], vectors: Any, metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None) -> List[int]:
+        """Insert or overwrite vectors by id; returns their row numbers"""
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim))
+        metadata = metadata or [None] * len(ids)
+        with self._lock:
+            codes = self.quantizer.encode(matrix) if self.quantized else None # type: ignore
+
+            rows = []
+            for i, vector_id in enumerate(ids):
+                row = self._rows.get(vector_id)
+                if row is None or not self.update_in_place:
+                    if row is not None:
+                        self._retire(row)
+                    row = self._allocate()
+                    self._rows[vector_id] = row
+                self._ids[row] = vector_id
+                self._metadata[row] = metadata[i]
+                self._live[row] = True
+                if codes is not None:
+                    self._codes[row] = codes[i] # type: ignore
+                if self._full is not None:
+                    self._full[row] = matrix[i]
+                rows.append(row)
+            if self.quantizer is not None and not self.quantized and len(self._rows) >= self.min_train:
+                self._train()
+            return rows
+
+    def _train(self) -> None:
+        """Train the quantizer on the live float32 rows and encode every row"""
+        live = np.flatnonzero(self._live[:self._size])
+        if len(live) > LOCAL_INDEX_TRAIN_SIZE:
+            live = np.sort(np.random.default_rng(0).choice(live, LOCAL_INDEX_TRAIN_SIZE, replace=False))
+        self.quantizer.train(np.asarray(self._full[live])) # type: ignore
+        width = self.quantizer.m if self.quantization == "pq" else self.dim # type: ignore
+        self._codes = np.zeros((len(self._live), width), dtype=self.quantizer.code_dtype) # type: ignore
+        for start in range(0, self._size, LOCAL_INDEX_TRAIN_SIZE):
+            end = min(start + LOCAL_INDEX_TRAIN_SIZE, self._size)
+            self._codes[start:end] = self.quantizer.encode(np.asarray(self._full[start:end])) # type: ignore
+        if not self.rescore:
+            self._full = None
+        logger.info(f"Trained {self.quantization} quantizer on {len(live)} vectors, encoded {len(self)}")
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """Remove vectors by id"""
+        removed = 0
+        with self._lock:
+            for vector_id in ids:
+                row = self._rows.pop(vector_id, None)
+                if row is not None:
+                    self._retire(row)
+                    removed += 1
+        return removed
+
+    def _retire(self, row: int) -> None:
+        self._live[row] = False
+        self._ids[row] = None
+        self._metadata[row] = None
+        if self.update_in_place:
+            self._free.append(row)
+        else:
+            self._tombstones += 1
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._size == len(self._live):
+            self._grow(max(1024, 2 * len(self._live)))
+        row = self._size
+        self._size += 1
+        self._ids.append(None)
+        self._metadata.append(None)
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        if self.quantized:
+            width = self.quantizer.m if self.quantization == "pq" else self.dim # type: ignore
+            self._codes = _resize(self._codes, (capacity, width), self.quantizer.code_dtype) # type: ignore
+        if self.rescore or not self.quantized:
+            self._full = _resize(self._full, (capacity, self.dim), np.float32)
+        self._live = _resize(self._live, (capacity,), bool)
+
+    # --- Reads ---
+    def get(self, vector_id: str) -> Optional[Tuple[np.ndarray, Optional[Dict[str, Any]]]]:
+        """Stored (possibly reconstructed) vector and metadata for an id"""
+        with self._lock:
+            row = self._rows.get(vector_id)
+            if row is None:
+                return None
+            return self.vector(row), self._metadata[row]
+
+    def vector(self, row: int) -> np.ndarray:
+        return self.vectors(np.array([row]))[0]
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Stored vectors for rows, decoded from their codes if needed"""
+        if self._full is not None:
+            return self._full[rows]
+        return self.quantizer.decode(self._codes[rows]) # type: ignore
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Scores of a normalised query against every row"""
+        if not self.quantized:
+            return self._full[:self._size] @ query # type: ignore
+        return self.quantizer.scores(query, self._codes[:self._size]) # type: ignore
+
+    def scorer(self, query: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+        """Scores of a normalised query against a few rows at a time"""
+        if not self.quantized:
+            return lambda rows: self._full[rows] @ query # type: ignore
+        score_codes = self.quantizer.scorer(query)
+        return lambda rows: score_codes(self._codes[rows]) # type: ignore
+
+    def exact_scores(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        return self._full[rows] @ query # type: ignore
+
+    def search(
+        self,
+        query: Any,
+        top_k: int = 5,
+        allowed: Optional[np.ndarray] = None,
+        predicate: Optional[MetadataPredicate] = None
+    ) -> List[Match]:
+        """
+        Best top_k (id, score, metadata) matches. allowed optionally masks
+        rows and has one entry per row; predicate filters on metadata.
+        """
+        with self._lock:
+            if not self._rows:
+                return []
+            q = _normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+            scores = self.scores(q)
+            eligible = self._live[:self._size].copy()
+            if allowed is not None:
+                eligible &= allowed[:self._size]
+            if predicate is not None:
+                eligible &= self.mask(predicate)
+            scores = np.where(eligible, scores, -np.inf)
+
+            wanted = top_k * self.rescore_factor if self.rescore and self.quantized else top_k
+            candidates = _top(scores, wanted)
+            candidates = candidates[np.isfinite(scores[candidates])]
+            if self.rescore and self.quantized and len(candidates):
+                exact = self.exact_scores(q, candidates)
+                order = np.argsort(-exact)[:top_k]
+                candidates, final = candidates[order], exact[order]
+            else:
+                candidates = candidates[:top_k]
+                final = scores[candidates]
+            return [(self._ids[row], float(score), self._metadata[row]) for row, score in zip(candidates, final)] # type: ignore
+
+    def mask(self, predicate: MetadataPredicate) -> np.ndarray:
+        """Live rows whose metadata satisfies predicate"""
+        return np.fromiter(
+            (live and predicate(metadata) for live, metadata in zip(self._live[:self._size], self._metadata)),
+            dtype=bool, count=self._size
+        )
+
+    # --- Persistence ---
+    def settings(self) -> Dict[str, Any]:
+        """Constructor arguments that recreate an empty index like this one"""
+        return {
+            "dim": self.dim,
+            "quantization": self.quantization,
+            "pq_subvectors": self.pq_subvectors,
+            "rescore": self.rescore,
+            "rescore_factor": self.rescore_factor,
+            "min_train": self.min_train,
+        }
+
+    def export_state(self) -> Dict[str, Any]:
+        """
+        Everything from_state needs: numpy arrays (trimmed to the used rows,
+        so they can be saved and memory-mapped as-is), JSON-able settings,
+        and per-row ids and metadata (None for free rows and tombstones).
+        """
+        with self._lock:
+            arrays = {"live": self._live[:self._size]}
+            if self._codes is not None:
+                arrays["codes"] = self._codes[:self._size]
+            if self._full is not None:
+                arrays["full"] = self._full[:self._size]
+            if self.quantizer is not None:
+                arrays.update(self.quantizer.state())
+            return {
+                "type": "flat",
+                "settings": self.settings(),
+                "layout": {"free": list(self._free), "tombstones": self._tombstones},
+                "arrays": arrays,
+                "ids": list(self._ids),
+                "metadata": self._metadata,
+            }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "FlatVectorIndex":
+        """
+        Rebuild an index from export_state output. Arrays are adopted, not
+        copied, so memory-mapped arrays stay mapped until a write needs to
+        grow them; metadata may be any list-like.
+        """
+        index = cls(**state["settings"])
+        index._restore(state)
+        return index
+
+    def _restore(self, state: Dict[str, Any]) -> None:
+        arrays = state["arrays"]
+        if self.quantizer is not None:
+            self.quantizer.load_state(arrays)
+        self._codes = arrays.get("codes")
+        self._full = arrays.get("full")
+        self._live = arrays["live"]
+        self._size = len(self._live)
+        self._ids = list(state["ids"])
+        self._metadata = state["metadata"]
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids) if vector_id is not None}
+        self._free = list(state["layout"]["free"])
+        self._tombstones = state["layout"]["tombstones"]
+
+    # --- Introspection ---
+    def memory_bytes(self) -> int:
+        """Bytes held by vector storage (codes, codebooks, float32 copies)"""
+        total = self._live.nbytes
+        if self._codes is not None:
+            total += self._codes[:self._size].nbytes
+        if self._full is not None:
+            total += self._full[:self._size].nbytes
+        if self.quantizer is not None:
+            total += self.quantizer.nbytes()
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": len(self),
+            "quantization": self.quantization,
+            "rescore": self.rescore,
+            "quantized": self.quantized,
+            "tombstones": self._tombstones,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+# ==================== Pinecone-compatible index ====================
+
+def matches_filter(metadata: Optional[Dict[str, Any]], filter_dict: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Pinecone metadata filter: field conditions ($eq, $ne, $gt,
+    $gte, $lt, $lte, $in, $nin, $exists, or a bare value for $eq) combined
+    with $and / $or. List-valued fields match if any element does.
+    """
+    if not filter_dict:
+        return True
+    metadata = metadata or {}
+    for key, condition in filter_dict.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif not _matches_field(key in metadata, metadata.get(key), condition):
+            return False
+    return True
+
+
+def _matches_field(present: bool, value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    values = value if isinstance(value, list) else [value]
+    for op, operand in condition.items():
+        if op == "$exists":
+            ok = present == bool(operand)
+        elif not present:
+            ok = op in ("$ne", "$nin")
+        elif op == "$eq":
+            ok = operand in values
+        elif op == "$ne":
+            ok = operand not in values
+        elif op == "$in":
+            ok = any(v in operand for v in values)
+        elif op == "$nin":
+            ok = not any(v in operand for v in values)
+        elif op in _COMPARISONS:
+            try:
+                ok = any(_COMPARISONS[op](v, operand) for v in values)
+            except TypeError:
+                ok = False
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if not ok:
+            return False
+    return True
+
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+}
+
+
+class LocalIndex:
+    """
+    In-process stand-in for a Pinecone index handle, so PineconeService
+    (batching, thread pool, fan-out) runs unchanged on a local backend:
+
+        PineconeService(index=LocalIndex())
+
+    Each namespace is its own HNSW (or flat) index, created on first write
+    and dropped when emptied. Calls are synchronous and thread-safe.
+
+    With a path, writes are appended to a write-ahead log before they are
+    applied, and once the log passes snapshot_wal_bytes all namespaces are
+    saved as a new snapshot and the log emptied. Startup memory-maps the
+    current snapshot, replays the log and folds it into a fresh snapshot,
+    so nothing is re-embedded. One index writes a given path: opening a
+    second one on it raises. Load it before forking (gunicorn --preload)
+    and workers share the lock and the mapped pages copy-on-write.
+    """
+
+    def __init__(
+        self,
+        dim: int = LOCAL_INDEX_DIM,
+        index_type: str = LOCAL_INDEX_TYPE,
+        name: str = "local",
+        path: Optional[str] = LOCAL_INDEX_PATH or None,
+        snapshot_wal_bytes: int = LOCAL_INDEX_SNAPSHOT_WAL_BYTES,
+        **options: Any
+    ):
+        if index_type not in ("hnsw", "flat"):
+            raise ValueError(f"Unknown local index type: {index_type}")
+        self.dim = dim
+        self.index_type = index_type
+        self.name = name
+        self.options = options
+        self.path = path
+        self.snapshot_wal_bytes = snapshot_wal_bytes
+        self._namespaces: Dict[str, FlatVectorIndex] = {}
+        self._lock = threading.Lock()
+        # Serialises writes so the log order is the order they were applied in
+        self._write_lock = threading.Lock()
+        self._wal: Optional[WriteAheadLog] = None
+        self._snapshots: Optional[SnapshotStore] = None
+        self._dir_lock: Optional[DirectoryLock] = None
+        if path:
+            self._load(path)
+
+    @staticmethod
+    def _index_class(index_type: str):
+        if index_type == "hnsw":
+            from .hnsw_index import HNSWIndex
+            return HNSWIndex
+        return FlatVectorIndex
+
+    def _namespace(self, namespace: str) -> FlatVectorIndex:
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is None:
+                index = self._index_class(self.index_type)(dim=self.dim, **self.options)
+                self._namespaces[namespace] = index
+            return index
+
+    # --- Persistence ---
+    def _load(self, path: str) -> None:
+        started = time.monotonic()
+        self._snapshots = SnapshotStore(path)
+        self._dir_lock = DirectoryLock(path)
+        self._dir_lock.acquire()
+        for namespace, state in self._snapshots.load().items():
+            self._namespaces[namespace] = self._index_class(state["type"]).from_state(state)
+        self._wal = WriteAheadLog(os.path.join(path, "wal.log"))
+        replayed = 0
+        for record, vectors in self._wal.replay():
+            self._apply(record, vectors)
+            replayed += 1
+        logger.info(
+            f"Loaded local vector index from {path}: {len(self._namespaces)} namespaces, "
+            f"{replayed} WAL records replayed in {(time.monotonic() - started) * 1000:.1f} ms"
+        )
+        if replayed:
+            # Otherwise every restart replays the same log again
+            self.snapshot()
+
+    def snapshot(self) -> Optional[str]:
+        """Save every namespace as a new snapshot and empty the log"""
+        if self._snapshots is None or self._wal is None:
+            return None
+        with self._write_lock:
+            if not self._wal.size:
+                # The current snapshot already holds everything
+                return self._snapshots.current()
+            with self._lock:
+                namespaces = dict(self._namespaces)
+            started = time.monotonic()
+            folder = self._snapshots.save({name: index.export_state() for name, index in namespaces.items()})
+            self._wal.reset()
+            logger.info(f"Saved local vector index snapshot {folder} in {(time.monotonic() - started) * 1000:.1f} ms")
+            return folder
+
+    def close(self) -> None:
+        if self._wal is not None:
+            self._wal.close()
+        if self._dir_lock is not None:
+            self._dir_lock.release()
+
+    def _write(self, record: Dict[str, Any], vectors: Optional[np.ndarray] = None) -> None:
+        with self._write_lock:
+            if self._wal is not None:
+                self._wal.append(record, vectors)
+            self._apply(record, vectors)
+        if self._wal is not None and self._wal.size > self.snapshot_wal_bytes:
+            self.snapshot()
+
+    def _apply(self, record: Dict[str, Any], vectors: Optional[np.ndarray]) -> None:
+        namespace = record["namespace"]
+        if record["op"] == "upsert":
+            self._namespace(namespace).add(record["ids"], vectors, record["metadata"])
+            return
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is not None and record["op"] == "drop":
+                del self._namespaces[namespace]
+                return
+        if index is None:
+            return
+        index.delete(record["ids"])
+        with self._lock:
+            if not len(index) and self._namespaces.get(namespace) is index:
+                del self._namespaces[namespace]
+
+    # --- Pinecone index API ---
+    def upsert(self, vectors: Sequence[Any], namespace: str = "default", **_: Any) -> Dict[str, int]:
+        """vectors: {"id", "values", "metadata"} dicts or (id, values[, metadata]) tuples"""
+        records = [v if isinstance(v, dict) else dict(zip(("id", "values", "metadata"), v)) for v in vectors]
+        if records:
+            self._write(
+                {
+                    "op": "upsert",
+                    "namespace": namespace,
+                    "ids": [r["id"] for r in records],
+                    "metadata": [r.get("metadata") for r in records],
+                },
+                np.asarray([r["values"] for r in records], dtype=np.float32).reshape(len(records), self.dim)
+            )
+        return {"upserted_count": len(records)}
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 5,
+        namespace: str = "default",
+        filter: Optional[Dict[str, Any]] = None,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        **_: Any
+    ) -> SimpleNamespace:
+        index = self._namespaces.get(namespace)
+        matches = []
+        if index is not None:
+            predicate = (lambda metadata: matches_filter(metadata, filter)) if filter else None
+            for vector_id, score, metadata in index.search(vector, top_k, predicate=predicate):
+                stored = index.get(vector_id) if include_values else None
+                matches.append(SimpleNamespace(
+                    id=vector_id,
+                    score=score,
+                    metadata=metadata if include_metadata else None,
+                    values=stored[0].tolist() if stored else []
+                ))
+        return SimpleNamespace(matches=matches, namespace=namespace)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, delete_all: bool = False, namespace: str = "default", **_: Any) -> Dict[str, Any]:
+        if namespace in self._namespaces and (delete_all or ids):
+            self._write({"op": "drop" if delete_all else "delete", "namespace": namespace, "ids": list(ids or [])})
+        return {}
+
+    def describe_index_stats(self, **_: Any) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {name: {"vector_count": len(index)} for name, index in self._namespaces.items()}
+        return {
+            "dimension": self.dim,
+            "total_vector_count": sum(n["vector_count"] for n in namespaces.values()),
+            "namespaces": namespaces,
+        }
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _resize(array: Optional[np.ndarray], shape: Tuple[int, ...], dtype) -> np.ndarray:
+    grown = np.zeros(shape, dtype=dtype)
+    if array is not None:
+        grown[:len(array)] = array
+    return grown
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k)[:k]
+    return part[np.argsort(-scores[part])]
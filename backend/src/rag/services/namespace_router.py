@@ -0,0 +1,129 @@
+# Namespace Router - shards the vector index by machine type and tenant
+import os
+import re
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RAG_NAMESPACE_SHARDING = os.getenv("RAG_NAMESPACE_SHARDING", "true").lower() == "true"
+# Where everything was written before sharding; still searched until reindexed
+RAG_LEGACY_NAMESPACE = os.getenv("RAG_LEGACY_NAMESPACE", "default")
+RAG_QUERY_LEGACY_NAMESPACE = os.getenv("RAG_QUERY_LEGACY_NAMESPACE", "true").lower() == "true"
+RAG_NAMESPACE_CACHE_TTL = int(os.getenv("RAG_NAMESPACE_CACHE_TTL", 300))
+
+GENERAL_SCOPE = "general"
+TENANT_PREFIX = "t-"
+
+# (namespace, metadata filter)
+QueryTarget = Tuple[str, Optional[Dict[str, Any]]]
+
+
+def slugify(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-") or "unknown"
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    seen: Set[str] = set()
+    return [v for v in values if not (v in seen or seen.add(v))]
+
+
+class NamespaceRouter:
+    """
+    Maps documents and queries to namespaces.
+
+    Shared documents live in "mt-<type>" (or "general" when they apply to
+    every machine); a company's own documents live under "t-<company>." with
+    the same suffixes. A query for a machine searches its type and model
+    namespaces plus "general", for the asking company and the shared set, in
+    parallel. Tenants never see each other's namespaces, and a tenant can be
+    dropped or reindexed by deleting its namespaces alone.
+    """
+
+    def __init__(self, sharding: bool = RAG_NAMESPACE_SHARDING, legacy_namespace: str = RAG_LEGACY_NAMESPACE,
+                 query_legacy: bool = RAG_QUERY_LEGACY_NAMESPACE, cache_ttl: int = RAG_NAMESPACE_CACHE_TTL):
+        self.sharding = sharding
+        self.legacy_namespace = legacy_namespace
+        self.query_legacy = query_legacy
+        self.cache_ttl = cache_ttl
+        self._known: Set[str] = set()
+        self._known_at = 0.0
+
+    # --- Naming ---
+    def namespace_for(self, machine_type: Optional[str], company: Optional[str] = None) -> str:
+        """Namespace of documents for machine_type (and company); naming only, nothing is recorded"""
+        if not self.sharding:
+            return self.legacy_namespace
+        if not machine_type or slugify(machine_type) == GENERAL_SCOPE:
+            scope = GENERAL_SCOPE
+        else:
+            scope = f"mt-{slugify(machine_type)}"
+        return f"{self.tenant_prefix(company)}{scope}" if company else scope
+
+    # --- Writes ---
+    def record(self, namespace: str) -> None:
+        """Note a namespace that vectors were just written to, ahead of the next listing"""
+        self._known.add(namespace)
+
+    @staticmethod
+    def tenant_prefix(company: str) -> str:
+        return f"{TENANT_PREFIX}{slugify(company)}."
+
+    # --- Reads ---
+    async def read_targets(
+        self,
+        pinecone_service,
+        machine_type: Optional[str],
+        machine_model: Optional[str],
+        company: Optional[str],
+        filter_dict: Optional[Dict[str, Any]]
+    ) -> List[QueryTarget]:
+        """Namespaces (with filters) one query should fan out to"""
+        if not self.sharding:
+            return [(self.legacy_namespace, filter_dict)]
+
+        scopes = [value for value in (machine_type, machine_model) if value]
+        if scopes:
+            tenants = [company, None] if company else [None]
+            namespaces = [
+                self.namespace_for(scope, tenant)
+                for tenant in tenants for scope in scopes + [GENERAL_SCOPE]
+            ]
+        else:
+            # No machine to narrow by: every namespace this caller may see
+            namespaces = [
+                namespace for namespace in await self.known_namespaces(pinecone_service)
+                if self.visible(namespace, company) and namespace != self.legacy_namespace
+            ] or [GENERAL_SCOPE]
+
+        # Sharded namespaces already hold only matching documents, so no filter there
+        targets: List[QueryTarget] = [(namespace, None) for namespace in _unique(namespaces)]
+        if self.query_legacy:
+            targets.append((self.legacy_namespace, filter_dict))
+        return targets
+
+    def visible(self, namespace: str, company: Optional[str]) -> bool:
+        if not namespace.startswith(TENANT_PREFIX):
+            return True
+        return bool(company) and namespace.startswith(self.tenant_prefix(company)) # type: ignore
+
+    async def known_namespaces(self, pinecone_service, refresh: bool = False) -> List[str]:
+        """Namespaces in the index, cached for cache_ttl seconds"""
+        if refresh or time.monotonic() - self._known_at > self.cache_ttl:
+            try:
+                # Replaced, not merged, so names that no longer exist drop out
+                self._known = set(await pinecone_service.list_namespaces())
+                self._known_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Failed to list namespaces: {str(e)}")
+        return sorted(self._known)
+
+    def forget(self, namespaces: Iterable[str]) -> None:
+        self._known.difference_update(namespaces)
+
+
+# Create global instance
+namespace_router = NamespaceRouter()
@@ -1,19 +1,45 @@
 import os
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, List, Dict, Any, Optional, Sequence, TypeVar
 from pinecone import Pinecone, ServerlessSpec
 from fastapi import HTTPException, status
 from dotenv import load_dotenv
 
+from .namespace_router import QueryTarget
+
 
 load_dotenv('/home/jovanijo/Desktop/mst/backend/.env')
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The SDK is synchronous; its calls run here so they never block the event loop
+PINECONE_WORKERS = int(os.getenv("PINECONE_WORKERS", 8))
+# Pinecone accepts at most 1000 ids per delete; upserts should stay near 100 vectors (2MB)
+PINECONE_UPSERT_BATCH = int(os.getenv("PINECONE_UPSERT_BATCH", 100))
+PINECONE_DELETE_BATCH = int(os.getenv("PINECONE_DELETE_BATCH", 1000))
+PINECONE_MAX_CONCURRENT_BATCHES = int(os.getenv("PINECONE_MAX_CONCURRENT_BATCHES", 4))
+# pinecone | local (in-process HNSW index, see local_vector_index.LocalIndex)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+
+T = TypeVar("T")
+
 class PineconeService:
-    def __init__(self):
-        """Initialize Pinecone client with Serverless configuration."""
+    def __init__(self, index=None):
+        """
+        Initialize Pinecone client with Serverless configuration.
+
+        index: an already opened index handle to use instead of connecting.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=PINECONE_WORKERS, thread_name_prefix="pinecone")
+        if index is not None:
+            self.index = index
+            self.index_name = getattr(index, "name", "custom")
+            self._enabled = True
+            return
         try:
             # Get Pinecone API key from environment
             api_key = os.getenv("PINECONE_API_KEY")
@@ -54,6 +80,23 @@ class PineconeService:
     def is_enabled(self) -> bool:
         """Check if Pinecone service is properly configured."""
         return self._enabled
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking SDK call on the Pinecone thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def _run_batches(self, func: Callable[[Sequence[Any]], Any], items: Sequence[Any], batch_size: int) -> None:
+        """Apply func to items in batches, a bounded number at a time"""
+        limiter = asyncio.Semaphore(PINECONE_MAX_CONCURRENT_BATCHES)
+
+        async def run(batch: Sequence[Any]) -> None:
+            async with limiter:
+                await self._run(func, batch)
+
+        await asyncio.gather(*[
+            run(items[start:start + batch_size]) for start in range(0, len(items), batch_size)
+        ])
     
     async def upsert_vectors(
         self, 
@@ -77,7 +120,10 @@ class PineconeService:
             )
         
         try:
-            self.index.upsert(vectors=vectors, namespace=namespace)
+            await self._run_batches(
+                lambda batch: self.index.upsert(vectors=list(batch), namespace=namespace),
+                vectors, PINECONE_UPSERT_BATCH
+            )
             logger.info(f"Successfully upserted {len(vectors)} vectors to namespace: {namespace}")
             return True
             
@@ -93,7 +139,8 @@ class PineconeService:
         query_vector: List[float], 
         top_k: int = 5, 
         namespace: str = "default",
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        include_values: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Query vectors from Pinecone index.
@@ -103,6 +150,7 @@ class PineconeService:
             top_k: Number of top results to return
             namespace: Namespace to search in
             filter_dict: Optional filter for metadata
+            include_values: Also return each match's vector (as "values")
         
         Returns:
             List of matching vectors with scores
@@ -114,12 +162,14 @@ class PineconeService:
             )
         
         try:
-            results = self.index.query(
+            results = await self._run(
+                self.index.query,
                 vector=query_vector,
                 top_k=top_k,
                 namespace=namespace,
                 filter=filter_dict,
-                include_metadata=True
+                include_metadata=True,
+                include_values=include_values
             )
             
             logger.info(f"Successfully queried vectors, found {len(results.matches)} matches")
@@ -127,7 +177,8 @@ class PineconeService:
                 {
                     "id": match.id,
                     "score": match.score,
-                    "metadata": match.metadata
+                    "metadata": match.metadata,
+                    **({"values": match.values} if include_values else {})
                 }
                 for match in results.matches
             ]
@@ -161,7 +212,10 @@ class PineconeService:
             )
         
         try:
-            self.index.delete(ids=ids, namespace=namespace)
+            await self._run_batches(
+                lambda batch: self.index.delete(ids=list(batch), namespace=namespace),
+                ids, PINECONE_DELETE_BATCH
+            )
             logger.info(f"Successfully deleted {len(ids)} vectors from namespace: {namespace}")
             return True
             
@@ -172,5 +226,89 @@ class PineconeService:
                 detail=f"Failed to delete vectors: {str(e)}"
             )
 
+    async def delete_namespace(self, namespace: str) -> bool:
+        """Delete every vector in a namespace (e.g. one tenant's shard)"""
+        if not self._enabled:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Pinecone service is not configured"
+            )
+        
+        try:
+            await self._run(self.index.delete, delete_all=True, namespace=namespace)
+            logger.info(f"Successfully deleted namespace: {namespace}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting namespace: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to delete namespace: {str(e)}"
+            )
+
+    async def list_namespaces(self) -> List[str]:
+        """Names of the namespaces that currently hold vectors"""
+        if not self._enabled:
+            return []
+        stats = await self._run(self.index.describe_index_stats)
+        namespaces = stats.get("namespaces") if isinstance(stats, dict) else getattr(stats, "namespaces", None)
+        return list((namespaces or {}).keys())
+
+    async def query_many(
+        self,
+        query_vector: List[float],
+        targets: List[QueryTarget],
+        top_k: int = 5,
+        include_values: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Query several namespaces and/or filters concurrently and merge.
+
+        Matches are de-duplicated by id (keeping the best score) and the
+        overall top_k returned. A failing target is logged and skipped, so
+        one bad namespace does not sink the whole search.
+        """
+        if not targets:
+            return []
+        results = await asyncio.gather(*[
+            self.query_vectors(
+                query_vector=query_vector,
+                top_k=top_k,
+                namespace=namespace,
+                filter_dict=filter_dict,
+                include_values=include_values
+            )
+            for namespace, filter_dict in targets
+        ], return_exceptions=True)
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        failures = 0
+        for (namespace, _), matches in zip(targets, results):
+            if isinstance(matches, BaseException):
+                failures += 1
+                logger.error(f"Query on namespace {namespace} failed: {str(matches)}")
+                continue
+            for match in matches:
+                kept = merged.get(match["id"])
+                if kept is None or match["score"] > kept["score"]:
+                    merged[match["id"]] = dict(match, namespace=namespace)
+        if failures == len(targets):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to query vectors: every target failed"
+            )
+        return sorted(merged.values(), key=lambda match: match["score"], reverse=True)[:top_k]
+
+    async def close(self) -> None:
+        """At shutdown, fold a local index's log into a snapshot and release its directory"""
+        from .local_vector_index import LocalIndex
+        if self._enabled and isinstance(self.index, LocalIndex):
+            await self._run(self.index.snapshot)
+            self.index.close()
+
 # Create global instance
-pinecone_service = PineconeService()
\ No newline at end of file
+if VECTOR_BACKEND == "local":
+    from .local_vector_index import LocalIndex
+    pinecone_service = PineconeService(index=LocalIndex())
+else:
+    pinecone_service = PineconeService()
\ No newline at end of file
@@ -1,6 +1,14 @@
 # RAG Service - Main orchestration service
+import re
+import json
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+
+from .chunk_store import chunk_store, chunk_vector_id
+from .context_packer import context_packer, CONTEXT_OVERSAMPLE
+from .namespace_router import namespace_router
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -9,6 +17,10 @@ logger = logging.getLogger(__name__)
 class RAGService:
     def __init__(self):
         """Initialize RAG service with all sub-services."""
+        # Single-flight state: identical concurrent requests share one computation
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.flights_started = 0
+        self.coalesced_requests = 0
         try:
             from .ai_service import ai_service
             from .pinecone_service import pinecone_service
@@ -42,8 +54,19 @@ class RAGService:
             "ai_service": "enabled" if self._ai_enabled else "disabled",
             "pinecone_service": "enabled" if self._pinecone_enabled else "disabled", 
             "document_service": "enabled" if self._document_enabled else "disabled",
+            "single_flight": self.single_flight_stats(),
+            "chunk_store": chunk_store.stats(),
+            "llm": self.ai_service.llm_stats() if hasattr(self, "ai_service") else None,
             "overall_status": "healthy" if self.is_enabled() else "error"
         }
+
+    def single_flight_stats(self) -> Dict[str, int]:
+        """How many RAG computations ran and how many requests piggybacked on one."""
+        return {
+            "in_flight": len(self._inflight),
+            "flights_started": self.flights_started,
+            "coalesced_requests": self.coalesced_requests
+        }
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get RAG system statistics."""
@@ -71,10 +94,18 @@ class RAGService:
         title: str = "Untitled",
         document_type: str = "manual",
         machine_type: Optional[str] = None,
-        use_smart_chunking: bool = True
+        use_smart_chunking: bool = True,
+        company: Optional[str] = None,
+        kb_id: Optional[int] = None,
+        document_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Process a document: chunk it, generate embeddings, and store in vector DB.
+
+        The vectors go to the namespace for machine_type, under company's
+        shard when the document belongs to a single tenant. kb_id and
+        document_id record the rows the chunks belong to, so they are
+        deleted along with them.
         """
         try:
             logger.info(f"Processing document: {title}")
@@ -105,8 +136,10 @@ class RAGService:
                     "message": "Failed to chunk document"
                 }
             
-            # 2. Generate embeddings and store in Pinecone
-            vectors_stored = 0
+            # 2. Generate embeddings; full text goes to the chunk store, the vector keeps filter fields only
+            owner = f"kb-{kb_id}" if kb_id is not None else (f"doc-{document_id}" if document_id is not None else None)
+            vectors: List[Dict[str, Any]] = []
+            stored_chunks: List[Dict[str, Any]] = []
             for i, chunk in enumerate(chunks):
                 try:
                     # Generate embedding
@@ -114,27 +147,32 @@ class RAGService:
                     
                     if embedding:
                         # Prepare vector for Pinecone
-                        vector_id = f"{title}_{i}_{hash(chunk['content']) % 10000}"
-                        vector_data = {
-                            "id": vector_id,
-                            "values": embedding,
-                            "metadata": {
-                                "title": title,
-                                "document_type": document_type,
-                                "machine_type": machine_type or "general",
-                                "chunk_index": i,
-                                "chunk_text": chunk['content'][:500]  # Store first 500 chars
-                            }
+                        vector_id = chunk_vector_id(title, i, chunk['content'], owner)
+                        metadata = {
+                            "title": title,
+                            "document_type": document_type,
+                            "machine_type": machine_type or "general",
+                            "chunk_index": i,
+                            **({"company": company} if company else {}),
+                            **({"kb_id": kb_id} if kb_id is not None else {})
                         }
-                        
-                        # Store in Pinecone
-                        await self.pinecone_service.upsert_vectors([vector_data])
-                        vectors_stored += 1
+                        vectors.append({"id": vector_id, "values": embedding, "metadata": metadata})
+                        stored_chunks.append({
+                            "vector_id": vector_id, "content": chunk['content'], "document_id": document_id, **metadata
+                        })
                         
                 except Exception as e:
                     logger.error(f"Error processing chunk {i}: {str(e)}")
                     continue
             
+            # Text first, so a vector is never searchable before its text can be fetched
+            namespace = namespace_router.namespace_for(machine_type, company)
+            if vectors:
+                await chunk_store.aput_many(stored_chunks, namespace)
+                await self.pinecone_service.upsert_vectors(vectors, namespace=namespace)
+                namespace_router.record(namespace)
+            vectors_stored = len(vectors)
+            
             logger.info(f"Successfully processed document: {title}, stored {vectors_stored} vectors")
             
             return {
@@ -144,6 +182,7 @@ class RAGService:
                 "machine_type": machine_type,
                 "chunks_created": len(chunks),
                 "vectors_stored": vectors_stored,
+                "namespace": namespace,
                 "message": f"Document processed successfully, stored {vectors_stored} vectors in Pinecone"
             }
             
@@ -154,75 +193,100 @@ class RAGService:
                 "message": f"Failed to process document: {str(e)}"
             }
     
+    @staticmethod
+    def _flight_key(
+        query: str,
+        machine_type: Optional[str],
+        context_limit: int,
+        history: Optional[List[Dict[str, Any]]],
+        summary: Optional[str],
+        machine_model: Optional[str] = None,
+        company: Optional[str] = None
+    ) -> str:
+        """Normalized request identity; conversation state is part of it."""
+        normalized_query = re.sub(r"\s+", " ", query).strip().lower()
+        conversation = [(m.get("role"), m.get("content")) for m in (history or [])]
+        raw = json.dumps(
+            [normalized_query, (machine_type or "").lower(), (machine_model or "").lower(),
+             company or "", context_limit, conversation, summary or ""],
+            default=str
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
     async def generate_rag_response(
         self,
         query: str,
         machine_type: Optional[str] = None,
-        context_limit: int = 3
+        context_limit: int = 3,
+        history: Optional[List[Dict[str, Any]]] = None,
+        summary: Optional[str] = None,
+        machine_model: Optional[str] = None,
+        company: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a RAG response, coalescing identical concurrent requests.
+
+        When an alarm fires across a line of identical machines many operators
+        ask the same thing at once; only the first request embeds, searches and
+        calls the LLM, the rest await its result, marked "coalesced".
+        """
+        key = self._flight_key(query, machine_type, context_limit, history, summary, machine_model, company)
+        flight = self._inflight.get(key)
+        coalesced = flight is not None
+        if coalesced:
+            self.coalesced_requests += 1
+        else:
+            self.flights_started += 1
+            flight = asyncio.ensure_future(
+                self._generate_rag_response(
+                    query, machine_type, context_limit, history, summary,
+                    machine_model=machine_model, company=company
+                )
+            )
+            self._inflight[key] = flight
+            flight.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shielded so one caller disconnecting does not cancel the shared work
+        result = dict(await asyncio.shield(flight))
+        if coalesced:
+            # The usage belongs to the request that made the LLM call; it is metered there
+            result["coalesced"] = True
+        return result
+
+    async def _generate_rag_response(
+        self,
+        query: str,
+        machine_type: Optional[str] = None,
+        context_limit: int = 3,
+        history: Optional[List[Dict[str, Any]]] = None,
+        summary: Optional[str] = None,
+        machine_model: Optional[str] = None,
+        company: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate a RAG response by querying the vector database.
+
+        history holds earlier turns already packed to the token budget and
+        summary the rolling summary of anything older. machine_type and
+        machine_model narrow retrieval to one machine's documents; company
+        adds that tenant's own documents.
         """
         try:
             logger.info(f"Generating RAG response for query: {query}")
             
             if not self._pinecone_enabled or not self._ai_enabled:
-                # Fallback response if services not available
-                response_text = f"I understand you're asking about: '{query}'. "
-                if machine_type:
-                    response_text += f"This relates to {machine_type} machines. "
-                response_text += "I'm currently in a simplified mode because Pinecone or AI services are not configured. "
-                response_text += "Please configure your API keys to enable full RAG functionality."
-                
-                return {
-                    "response": response_text,
-                    "model": "rag-fallback",
-                    "usage": {
-                        "prompt_tokens": len(query.split()),
-                        "completion_tokens": len(response_text.split()),
-                        "total_tokens": len(query.split()) + len(response_text.split())
-                    },
-                    "confidence": 0.3,
-                    "sources": []
-                }
-            
-            # 1. Generate query embedding
-            query_embedding = await self.ai_service.generate_embeddings(query)
-            
-            if not query_embedding:
-                raise Exception("Failed to generate query embedding")
+                return self._fallback_response(query, machine_type)
+            if not self.ai_service.is_available():
+                # Provider is failing; answer now rather than spend a retrieval on it
+                return self._error_response(query)
             
-            # 2. Query Pinecone for relevant documents
-            filter_dict = {"machine_type": machine_type} if machine_type else None
-            search_results = await self.pinecone_service.query_vectors(
-                query_vector=query_embedding,
-                top_k=context_limit,
-                filter_dict=filter_dict
+            context, sources = await self._retrieve_context(
+                query, machine_type, context_limit, summary, machine_model, company
             )
             
-            # 3. Prepare context from search results
-            context_parts = []
-            sources = []
-            
-            for result in search_results:
-                if result.get('metadata', {}).get('chunk_text'):
-                    context_parts.append(result['metadata']['chunk_text'])
-                    sources.append({
-                        "title": result['metadata'].get('title', 'Unknown'),
-                        "score": result.get('score', 0),
-                        "chunk_text": result['metadata']['chunk_text'][:200] + "..."
-                    })
-            
-            context = "\n\n".join(context_parts) if context_parts else "No relevant documents found."
-            
             # 4. Generate AI response with context
-            messages = [
-                {"role": "system", "content": "You are a helpful assistant for machine tool technical support. Use the provided context to answer questions accurately."},
-                {"role": "user", "content": f"Question: {query}\n\nContext:\n{context}"}
-            ]
-            
             ai_response = await self.ai_service.chat_completion(
-                messages=messages,
+                messages=self._build_messages(query, context, history),
                 context=context
             )
             
@@ -236,12 +300,191 @@ class RAGService:
             
         except Exception as e:
             logger.error(f"Error generating RAG response: {str(e)}")
-            return {
-                "response": f"I apologize, but I'm experiencing technical difficulties. Your query was: '{query}'. Please try again later.",
-                "model": "error-fallback",
-                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
-                "confidence": 0.1,
-                "sources": []
-            }
+            return self._error_response(query)
+
+    async def stream_rag_response(
+        self,
+        query: str,
+        machine_type: Optional[str] = None,
+        context_limit: int = 3,
+        history: Optional[List[Dict[str, Any]]] = None,
+        summary: Optional[str] = None,
+        machine_model: Optional[str] = None,
+        company: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_rag_response.
+
+        Yields {"type": "token", "content": ...} as the model produces text and
+        finishes with {"type": "final", ...} carrying the same fields as the
+        non-streaming response. Streams are per caller, so not single-flighted.
+        """
+        if not self._pinecone_enabled or not self._ai_enabled:
+            fallback = self._fallback_response(query, machine_type)
+            yield {"type": "token", "content": fallback["response"]}
+            yield {"type": "final", **fallback}
+            return
+        if not self.ai_service.is_available():
+            error = self._error_response(query)
+            yield {"type": "token", "content": error["response"]}
+            yield {"type": "final", **error}
+            return
+
+        parts: List[str] = []
+        try:
+            context, sources = await self._retrieve_context(
+                query, machine_type, context_limit, summary, machine_model, company
+            )
+            async for chunk in self.ai_service.stream_chat_completion(
+                messages=self._build_messages(query, context, history),
+                context=context
+            ):
+                if "delta" in chunk:
+                    parts.append(chunk["delta"])
+                    yield {"type": "token", "content": chunk["delta"]}
+                else:
+                    yield {"type": "final", "response": "".join(parts), "sources": sources, **chunk}
+        except Exception as e:
+            logger.error(f"Error streaming RAG response: {str(e)}")
+            if parts:
+                raise
+            error = self._error_response(query)
+            yield {"type": "token", "content": error["response"]}
+            yield {"type": "final", **error}
+
+    async def _retrieve_context(
+        self,
+        query: str,
+        machine_type: Optional[str],
+        context_limit: int,
+        summary: Optional[str],
+        machine_model: Optional[str] = None,
+        company: Optional[str] = None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Embed the query, search Pinecone and assemble the prompt context."""
+        # 1. Generate query embedding
+        query_embedding = await self.ai_service.generate_embeddings(query)
+        
+        if not query_embedding:
+            raise Exception("Failed to generate query embedding")
+        
+        # 2. Query the machine's (and tenant's) namespaces in parallel, oversampled so MMR has alternatives
+        targets = await namespace_router.read_targets(
+            self.pinecone_service, machine_type, machine_model, company,
+            self._machine_filter(machine_type, machine_model)
+        )
+        search_results = await self.pinecone_service.query_many(
+            query_vector=query_embedding,
+            targets=targets,
+            top_k=context_limit * CONTEXT_OVERSAMPLE,
+            include_values=True
+        )
+        search_results = await self._attach_chunk_text(search_results)
+        
+        # 3. Pack distinct, overlap-trimmed chunks into the context token budget
+        context_parts = []
+        sources = []
+        
+        for result in context_packer.pack(search_results, max_chunks=context_limit):
+            context_parts.append(result['text'])
+            sources.append({
+                "title": result['metadata'].get('title', 'Unknown'),
+                "score": result.get('score', 0),
+                "chunk_text": result['text'][:200] + "..."
+            })
+        
+        context = "\n\n".join(context_parts) if context_parts else "No relevant documents found."
+        if summary:
+            context = f"Summary of the earlier conversation:\n{summary}\n\n{context}"
+        return context, sources
+
+    @staticmethod
+    async def _attach_chunk_text(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fill in each match's chunk_text from the chunk store in one batched
+        lookup. Vectors written before the store existed still carry a
+        truncated chunk_text in their metadata, which is used as a fallback.
+        """
+        if not matches:
+            return matches
+        texts = await chunk_store.aget_many([(match.get("namespace"), match["id"]) for match in matches])
+        attached = []
+        for match in matches:
+            metadata = dict(match.get("metadata") or {})
+            text = texts.get((match.get("namespace"), match["id"])) or metadata.get("chunk_text")
+            if text:
+                metadata["chunk_text"] = text
+                attached.append(dict(match, metadata=metadata))
+        return attached
+
+    async def delete_tenant_vectors(self, company: str) -> List[str]:
+        """Drop every namespace holding company's documents; returns their names"""
+        prefix = namespace_router.tenant_prefix(company)
+        namespaces = [
+            namespace for namespace in await namespace_router.known_namespaces(self.pinecone_service, refresh=True)
+            if namespace.startswith(prefix)
+        ]
+        for namespace in namespaces:
+            await self.pinecone_service.delete_namespace(namespace)
+        await chunk_store.adelete_namespaces(namespaces)
+        namespace_router.forget(namespaces)
+        logger.info(f"Deleted {len(namespaces)} namespaces for tenant {company}")
+        return namespaces
+
+    @staticmethod
+    def _machine_filter(machine_type: Optional[str], machine_model: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Restrict retrieval to one machine's documents. Chunks are tagged with
+        the type or model they were uploaded for, or "general" for documents
+        that apply to every machine.
+        """
+        scopes = [value for value in (machine_type, machine_model) if value]
+        if not scopes:
+            return None
+        return {"machine_type": {"$in": scopes + ["general"]}}
+
+    @staticmethod
+    def _build_messages(
+        query: str,
+        context: str,
+        history: Optional[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        return [
+            {"role": "system", "content": "You are a helpful assistant for machine tool technical support. Use the provided context to answer questions accurately."},
+            *(history or []),
+            {"role": "user", "content": f"Question: {query}\n\nContext:\n{context}"}
+        ]
+
+    @staticmethod
+    def _fallback_response(query: str, machine_type: Optional[str]) -> Dict[str, Any]:
+        """Fallback response if services not available"""
+        response_text = f"I understand you're asking about: '{query}'. "
+        if machine_type:
+            response_text += f"This relates to {machine_type} machines. "
+        response_text += "I'm currently in a simplified mode because Pinecone or AI services are not configured. "
+        response_text += "Please configure your API keys to enable full RAG functionality."
+        
+        return {
+            "response": response_text,
+            "model": "rag-fallback",
+            "usage": {
+                "prompt_tokens": len(query.split()),
+                "completion_tokens": len(response_text.split()),
+                "total_tokens": len(query.split()) + len(response_text.split())
+            },
+            "confidence": 0.3,
+            "sources": []
+        }
+
+    @staticmethod
+    def _error_response(query: str) -> Dict[str, Any]:
+        return {
+            "response": f"I apologize, but I'm experiencing technical difficulties. Your query was: '{query}'. Please try again later.",
+            "model": "error-fallback",
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            "confidence": 0.1,
+            "sources": []
+        }
+
 # Create global instance
 rag_service = RAGService()
\ No newline at end of file
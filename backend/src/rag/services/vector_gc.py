@@ -0,0 +1,201 @@
+# Vector GC - remove vectors and chunks whose knowledge base rows are gone
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlmodel import Session, select
+
+from ...model.rag_chunk import RagChunk
+from ...model.knowledge_base_content import KnowledgeBaseContent
+from ...model.document import Document
+from .pinecone_service import pinecone_service
+from .chunk_store import chunk_store
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between background sweeps (0 disables the periodic task)
+VECTOR_GC_INTERVAL = float(os.getenv("VECTOR_GC_INTERVAL", 3600))
+# Chunk rows checked per page
+VECTOR_GC_BATCH = int(os.getenv("VECTOR_GC_BATCH", 500))
+
+# (vector_id, namespace, bytes of chunk text)
+ChunkRef = Tuple[str, str, int]
+
+
+class VectorSweeper:
+    """
+    Garbage collection for the vector index.
+
+    Every chunk row records the knowledge base entry and document it was
+    ingested for, so deleting an entry can delete exactly its vectors by id
+    (serverless Pinecone indexes cannot delete by metadata filter). The
+    periodic sweep catches whatever that misses: failed cascades, entries
+    deleted while their ingestion was still running, rows removed outside
+    the API. Chunks with no recorded owner (direct /rag uploads, vectors
+    ingested before ownership was tracked) are never swept.
+    """
+
+    def __init__(self, engine=None, interval: float = VECTOR_GC_INTERVAL, batch_size: int = VECTOR_GC_BATCH):
+        self._engine = engine
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from ...routes.utils.database import engine
+            self._engine = engine
+        return self._engine
+
+    # --- Cascades ---
+    async def delete_for_kb(self, kb_id: int) -> Dict[str, Any]:
+        """Delete the vectors and chunks ingested for one knowledge base entry"""
+        started = time.perf_counter()
+        refs = await asyncio.to_thread(self._owned_by, kb_id)
+        report = await self._reclaim(refs)
+        report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if refs:
+            logger.info(f"Deleted {report['vectors_deleted']} vectors for knowledge base content {kb_id}")
+        return report
+
+    def _owned_by(self, kb_id: int) -> List[ChunkRef]:
+        with Session(self.engine) as db:
+            rows = db.exec(
+                select(RagChunk.vector_id, RagChunk.namespace, func.length(RagChunk.content))
+                .where(RagChunk.kb_id == kb_id)
+            ).all()
+        return [(vector_id, namespace, size or 0) for vector_id, namespace, size in rows]
+
+    # --- Sweep ---
+    async def sweep(self) -> Dict[str, Any]:
+        """One pass over rag_chunks, reclaiming chunks whose owner rows no longer exist"""
+        async with self._lock:
+            started = time.perf_counter()
+            report: Dict[str, Any] = dict(scanned=0, **_empty_totals())
+            after = ("", "")
+            while True:
+                page, orphaned = await asyncio.to_thread(self._scan_page, after)
+                if not page:
+                    break
+                report["scanned"] += len(page)
+                # Page by page, so memory stays bounded and a failure costs only its own batch
+                for key, value in (await self._reclaim(orphaned)).items():
+                    report[key] += value
+                after = page[-1]
+            report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.last_report = report
+            logger.info(
+                f"Vector sweep: {report['scanned']} chunks scanned, {report['orphaned_chunks']} orphaned, "
+                f"{report['bytes_reclaimed']} bytes reclaimed, {report['errors']} failed namespace deletes"
+            )
+            return report
+
+    def _scan_page(self, after: Tuple[str, str]) -> Tuple[List[Tuple[str, str]], List[ChunkRef]]:
+        """
+        The next page of chunks after the (namespace, vector_id) key after
+        (keyset paging on the primary key, so each page is one index range
+        scan), and those among them whose owner is gone.
+        """
+        namespace, vector_id = after
+        with Session(self.engine) as db:
+            rows = db.exec(
+                select(
+                    RagChunk.vector_id, RagChunk.namespace, RagChunk.kb_id,
+                    RagChunk.document_id, func.length(RagChunk.content)
+                )
+                .where(or_(
+                    RagChunk.namespace > namespace,
+                    and_(RagChunk.namespace == namespace, RagChunk.vector_id > vector_id)
+                ))
+                .order_by(RagChunk.namespace, RagChunk.vector_id)
+                .limit(self.batch_size)
+            ).all()
+            kb_ids = {row[2] for row in rows if row[2] is not None}
+            document_ids = {row[3] for row in rows if row[3] is not None}
+            live_kbs = set(db.exec(
+                select(KnowledgeBaseContent.kb_id).where(KnowledgeBaseContent.kb_id.in_(kb_ids)) # type: ignore
+            ).all()) if kb_ids else set()
+            live_documents = set(db.exec(
+                select(Document.id).where(Document.id.in_(document_ids)) # type: ignore
+            ).all()) if document_ids else set()
+
+        orphaned = [
+            (vector_id, namespace, size or 0)
+            for vector_id, namespace, kb_id, document_id, size in rows
+            if (kb_id is not None and kb_id not in live_kbs)
+            or (document_id is not None and document_id not in live_documents)
+        ]
+        return [(row[1], row[0]) for row in rows], orphaned
+
+    async def _reclaim(self, refs: Sequence[ChunkRef]) -> Dict[str, int]:
+        """
+        Delete vectors namespace by namespace, each followed by its chunk
+        rows. A namespace whose delete fails keeps its rows, so the next
+        sweep finds those chunks again and retries.
+        """
+        by_namespace: Dict[str, List[ChunkRef]] = defaultdict(list)
+        for ref in refs:
+            by_namespace[ref[1]].append(ref)
+
+        totals = _empty_totals()
+        totals["orphaned_chunks"] = len(refs)
+        if refs and not pinecone_service.is_enabled():
+            # The rows are the only record of these vector ids; keep them until the vectors can go
+            totals["errors"] = len(by_namespace)
+            logger.error(f"Vector backend disabled; {len(refs)} orphaned chunks left for a later sweep")
+            return totals
+        for namespace, owned in by_namespace.items():
+            ids = [vector_id for vector_id, _, _ in owned]
+            try:
+                await pinecone_service.delete_vectors(ids, namespace)
+                totals["vectors_deleted"] += len(ids)
+                await chunk_store.adelete_many([(namespace, vector_id) for vector_id in ids])
+            except Exception as e:
+                totals["errors"] += 1
+                logger.error(f"Failed to reclaim {len(ids)} chunks in namespace {namespace}: {str(e)}")
+                continue
+            totals["bytes_reclaimed"] += sum(size for _, _, size in owned)
+        return totals
+
+    # --- Background task ---
+    def start(self) -> None:
+        """Run sweeps every interval seconds on the running event loop"""
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Vector sweeper started (every {self.interval:g}s)")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Vector sweep failed: {str(e)}")
+
+
+def _empty_totals() -> Dict[str, int]:
+    return {"orphaned_chunks": 0, "vectors_deleted": 0, "bytes_reclaimed": 0, "errors": 0}
+
+
+# Create global instance
+vector_sweeper = VectorSweeper()
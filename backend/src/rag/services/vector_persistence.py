@@ -0,0 +1,264 @@
+# Vector Persistence - write-ahead log and memory-mapped snapshots for the local vector index
+import os
+import json
+import fcntl
+import time
+import shutil
+import struct
+import zlib
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# fsync every WAL append; without it a crash can lose the last writes (never corrupt the log)
+LOCAL_INDEX_WAL_FSYNC = os.getenv("LOCAL_INDEX_WAL_FSYNC", "true").lower() == "true"
+
+# Every record: body length, crc32 of body; body: header length, JSON header, raw float32 vectors
+_FRAME = struct.Struct("<II")
+_HEADER = struct.Struct("<I")
+
+WalRecord = Tuple[Dict[str, Any], Optional[np.ndarray]]
+
+
+class WriteAheadLog:
+    """
+    Append-only log of index writes since the last snapshot.
+
+    Each write is framed and checksummed, so a record torn by a crash is
+    detected on replay and cut off instead of being applied half-written.
+    """
+
+    def __init__(self, path: str, fsync: bool = LOCAL_INDEX_WAL_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self.size = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def append(self, record: Dict[str, Any], vectors: Optional[np.ndarray] = None) -> None:
+        header = json.dumps(record, separators=(",", ":")).encode()
+        payload = np.ascontiguousarray(vectors, dtype="<f4").tobytes() if vectors is not None else b""
+        body = _HEADER.pack(len(header)) + header + payload
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(_FRAME.pack(len(body), zlib.crc32(body)) + body)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.size += _FRAME.size + len(body)
+
+    def replay(self) -> Iterator[WalRecord]:
+        """Records in write order; a torn or corrupt tail is truncated away"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + _FRAME.size <= len(data):
+            length, checksum = _FRAME.unpack_from(data, offset)
+            body = data[offset + _FRAME.size:offset + _FRAME.size + length]
+            if len(body) < length or zlib.crc32(body) != checksum:
+                break
+            (header_length,) = _HEADER.unpack_from(body)
+            record = json.loads(body[_HEADER.size:_HEADER.size + header_length])
+            payload = body[_HEADER.size + header_length:]
+            vectors = np.frombuffer(payload, dtype="<f4").reshape(len(record["ids"]), -1) if payload else None
+            yield record, vectors
+            offset += _FRAME.size + length
+        if offset < len(data):
+            logger.warning(f"Truncating {len(data) - offset} bytes of incomplete WAL records in {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+        self.size = offset
+
+    def reset(self) -> None:
+        """Empty the log, once a snapshot covers everything in it"""
+        self.close()
+        with open(self.path, "wb") as f:
+            os.fsync(f.fileno())
+        self.size = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class DirectoryLock:
+    """
+    Exclusive flock on <root>/LOCK, held by the one process writing there.
+
+    flock locks belong to the open file, so workers forked after loading
+    (gunicorn --preload) share the parent's lock, while an index opened
+    independently on the same directory, in any process, is refused.
+    """
+
+    def __init__(self, root: str):
+        self.path = os.path.join(root, "LOCK")
+        self._file = None
+
+    def acquire(self) -> None:
+        f = open(self.path, "a")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            raise RuntimeError(f"{os.path.dirname(self.path)} is already open by another index writer")
+        self._file = f
+
+    def release(self) -> None:
+        if self._file is not None:
+            # Closing the file drops the lock
+            self._file.close()
+            self._file = None
+
+
+class SnapshotStore:
+    """
+    Immutable snapshots under <root>/snapshots, the live one named in
+    <root>/CURRENT.
+
+    A snapshot is written to a temporary directory and published by
+    atomically replacing CURRENT, so readers see the old snapshot or the new
+    one, never a partial one. Arrays are saved as .npy and loaded with
+    copy-on-write memory maps: startup reads headers only, pages fault in on
+    first use, and processes forked after loading (gunicorn --preload) share
+    the page cache until they write.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.directory = os.path.join(root, "snapshots")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def current(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, "CURRENT")) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return os.path.join(self.directory, name) if name else None
+
+    def save(self, states: Dict[str, Dict[str, Any]]) -> str:
+        """Write exported index states (by namespace) as the new current snapshot"""
+        name = f"{time.time_ns():020d}"
+        staging = os.path.join(self.directory, f"{name}.tmp")
+        os.makedirs(staging)
+        manifest: Dict[str, Any] = {"version": 1, "namespaces": {}}
+        for position, (namespace, state) in enumerate(states.items()):
+            folder = os.path.join(staging, str(position))
+            os.makedirs(folder)
+            for key, array in state["arrays"].items():
+                np.save(os.path.join(folder, f"{key}.npy"), np.ascontiguousarray(array))
+            np.save(os.path.join(folder, "ids.npy"), np.array([i or "" for i in state["ids"]], dtype=str))
+            _write_rows(folder, state["metadata"])
+            manifest["namespaces"][namespace] = {
+                "folder": str(position),
+                "type": state["type"],
+                "settings": state["settings"],
+                "layout": state["layout"],
+                "arrays": sorted(state["arrays"]),
+            }
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+        _fsync_tree(staging)
+
+        final = os.path.join(self.directory, name)
+        os.replace(staging, final)
+        pointer = os.path.join(self.root, "CURRENT.tmp")
+        with open(pointer, "w") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer, os.path.join(self.root, "CURRENT"))
+
+        # Older snapshots stay valid for anyone still mapping them; unlinking only drops names
+        for entry in os.listdir(self.directory):
+            if entry != name:
+                shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+        return final
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Exported states by namespace from the current snapshot (empty if none)"""
+        snapshot = self.current()
+        if snapshot is None:
+            return {}
+        with open(os.path.join(snapshot, "manifest.json")) as f:
+            manifest = json.load(f)
+        states = {}
+        for namespace, entry in manifest["namespaces"].items():
+            folder = os.path.join(snapshot, entry["folder"])
+            states[namespace] = {
+                "type": entry["type"],
+                "settings": entry["settings"],
+                "layout": entry["layout"],
+                "arrays": {key: _map(os.path.join(folder, f"{key}.npy")) for key in entry["arrays"]},
+                "ids": [i or None for i in np.load(os.path.join(folder, "ids.npy")).tolist()],
+                "metadata": SnapshotRows(folder),
+            }
+        return states
+
+
+class SnapshotRows:
+    """
+    List-like metadata backed by a snapshot: one JSON document per row in a
+    memory-mapped blob, decoded on access. Writes and appends stay in memory.
+    """
+
+    def __init__(self, folder: str):
+        self._offsets = _map(os.path.join(folder, "metadata_offsets.npy"))
+        self._blob = _map(os.path.join(folder, "metadata.npy"))
+        self._base = len(self._offsets) - 1
+        self._changed: Dict[int, Any] = {}
+        self._appended: List[Any] = []
+
+    def __len__(self) -> int:
+        return self._base + len(self._appended)
+
+    def __getitem__(self, row: int) -> Any:
+        if row >= self._base:
+            return self._appended[row - self._base]
+        if row in self._changed:
+            return self._changed[row]
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return json.loads(self._blob[start:end].tobytes())
+
+    def __setitem__(self, row: int, value: Any) -> None:
+        if row >= self._base:
+            self._appended[row - self._base] = value
+        else:
+            self._changed[row] = value
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def append(self, value: Any) -> None:
+        self._appended.append(value)
+
+
+def _write_rows(folder: str, rows: Any) -> None:
+    encoded = [json.dumps(row, separators=(",", ":")).encode() for row in rows]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    np.save(os.path.join(folder, "metadata_offsets.npy"), offsets)
+    np.save(os.path.join(folder, "metadata.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def _map(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="c")
+    except ValueError:
+        # Empty arrays cannot be mapped
+        return np.load(path)
+
+
+def _fsync_tree(folder: str) -> None:
+    for base, _, files in os.walk(folder):
+        for name in files:
+            with open(os.path.join(base, name), "rb") as f:
+                os.fsync(f.fileno())
@@ -1,7 +1,7 @@
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
 from sqlmodel import Session, select
 from pydantic import BaseModel
 
@@ -12,6 +12,7 @@ from ..model.models import (
     User, UserRole, Machine
 )
 from .utils.cloudinary_service import cloudinary_service
+from .utils.pagination import paginate, set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/anomaly-reports", tags=["Anomaly Reports"])
 
@@ -92,8 +93,9 @@ async def create_anomaly_report(
 
 @router.get("/", response_model=List[AnomalyReport])
 async def list_anomaly_reports(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     status_filter: Optional[AnomalyStatus] = None,
     priority_filter: Optional[AnomalyPriority] = None,
     session: Session = Depends(get_session),
@@ -104,8 +106,11 @@ async def list_anomaly_reports(
         query = query.where(AnomalyReport.status == status_filter)
     if priority_filter:
         query = query.where(AnomalyReport.priority == priority_filter)
-    query = query.offset(skip).limit(limit)
-    return session.exec(query).all()
+    reports, next_cursor = paginate(
+        session, query, AnomalyReport.created_at, AnomalyReport.report_id, cursor, limit
+    )
+    set_next_cursor(response, next_cursor)
+    return reports
 
 
 @router.get("/{report_id}", response_model=AnomalyReport)
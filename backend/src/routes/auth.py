@@ -8,10 +8,11 @@ from ..model.models import MachineModel, Employee
 from ..model.models import User, UserCreate, UserRead, UserRole
 from src.routes.utils.database import get_session
 from src.routes.utils.auth import (
-    get_password_hash, verify_password, create_access_token,
-    get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+    get_password_hash_async, verify_password_async, verify_and_update_password_async,
+    create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from .utils.email_service import send_email
+from .utils.auth_cache import auth_cache
 from src.routes.utils.helpers import (
     generate_8_digit_password, is_ip_locked, record_failed_login, record_successful_login,
     get_remaining_attempts, get_lockout_time_remaining,
@@ -79,7 +80,7 @@ async def register_user(user_create: UserCreate, session: Session = Depends(get_
             )
 
 
-    hashed_password = get_password_hash(user_create.password) # type: ignore
+    hashed_password = await get_password_hash_async(user_create.password) # type: ignore
 
     db_user = User(
         email=user_create.email,
@@ -130,8 +131,11 @@ async def login_user(
         )
     
     user = session.exec(select(User).where(User.email == form_data.username)).first()
+    password_valid, new_hash = False, None
+    if user:
+        password_valid, new_hash = await verify_and_update_password_async(form_data.password, user.password_hash)
     
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not password_valid:
         record_failed_login(client_ip)
         remaining_attempts = get_remaining_attempts(client_ip)
         
@@ -163,9 +167,13 @@ async def login_user(
         expires_delta=access_token_expires
     )
     
+    if new_hash:
+        # Stored hash used an outdated scheme or cost factor
+        user.password_hash = new_hash
     user.updated_at = datetime.utcnow()
     session.add(user)
     session.commit()
+    auth_cache.invalidate_user(user.user_id)
     
     return {
         "access_token": access_token,
@@ -186,12 +194,20 @@ async def login_for_access_token(
     session: Session = Depends(get_session)
 ):
     user = session.exec(select(User).where(User.email == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    password_valid, new_hash = False, None
+    if user:
+        password_valid, new_hash = await verify_and_update_password_async(form_data.password, user.password_hash)
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        user.password_hash = new_hash
+        session.add(user)
+        session.commit()
+        auth_cache.invalidate_user(user.user_id)
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -233,8 +249,10 @@ async def change_password(
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
+    # current_user may come from the auth cache; check secrets against the DB row
+    session.refresh(current_user)
     if current_password:
-        if not verify_password(current_password, current_user.password_hash):
+        if not await verify_password_async(current_password, current_user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
@@ -252,7 +270,7 @@ async def change_password(
     else:
         user_otp = current_user.otp
 
-        if not verify_password(otp,user_otp):
+        if not await verify_password_async(otp, user_otp):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -261,12 +279,13 @@ async def change_password(
             )
 
     
-    new_hashed_password = get_password_hash(new_password)
+    new_hashed_password = await get_password_hash_async(new_password)
     current_user.password_hash = new_hashed_password
     current_user.updated_at = datetime.utcnow()
     
     session.add(current_user)
     session.commit()
+    auth_cache.invalidate_user(current_user.user_id)
     
     return {"message": "Password changed successfully"}
 
@@ -306,9 +325,10 @@ async def forgot_password(
             detail="User with this email does not exist"
         )
     otp = generate_4_digit_code()
-    user.otp = get_password_hash(otp)
+    user.otp = await get_password_hash_async(otp)
     session.add(user)
     session.commit()
+    auth_cache.invalidate_user(user.user_id)
 
     subject = "Your Password Reset"
     body = f"Your new OTP code is: {otp}"
@@ -335,7 +355,7 @@ async def change_password_public(
             detail="User with this email does not exist"
         )
 
-    if not user.otp or not verify_password(otp, user.otp):
+    if not user.otp or not await verify_password_async(otp, user.otp):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid OTP"
@@ -351,13 +371,14 @@ async def change_password_public(
             }
         )
 
-    new_hashed_password = get_password_hash(new_password)
+    new_hashed_password = await get_password_hash_async(new_password)
     user.password_hash = new_hashed_password
     user.otp = None  # Clear the OTP after use
     user.updated_at = datetime.utcnow()
     
     session.add(user)
     session.commit()
+    auth_cache.invalidate_user(user.user_id)
     
     return {"message": "Password changed successfully"}
 
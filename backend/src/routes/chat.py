@@ -1,6 +1,12 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+import json
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import (
+    APIRouter, Depends, HTTPException, status, Query, Request, Response,
+    WebSocket, WebSocketDisconnect
+)
+from sqlalchemy import update
+from sqlmodel import Session, select, func
 from datetime import datetime
 
 from ..model.models import (
@@ -11,8 +17,15 @@ from ..model.models import (
     AdvancedChatRequest, MessageRole
 )
 from ..rag.services.rag_service import rag_service
-from ..routes.utils.database import get_session
-from ..routes.utils.auth import get_current_user
+from ..rag.services.history_service import history_service
+from ..routes.utils.database import get_session, engine
+from ..routes.utils.auth import get_current_user, authenticate_token
+from ..routes.utils.pagination import (
+    paginate, set_next_cursor, encode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+from ..routes.utils.conversation_cache import conversation_cache, CHAT_HISTORY_WINDOW
+from ..routes.utils.usage_meter import usage_meter
+from ..routes.utils.machine_cache import machine_scope_cache
 from ..model.models import User
 
 router = APIRouter(
@@ -20,6 +33,11 @@ router = APIRouter(
     tags=["Chat"]
 )
 
+MESSAGE_PAGE_SIZE = 50
+HAS_MORE_HEADER = "X-Has-More"
+# Seconds a new WebSocket gets to send its auth message
+WS_AUTH_TIMEOUT = 10
+
 @router.post("/sessions/", response_model=ChatSessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_chat_session(
     session_data: ChatSessionCreate,
@@ -58,16 +76,27 @@ async def create_chat_session(
 
 @router.get("/sessions/", response_model=List[ChatSessionResponse])
 async def get_user_sessions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_session)
 ):
-    """Get all chat sessions for the current user."""
+    """
+    Get chat sessions for the current user, newest first.
+
+    Pages are keyed on created_at, which never changes. updated_at moves on
+    every chat turn, so a session messaged mid-scroll would jump pages and
+    be skipped or shown twice.
+    """
     try:
-        sessions = db.exec(
-            select(ChatSession)
-            .where(ChatSession.user_id == current_user.user_id)
-            .order_by(ChatSession.updated_at.desc())
-        ).all()
+        sessions, next_cursor = paginate(
+            db,
+            select(ChatSession).where(ChatSession.user_id == current_user.user_id),
+            ChatSession.created_at, ChatSession.session_id, cursor, limit,
+            descending=True
+        )
+        set_next_cursor(response, next_cursor)
         
         return [
             ChatSessionResponse(
@@ -83,20 +112,61 @@ async def get_user_sessions(
             for session in sessions
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve chat sessions: {str(e)}"
         )
 
+def _message_anchor(db: Session, session_id: int, message_id: int) -> ChatMessage:
+    """Resolve a before/after message id to a keyset cursor within the session"""
+    anchor = db.get(ChatMessage, message_id)
+    if not anchor or anchor.session_id != session_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid message cursor"
+        )
+    return anchor
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
 @router.get("/sessions/{session_id}/messages/", response_model=List[MessageResponse])
 async def get_session_messages(
     session_id: int,
+    request: Request,
+    response: Response,
+    before: Optional[int] = Query(None, description="Return messages older than this message id"),
+    after: Optional[int] = Query(None, description="Return messages newer than this message id"),
+    limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_session)
 ):
-    """Get all messages for a specific chat session."""
+    """
+    Get a page of messages for a chat session, oldest first.
+
+    Without a cursor the latest `limit` messages are returned. Pass `after`
+    with the newest message id already held to fetch only new messages, or
+    `before` with the oldest one to load earlier history. X-Has-More tells
+    whether more messages exist in that direction. The ETag covers the page
+    parameters and changes only when a message is added, so polling the same
+    page with If-None-Match returns 304 while idle.
+    """
     try:
+        if before is not None and after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either 'before' or 'after', not both"
+            )
+
         # Verify session belongs to user
         session = db.get(ChatSession, session_id)
         if not session or session.user_id != current_user.user_id:
@@ -104,13 +174,35 @@ async def get_session_messages(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Chat session not found"
             )
-        
-        messages = db.exec(
-            select(ChatMessage)
+
+        latest_message_id = db.exec(
+            select(func.max(ChatMessage.message_id))
             .where(ChatMessage.session_id == session_id)
-            .order_by(ChatMessage.timestamp.asc())
-        ).all()
-        
+        ).one()
+        # Each page (before/after/limit) has its own body, so its own tag
+        etag = f'W/"{session_id}-{latest_message_id or 0}-{before or ""}-{after or ""}-{limit}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        cursor = None
+        anchor_id = after if after is not None else before
+        if anchor_id is not None:
+            anchor = _message_anchor(db, session_id, anchor_id)
+            cursor = encode_cursor(anchor.timestamp, anchor.message_id)
+
+        # Newer pages walk forward; the latest page and older pages walk backward
+        messages, next_cursor = paginate(
+            db,
+            select(ChatMessage).where(ChatMessage.session_id == session_id),
+            ChatMessage.timestamp, ChatMessage.message_id, cursor, limit,
+            descending=after is None
+        )
+        if after is None:
+            messages.reverse()
+
+        response.headers["ETag"] = etag
+        response.headers[HAS_MORE_HEADER] = "true" if next_cursor else "false"
+
         return [
             MessageResponse(
                 message_id=msg.message_id,
@@ -131,15 +223,140 @@ async def get_session_messages(
             detail=f"Failed to retrieve messages: {str(e)}"
         )
 
+# ============================================================================
+# CHAT TURNS (shared by HTTP and WebSocket)
+# ============================================================================
+def _load_history(db: Session, session_id: int, session_version: datetime) -> List[dict]:
+    """
+    Recent messages for a session, oldest first: the in-memory window when
+    this worker handled the previous turn, otherwise the last messages from
+    the DB (leaving room for the new question).
+    """
+    cached = conversation_cache.get(session_id, session_version)
+    if cached is not None:
+        return cached
+    history_messages = db.exec(
+        select(ChatMessage)
+        .where(ChatMessage.session_id == session_id)
+        .order_by(ChatMessage.timestamp.desc())
+        .limit(CHAT_HISTORY_WINDOW - 1)
+    ).all()
+    window = [
+        {"role": msg.role, "content": msg.content, "message_id": msg.message_id}
+        for msg in reversed(history_messages)  # Reverse to get chronological order
+    ]
+    conversation_cache.load(session_id, session_version, window)
+    return window
+
+
+def _prepare_turn(window: List[dict], question: str, summary: Optional[str]) -> Tuple[List[dict], Optional[int]]:
+    """Pack history for the prompt; also report where the window starts for summarising"""
+    ai_messages = (window + [
+        {"role": MessageRole.USER, "content": question, "message_id": None}
+    ])[-CHAT_HISTORY_WINDOW:]
+    # Older turns live in the rolling summary; recent ones are packed to a token budget
+    history = history_service.pack(ai_messages, summary)
+    # A full window means older messages exist that the summary may not cover yet
+    window_start_id = ai_messages[0]["message_id"] if len(ai_messages) >= CHAT_HISTORY_WINDOW else None
+    return history[:-1], window_start_id  # the last entry is this turn's question
+
+
+def _save_turn(
+    db: Session,
+    session_id: Optional[int],
+    user_id: int,
+    company_name: Optional[str],
+    question: str,
+    answer: dict,
+    turn_started: datetime,
+    session_version: Optional[datetime],
+    window_start_id: Optional[int],
+) -> Tuple[int, int, datetime]:
+    """
+    Write a whole turn in one transaction: the session (if new), both messages,
+    the session timestamp and the token usage. Returns (session_id, assistant message_id,
+    new session version).
+    """
+    turn_finished = datetime.utcnow()
+    if session_id is None:
+        new_session = ChatSession(
+            user_id=user_id,
+            title=f"Chat Session {turn_started.strftime('%Y-%m-%d %H:%M')}",
+            created_at=turn_started,
+            updated_at=turn_finished
+        )
+        db.add(new_session)
+        db.flush()
+        session_id = new_session.session_id
+    else:
+        db.exec(
+            update(ChatSession)
+            .where(ChatSession.session_id == session_id)
+            .values(updated_at=turn_finished)
+        )
+
+    user_message = ChatMessage(
+        session_id=session_id, # type: ignore
+        role=MessageRole.USER,
+        content=question,
+        timestamp=turn_started
+    )
+    ai_message = ChatMessage(
+        session_id=session_id, # type: ignore
+        role=MessageRole.ASSISTANT,
+        content=answer["response"],
+        timestamp=turn_finished,
+        message_metadata={
+            key: answer[key] for key in ("model", "usage", "confidence", "cancelled") if key in answer
+        }
+    )
+    db.add(user_message)
+    db.add(ai_message)
+    # Flush assigns ids inside the transaction, so nothing needs a refresh afterwards
+    db.flush()
+    user_message_id = user_message.message_id
+    ai_message_id = ai_message.message_id
+    # A coalesced answer shares another request's LLM call, which that request meters
+    if not answer.get("coalesced"):
+        usage_meter.record(
+            db, user_id, company_name, answer.get("model"), answer.get("usage"),
+            session_id=session_id, message_id=ai_message_id, when=turn_finished
+        )
+    db.commit()
+
+    # The new updated_at becomes the window's version for the next turn
+    if session_version is None:
+        conversation_cache.load(session_id, turn_finished, []) # type: ignore
+    conversation_cache.append(session_id, MessageRole.USER, question, message_id=user_message_id) # type: ignore
+    conversation_cache.append(
+        session_id, MessageRole.ASSISTANT, answer["response"], # type: ignore
+        version=turn_finished, message_id=ai_message_id
+    )
+    history_service.schedule_refresh(engine, session_id, window_start_id) # type: ignore
+    return session_id, ai_message_id, turn_finished # type: ignore
+
+
 @router.post("/ai/chat", response_model=AIChatResponse)
 async def chat_with_ai(
     chat_request: AIChatRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_session)
 ):
-    """Send a message to AI and get response."""
+    """
+    Send a message to AI and get response.
+
+    The turn is one unit of work: history is read up front, the DB connection
+    is released for the LLM call, and the session, user message, assistant
+    message and session timestamp are then written in a single transaction.
+    """
     try:
-        # Get or create chat session
+        turn_started = datetime.utcnow()
+        session_id: Optional[int] = None
+        session_version: Optional[datetime] = None
+        summary: Optional[str] = None
+        machine_id: Optional[int] = None
+        window: List[dict] = []
+
         if chat_request.session_id:
             session = db.get(ChatSession, chat_request.session_id)
             if not session or session.user_id != current_user.user_id:
@@ -147,62 +364,41 @@ async def chat_with_ai(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Chat session not found"
                 )
-        else:
-            # Create new session
-            session = ChatSession(
-                user_id=current_user.user_id,
-                title=f"Chat Session {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
-            )
-            db.add(session)
-            db.commit()
-            db.refresh(session)
-        
-        # Save user message
-        user_message = ChatMessage(
-            session_id=session.session_id,
-            role=MessageRole.USER,
-            content=chat_request.message
-        )
-        db.add(user_message)
-        db.commit()
-        db.refresh(user_message)
-        
-        # Get chat history for context
-        history_messages = db.exec(
-            select(ChatMessage)
-            .where(ChatMessage.session_id == session.session_id)
-            .order_by(ChatMessage.timestamp.desc())
-            .limit(10)  # Last 10 messages for context
-        ).all()
-        
-        # Prepare messages for AI
-        ai_messages = []
-        for msg in reversed(history_messages):  # Reverse to get chronological order
-            ai_messages.append({
-                "role": msg.role,
-                "content": msg.content
-            })
-        
-        # Get machine type from session for context filtering
-        machine_type = None
-        if session.machine_id:
-            # You could fetch machine details here for filtering
-            # For now, we'll use the general approach
-            pass
+            session_id = session.session_id
+            session_version = session.updated_at
+            summary = session.summary
+            machine_id = session.machine_id
+            window = _load_history(db, session_id, session_version) # type: ignore
+
+        user_id = current_user.user_id
+        company_name = current_user.company_name
+        # Refuse before spending tokens once the monthly budget is used up
+        usage_meter.check_budget(db, user_id, company_name) # type: ignore
+        # Scope retrieval to the session's machine so context is machine-specific
+        machine_model, machine_type = machine_scope_cache.get(machine_id, db) or (None, None)
+        history, window_start_id = _prepare_turn(window, chat_request.message, summary)
+
+        # Hand the connection back to the pool; nothing is pending and the LLM call can take seconds
+        db.close()
         
         # Get AI response using RAG
         try:
             rag_response = await rag_service.generate_rag_response(
                 query=chat_request.message,
                 machine_type=machine_type,
-                context_limit=3
+                context_limit=3,
+                history=history,
+                summary=summary,
+                machine_model=machine_model,
+                company=company_name
             )
             
             ai_response_data = {
                 "response": rag_response["response"],
                 "model": rag_response["model"],
                 "usage": rag_response["usage"],
-                "confidence": rag_response["confidence"]
+                "confidence": rag_response["confidence"],
+                "coalesced": rag_response.get("coalesced", False)
             }
             
         except Exception as e:
@@ -214,30 +410,16 @@ async def chat_with_ai(
                 "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30},
                 "confidence": 0.3
             }
-        # Save AI response
-        ai_message = ChatMessage(
-            session_id=session.session_id,
-            role=MessageRole.ASSISTANT,
-            content=ai_response_data["response"],
-            message_metadata={
-                "model": ai_response_data["model"],
-                "usage": ai_response_data["usage"],
-                "confidence": ai_response_data["confidence"]
-            }
+
+        session_id, ai_message_id, _ = _save_turn(
+            db, session_id, user_id, company_name, chat_request.message, ai_response_data, # type: ignore
+            turn_started, session_version, window_start_id
         )
-        db.add(ai_message)
-        
-        # Update session timestamp
-        session.updated_at = datetime.utcnow()
-        db.add(session)
-        
-        db.commit()
-        db.refresh(ai_message)
         
         return AIChatResponse(
             response=ai_response_data["response"],
-            session_id=session.session_id,
-            message_id=ai_message.message_id,
+            session_id=session_id,
+            message_id=ai_message_id,
             confidence=ai_response_data["confidence"],
             usage=ai_response_data["usage"],
             model=ai_response_data["model"]
@@ -250,4 +432,184 @@ async def chat_with_ai(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process chat request: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+# ============================================================================
+# WEBSOCKET CHANNEL
+# ============================================================================
+class _ChatConnection:
+    """
+    State for one authenticated WebSocket: the session's version and summary
+    stay warm between turns, at most one generation runs at a time, and no
+    DB connection is held while the socket is idle.
+    """
+
+    def __init__(self, websocket: WebSocket, db: Session, user: User, chat_session: ChatSession):
+        self.websocket = websocket
+        self.db = db
+        self.user_id: int = user.user_id # type: ignore
+        self.company_name = user.company_name
+        self.session_id: int = chat_session.session_id # type: ignore
+        self.session_version: Optional[datetime] = chat_session.updated_at
+        self.summary: Optional[str] = chat_session.summary
+        self.machine_model, self.machine_type = machine_scope_cache.get(chat_session.machine_id, db) or (None, None)
+        self.task: Optional[asyncio.Task] = None
+        # Generation and control replies share the socket
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, payload: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self.websocket.send_json(payload)
+
+    def start_turn(self, question: str) -> bool:
+        if self.task is not None and not self.task.done():
+            return False
+        self.task = asyncio.create_task(self._run_turn(question))
+        return True
+
+    async def cancel_turn(self) -> bool:
+        if self.task is None or self.task.done():
+            return False
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        return True
+
+    def _window(self) -> List[dict]:
+        window = conversation_cache.get(self.session_id, self.session_version)
+        if window is not None:
+            return window
+        # Another worker may have written since; pick up its version and summary
+        chat_session = self.db.get(ChatSession, self.session_id)
+        self.session_version = chat_session.updated_at # type: ignore
+        self.summary = chat_session.summary # type: ignore
+        return _load_history(self.db, self.session_id, self.session_version) # type: ignore
+
+    async def _run_turn(self, question: str) -> None:
+        turn_started = datetime.utcnow()
+        parts: List[str] = []
+        message_id: Optional[int] = None
+        try:
+            window = self._window()
+            usage_meter.check_budget(self.db, self.user_id, self.company_name)
+            self.db.close()
+            history, window_start_id = _prepare_turn(window, question, self.summary)
+            answer: Optional[Dict[str, Any]] = None
+            async for event in rag_service.stream_rag_response(
+                query=question,
+                machine_type=self.machine_type,
+                context_limit=3,
+                history=history,
+                summary=self.summary,
+                machine_model=self.machine_model,
+                company=self.company_name
+            ):
+                if event["type"] == "token":
+                    parts.append(event["content"])
+                    await self.send({"type": "token", "content": event["content"]})
+                else:
+                    answer = event
+
+            message_id = self._save(question, answer, turn_started, window_start_id) # type: ignore
+            await self.send({
+                "type": "done",
+                "message_id": message_id,
+                "model": answer["model"], # type: ignore
+                "usage": answer["usage"], # type: ignore
+                "confidence": answer["confidence"], # type: ignore
+                "sources": answer.get("sources", []) # type: ignore
+            })
+        except asyncio.CancelledError:
+            # Keep what the user already saw; an empty answer is not worth a row
+            if parts and message_id is None:
+                message_id = self._save(
+                    question, {"response": "".join(parts), "cancelled": True}, turn_started, None
+                )
+            try:
+                await self.send({"type": "cancelled", "message_id": message_id})
+            except Exception:
+                pass  # socket already gone
+        except HTTPException as e:
+            try:
+                await self.send({"type": "error", "detail": e.detail})
+            except Exception:
+                pass
+        except Exception as e:
+            self.db.rollback()
+            try:
+                await self.send({"type": "error", "detail": f"Failed to process chat request: {str(e)}"})
+            except Exception:
+                pass
+
+    def _save(self, question: str, answer: Dict[str, Any], turn_started: datetime,
+              window_start_id: Optional[int]) -> int:
+        _, message_id, self.session_version = _save_turn(
+            self.db, self.session_id, self.user_id, self.company_name, question, answer,
+            turn_started, self.session_version, window_start_id
+        )
+        self.db.close()
+        return message_id
+
+
+@router.websocket("/ws/{session_id}")
+async def chat_websocket(
+    websocket: WebSocket,
+    session_id: int,
+    db: Session = Depends(get_session)
+):
+    """
+    Streaming chat over a WebSocket.
+
+    The first message must be {"type": "auth", "token": ...}. After "ready"
+    the client sends {"type": "message", "content": ...} and receives
+    "token" events followed by "done"; {"type": "cancel"} stops the running
+    generation (partial text is kept), and {"type": "ping"} gets a "pong".
+    """
+    await websocket.accept()
+    try:
+        auth = json.loads(await asyncio.wait_for(websocket.receive_text(), timeout=WS_AUTH_TIMEOUT))
+        if not isinstance(auth, dict) or auth.get("type") != "auth" or not auth.get("token"):
+            raise ValueError("expected auth message")
+        user = authenticate_token(str(auth["token"]), db)
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, ValueError, HTTPException):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    chat_session = db.get(ChatSession, session_id)
+    if not chat_session or chat_session.user_id != user.user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    connection = _ChatConnection(websocket, db, user, chat_session)
+    db.close()
+    await connection.send({"type": "ready", "session_id": session_id})
+
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                await connection.send({"type": "error", "detail": "Invalid JSON"})
+                continue
+            kind = data.get("type") if isinstance(data, dict) else None
+
+            if kind == "message":
+                content = str(data.get("content") or "").strip()
+                if not content:
+                    await connection.send({"type": "error", "detail": "Message content is required"})
+                elif not connection.start_turn(content):
+                    await connection.send({"type": "error", "detail": "A response is already being generated"})
+            elif kind == "cancel":
+                if not await connection.cancel_turn():
+                    await connection.send({"type": "error", "detail": "Nothing to cancel"})
+            elif kind == "ping":
+                await connection.send({"type": "pong"})
+            else:
+                await connection.send({"type": "error", "detail": f"Unknown message type: {kind}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Cancel any in-flight generation (its partial text is still saved) before the session dependency closes
+        await connection.cancel_turn()
@@ -1,14 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
 from sqlmodel import Session, select
-from typing import List
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from pydantic import ValidationError
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
+import csv
+import io
+import json
 
 from .utils.database import get_session
 from ..model.models import ErrorCode, ErrorCodeCreate, ErrorCodeRead, ErrorCodeUpdate
 from .utils.auth import get_current_user,get_current_active_admin
+from .utils.pagination import paginate, paginate_list, set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .utils.error_code_cache import error_code_cache
 
 router = APIRouter(prefix="/error-codes", tags=["Error Codes"])
 
+IMPORT_BATCH_SIZE = 500
+# Columns written by the bulk import; upsert mode overwrites the ones a row supplies
+IMPORT_COLUMNS = (
+    "title", "description", "manufacturer_origin", "severity",
+    "suggested_action", "related_machine_model"
+)
+
 # Create Error Code
 @router.post("/", response_model=ErrorCodeRead, status_code=status.HTTP_201_CREATED)
 async def create_error_code(
@@ -44,7 +59,12 @@ async def create_error_code(
         session.add(db_error_code)
         session.commit()
         session.refresh(db_error_code)
+        error_code_cache.invalidate(
+            codes=[db_error_code.code], manufacturers=[db_error_code.manufacturer_origin]
+        )
         return db_error_code
+    except HTTPException:
+        raise
     except Exception as e:
         session.rollback()
         raise HTTPException(
@@ -55,8 +75,9 @@ async def create_error_code(
 # Get All Error Codes
 @router.get("/", response_model=List[ErrorCodeRead])
 async def get_error_codes(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     manufacturer_origin: str = None,
     severity: str = None,
     search: str = None,
@@ -83,13 +104,15 @@ async def get_error_codes(
             query = query.where(search_filter)
         
         # Apply pagination
-        query = query.offset(skip).limit(limit)
-        
-        # Execute query
-        error_codes = session.exec(query).all()
+        error_codes, next_cursor = paginate(
+            session, query, ErrorCode.code, ErrorCode.error_code_id, cursor, limit
+        )
+        set_next_cursor(response, next_cursor)
         
         return error_codes
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -105,6 +128,10 @@ async def get_error_code(
 ):
     
     try:
+        cached = error_code_cache.get_by_id(error_code_id)
+        if cached:
+            return cached
+        
         error_code = session.get(ErrorCode, error_code_id)
         
         if not error_code:
@@ -113,7 +140,7 @@ async def get_error_code(
                 detail=f"Error code with ID {error_code_id} not found"
             )
         
-        return error_code
+        return error_code_cache.put(error_code)
         
     except HTTPException:
         raise
@@ -132,6 +159,10 @@ async def get_error_code_by_code(
 ):
     
     try:
+        cached = error_code_cache.get_by_code(code)
+        if cached:
+            return cached
+        
         error_code = session.exec(
             select(ErrorCode).where(ErrorCode.code == code)
         ).first()
@@ -142,7 +173,7 @@ async def get_error_code_by_code(
                 detail=f"Error code '{code}' not found"
             )
         
-        return error_code
+        return error_code_cache.put(error_code)
         
     except HTTPException:
         raise
@@ -183,6 +214,10 @@ async def update_error_code(
                     detail=f"Error code '{error_code_update.code}' already exists"
                 )
         
+        # Remember the old keys so the cache can drop them after the write
+        old_code = db_error_code.code
+        old_manufacturer = db_error_code.manufacturer_origin
+        
         # Update fields
         update_data = error_code_update.dict(exclude_unset=True)
         for field, value in update_data.items():
@@ -193,6 +228,11 @@ async def update_error_code(
         session.add(db_error_code)
         session.commit()
         session.refresh(db_error_code)
+        error_code_cache.invalidate(
+            error_code_id=error_code_id,
+            codes=[old_code, db_error_code.code],
+            manufacturers=[old_manufacturer, db_error_code.manufacturer_origin]
+        )
         
         return db_error_code
         
@@ -240,6 +280,11 @@ async def delete_error_code(
         # Delete error code
         session.delete(db_error_code)
         session.commit()
+        error_code_cache.invalidate(
+            error_code_id=error_code_id,
+            codes=[db_error_code.code],
+            manufacturers=[db_error_code.manufacturer_origin]
+        )
         
         return None
         
@@ -263,18 +308,24 @@ async def bulk_create_error_codes(
     try:
         created_codes = []
         
+        # Check every code for duplicates with a single IN query
+        requested_codes = [error_code_data.code for error_code_data in error_codes]
+        existing_codes = set(session.exec(
+            select(ErrorCode.code).where(ErrorCode.code.in_(requested_codes))
+        ).all())
+        repeated_codes = {code for code in requested_codes if requested_codes.count(code) > 1}
+        
+        if existing_codes or repeated_codes:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "Duplicate error codes",
+                    "already_exist": sorted(existing_codes),
+                    "repeated_in_request": sorted(repeated_codes)
+                }
+            )
+        
         for error_code_data in error_codes:
-            # Check if error code already exists
-            existing_code = session.exec(
-                select(ErrorCode).where(ErrorCode.code == error_code_data.code)
-            ).first()
-            
-            if existing_code:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Error code '{error_code_data.code}' already exists"
-                )
-            
             # Create new error code
             db_error_code = ErrorCode(
                 code=error_code_data.code,
@@ -291,6 +342,10 @@ async def bulk_create_error_codes(
             created_codes.append(db_error_code)
         
         session.commit()
+        error_code_cache.invalidate(
+            codes=requested_codes,
+            manufacturers=[code.manufacturer_origin for code in error_codes]
+        )
         
         # Refresh all created codes to get their IDs
         for code in created_codes:
@@ -307,21 +362,213 @@ async def bulk_create_error_codes(
             detail=f"Failed to create error codes in bulk: {str(e)}"
         )
 
+# ============================================================================
+# STREAMING IMPORT (CSV / NDJSON)
+# ============================================================================
+def _detect_import_format(file: UploadFile, import_format: Optional[str]) -> str:
+    if import_format:
+        return import_format
+    file_name = (file.filename or "").lower()
+    if file_name.endswith(".csv") or file.content_type == "text/csv":
+        return "csv"
+    if file_name.endswith((".ndjson", ".jsonl")) or file.content_type == "application/x-ndjson":
+        return "ndjson"
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Unable to detect import format. Use a .csv/.ndjson file or pass import_format"
+    )
+
+def _iter_import_rows(file: UploadFile, import_format: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line_number, raw_row) pairs without loading the whole upload"""
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        if import_format == "csv":
+            # Header is line 1, so data rows start at line 2
+            for line_no, row in enumerate(csv.DictReader(stream), start=2):
+                cleaned = {k.strip(): (v.strip() or None) if isinstance(v, str) else v
+                           for k, v in row.items() if k}
+                models = cleaned.get("related_machine_model")
+                if models:
+                    cleaned["related_machine_model"] = [m.strip() for m in models.split(";") if m.strip()]
+                yield line_no, cleaned
+        else:
+            for line_no, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, e
+    finally:
+        # Leave the underlying upload file open for FastAPI to clean up
+        stream.detach()
+
+def _import_batch(
+    session: Session,
+    batch: List[Tuple[int, ErrorCodeCreate]],
+    mode: str,
+    report: List[Dict[str, Any]]
+) -> None:
+    """Write one batch with a single duplicate lookup and one INSERT ... ON CONFLICT"""
+    codes = [item.code for _, item in batch]
+    existing_codes = set(session.exec(
+        select(ErrorCode.code).where(ErrorCode.code.in_(codes))
+    ).all())
+
+    now = datetime.utcnow()
+    rows = []
+    for line_no, item in batch:
+        if item.code in existing_codes and mode == "insert":
+            report.append({"row": line_no, "code": item.code, "status": "skipped",
+                           "detail": "Error code already exists"})
+            continue
+        # Empty cells and missing keys leave the stored value alone on upsert
+        row = {column: getattr(item, column) for column in IMPORT_COLUMNS
+               if getattr(item, column) is not None}
+        row.update(code=item.code, created_at=now, updated_at=now)
+        rows.append((line_no, row))
+
+    if not rows:
+        return
+
+    # One statement per set of supplied columns, since a multi-row INSERT needs the same keys in every row
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for _, row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    insert_fn = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    table = ErrorCode.__table__
+    written = set()
+    for columns, group in groups.items():
+        stmt = insert_fn(table).values(group)
+        if mode == "upsert":
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["code"],
+                set_={column: stmt.excluded[column] for column in columns
+                      if column not in ("code", "created_at")}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["code"])
+        written.update(session.execute(stmt.returning(table.c.code)).scalars().all())
+    session.commit()
+    # Upserts may move codes between manufacturers, so drop every manufacturer list
+    error_code_cache.invalidate(codes=written)
+    error_code_cache.invalidate_all_manufacturers()
+
+    for line_no, row in rows:
+        code = row["code"]
+        if code not in written:
+            # Lost a race with a concurrent writer between the lookup and the insert
+            report.append({"row": line_no, "code": code, "status": "skipped",
+                           "detail": "Error code already exists"})
+        elif code in existing_codes:
+            report.append({"row": line_no, "code": code, "status": "updated"})
+        else:
+            report.append({"row": line_no, "code": code, "status": "created"})
+
+@router.post("/import")
+async def import_error_codes(
+    file: UploadFile = File(...),
+    import_format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    mode: str = Query("insert", pattern="^(insert|upsert)$"),
+    session: Session = Depends(get_session),
+    current_user: dict = Depends(get_current_active_admin)
+):
+    """
+    Stream a CSV or NDJSON file of error codes into the database.
+
+    Rows are validated one by one and written in batches. In "insert" mode
+    existing codes are skipped; in "upsert" mode the fields a row supplies
+    are overwritten and empty or missing ones keep their stored value.
+    CSV rows separate related_machine_model entries with ";".
+    """
+    import_format = _detect_import_format(file, import_format)
+    report: List[Dict[str, Any]] = []
+    batch: List[Tuple[int, ErrorCodeCreate]] = []
+    seen_codes = set()
+
+    try:
+        for line_no, raw in _iter_import_rows(file, import_format):
+            if isinstance(raw, Exception):
+                report.append({"row": line_no, "code": None, "status": "error",
+                               "detail": f"Invalid JSON: {raw}"})
+                continue
+            try:
+                item = ErrorCodeCreate(**raw)
+            except (ValidationError, TypeError) as e:
+                report.append({"row": line_no, "code": raw.get("code") if isinstance(raw, dict) else None,
+                               "status": "error", "detail": str(e)})
+                continue
+            if item.code in seen_codes:
+                report.append({"row": line_no, "code": item.code, "status": "error",
+                               "detail": "Duplicate code earlier in file"})
+                continue
+            seen_codes.add(item.code)
+
+            batch.append((line_no, item))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                _import_batch(session, batch, mode, report)
+                batch = []
+
+        if batch:
+            _import_batch(session, batch, mode, report)
+
+    except UnicodeDecodeError:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import file must be UTF-8 encoded"
+        )
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import error codes: {str(e)}"
+        )
+
+    report.sort(key=lambda entry: entry["row"])
+    summary = {status_name: 0 for status_name in ("created", "updated", "skipped", "error")}
+    for entry in report:
+        summary[entry["status"]] += 1
+
+    return {
+        "format": import_format,
+        "mode": mode,
+        "total_rows": len(report),
+        **summary,
+        "rows": report
+    }
+
 # Get Error Codes by Manufacturer Origin
 @router.get("/manufacturer/{manufacturer_origin}", response_model=List[ErrorCodeRead])
 async def get_error_codes_by_manufacturer(
     manufacturer_origin: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     session: Session = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
  
     try:
-        error_codes = session.exec(
-            select(ErrorCode).where(ErrorCode.manufacturer_origin == manufacturer_origin)
-        ).all()
+        error_codes = error_code_cache.get_manufacturer(manufacturer_origin)
+        if error_codes is None:
+            error_codes = error_code_cache.put_manufacturer(
+                manufacturer_origin,
+                session.exec(
+                    select(ErrorCode).where(ErrorCode.manufacturer_origin == manufacturer_origin)
+                ).all()
+            )
+        
+        error_codes, next_cursor = paginate_list(
+            error_codes, "code", "error_code_id", cursor, limit
+        )
+        set_next_cursor(response, next_cursor)
         
         return error_codes
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -332,17 +579,25 @@ async def get_error_codes_by_manufacturer(
 @router.get("/severity/{severity}", response_model=List[ErrorCodeRead])
 async def get_error_codes_by_severity(
     severity: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     session: Session = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
     
     try:
-        error_codes = session.exec(
-            select(ErrorCode).where(ErrorCode.severity == severity)
-        ).all()
+        error_codes, next_cursor = paginate(
+            session,
+            select(ErrorCode).where(ErrorCode.severity == severity),
+            ErrorCode.code, ErrorCode.error_code_id, cursor, limit
+        )
+        set_next_cursor(response, next_cursor)
         
         return error_codes
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
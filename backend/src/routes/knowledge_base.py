@@ -1,5 +1,5 @@
 # mst/backend/src/routes/knowledge_base.py (updated)
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks, Query, Response
 from sqlmodel import Session, select
 from typing import List, Optional
 from datetime import datetime
@@ -7,6 +7,7 @@ import json
 
 from ..rag.services.document_service import document_service
 from ..services.automation_service import automation_service
+from ..rag.services.vector_gc import vector_sweeper
 from .utils.database import get_session
 from ..model.models import (
     KnowledgeBaseContent,
@@ -17,6 +18,8 @@ from ..model.models import (
 from .utils.helpers import get_file_type
 from .utils.auth import get_current_active_admin, get_current_user
 from .utils.cloudinary_service import cloudinary_service
+from .utils.pagination import paginate, set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .utils.json_filters import json_array_contains_all, json_array_contains_any
 
 router = APIRouter(prefix="/knowledge-base", tags=["Knowledge Base"])
 
@@ -54,6 +57,9 @@ async def create_knowledge_base_content(
         external_url = None
         file_content_bytes = None
         file_name = None
+        document = None
+        # (bytes, file name) to index for RAG once the rows are committed
+        rag_upload = None
         
         if file:
 
@@ -85,15 +91,7 @@ async def create_knowledge_base_content(
                 
                 # Trigger RAG processing for document files
                 if kb_create.content_type == ContentType.document:
-                    metadata = {
-                        "title": kb_create.title,
-                        "content_type": kb_create.content_type,
-                        "applies_to_models": kb_create.applies_to_models,
-                        "uploader_id": user_id_val
-                    }
-                    await automation_service.process_uploaded_file(
-                        file_content_bytes, file_name, metadata, background_tasks
-                    )
+                    rag_upload = (file_content_bytes, file_name)
             elif file_type=="image":
                 upload_result = await cloudinary_service.upload_image(file_content_bytes, file_name)
             else:
@@ -114,17 +112,8 @@ async def create_knowledge_base_content(
             
             # For text content, process directly for RAG
             if kb_create.content_text:
-                metadata = {
-                    "title": kb_create.title,
-                    "content_type": kb_create.content_type,
-                    "applies_to_models": kb_create.applies_to_models,
-                    "uploader_id": user_id_val
-                }
                 # Convert text to bytes for processing
-                text_bytes = kb_create.content_text.encode('utf-8')
-                await automation_service.process_uploaded_file(
-                    text_bytes, f"{kb_create.title}.txt", metadata, background_tasks
-                )
+                rag_upload = (kb_create.content_text.encode('utf-8'), f"{kb_create.title}.txt")
 
         # Create DB record
         db_content = KnowledgeBaseContent(
@@ -139,12 +128,19 @@ async def create_knowledge_base_content(
         session.commit()
         session.refresh(db_content)
         
-        # Store content ID for RAG processing
-        if file_content_bytes and kb_create.content_type == ContentType.document:
-            metadata["kb_id"] = db_content.kb_id
-            # Reprocess with the content ID
+        # Index for RAG only now, so every chunk records the rows it belongs to
+        # and is removed with them (see delete_knowledge_base_content)
+        if rag_upload:
+            metadata = {
+                "title": kb_create.title,
+                "content_type": kb_create.content_type,
+                "applies_to_models": kb_create.applies_to_models,
+                "uploader_id": user_id_val,
+                "kb_id": db_content.kb_id,
+                "document_id": document.id if document else None
+            }
             await automation_service.process_uploaded_file(
-                file_content_bytes, file_name, metadata, background_tasks
+                rag_upload[0], rag_upload[1], metadata, background_tasks
             )
         
         return db_content
@@ -166,11 +162,13 @@ async def create_knowledge_base_content(
 # Get All Knowledge Base Content
 @router.get("/", response_model=List[KnowledgeBaseContentRead])
 async def get_knowledge_base_content(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     content_type: Optional[ContentType] = None,
     search: Optional[str] = None,
     tags: Optional[str] = None,  # JSON string
+    tags_match: str = Query("all", pattern="^(all|any)$"),
     machine_model: Optional[str] = None,
     error_code_id: Optional[int] = None,
     session: Session = Depends(get_session),
@@ -195,25 +193,32 @@ async def get_knowledge_base_content(
             try:
                 tags_list = json.loads(tags)
                 # Filter by tags (assuming tags is a JSON array)
-                query = query.where(KnowledgeBaseContent.tags.contains(tags_list))
+                if tags_list:
+                    if tags_match == "any":
+                        query = query.where(json_array_contains_any(KnowledgeBaseContent.tags, tags_list))
+                    else:
+                        query = query.where(json_array_contains_all(KnowledgeBaseContent.tags, tags_list))
             except json.JSONDecodeError:
                 pass
         
         if machine_model:
-            query = query.where(KnowledgeBaseContent.applies_to_models.contains([machine_model]))
+            query = query.where(
+                json_array_contains_all(KnowledgeBaseContent.applies_to_models, [machine_model])
+            )
 
         if error_code_id:
             query = query.where(KnowledgeBaseContent.related_error_code_id == error_code_id)
         
         # Apply pagination
-        query = query.offset(skip).limit(limit)
-        
-        
-        # Execute query
-        content_list = session.exec(query).all()
+        content_list, next_cursor = paginate(
+            session, query, KnowledgeBaseContent.created_at, KnowledgeBaseContent.kb_id, cursor, limit
+        )
+        set_next_cursor(response, next_cursor)
         
         return content_list
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -370,6 +375,7 @@ async def update_knowledge_base_content(
 @router.delete("/{kb_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_knowledge_base_content(
     kb_id: int,
+    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
@@ -415,6 +421,9 @@ async def delete_knowledge_base_content(
         # Delete from database
         session.delete(db_content)
         session.commit()
+
+        # Then its vectors and chunks; anything this misses is left to the periodic sweep
+        background_tasks.add_task(vector_sweeper.delete_for_kb, kb_id)
         
         return None
         
@@ -432,8 +441,9 @@ async def delete_knowledge_base_content(
 @router.get("/type/{content_type}", response_model=List[KnowledgeBaseContentRead])
 async def get_content_by_type(
     content_type: ContentType,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     session: Session = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
@@ -444,11 +454,14 @@ async def get_content_by_type(
         )
         
         # Apply pagination
-        query = query.offset(skip).limit(limit)
-        
-        content_list = session.exec(query).all()
+        content_list, next_cursor = paginate(
+            session, query, KnowledgeBaseContent.created_at, KnowledgeBaseContent.kb_id, cursor, limit
+        )
+        set_next_cursor(response, next_cursor)
         return content_list
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -459,6 +472,10 @@ async def get_content_by_type(
 @router.get("/search/tags", response_model=List[KnowledgeBaseContentRead])
 async def search_content_by_tags(
     tags: str,  # Comma-separated tags
+    response: Response,
+    tags_match: str = Query("any", pattern="^(all|any)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     session: Session = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
@@ -472,12 +489,17 @@ async def search_content_by_tags(
                 detail="At least one tag must be provided"
             )
         
-        # Search for content containing any of the specified tags
-        query = select(KnowledgeBaseContent).where(
-            KnowledgeBaseContent.tags.contains(tag_list)
-        )
+        # Search for content containing any (or all) of the specified tags
+        if tags_match == "all":
+            tags_filter = json_array_contains_all(KnowledgeBaseContent.tags, tag_list)
+        else:
+            tags_filter = json_array_contains_any(KnowledgeBaseContent.tags, tag_list)
+        query = select(KnowledgeBaseContent).where(tags_filter)
         
-        content_list = session.exec(query).all()
+        content_list, next_cursor = paginate(
+            session, query, KnowledgeBaseContent.created_at, KnowledgeBaseContent.kb_id, cursor, limit
+        )
+        set_next_cursor(response, next_cursor)
         return content_list
         
     except HTTPException:
@@ -1,6 +1,6 @@
 # src/routes/machines.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlmodel import Session, select
 from datetime import datetime
 
@@ -12,6 +12,8 @@ from src.routes.utils.auth import (
     get_current_user, get_current_active_admin, get_current_active_employee
 )
 from src.routes.utils.helpers import sanitize_string
+from src.routes.utils.pagination import paginate, set_next_cursor
+from src.routes.utils.machine_cache import machine_scope_cache
 
 router = APIRouter(
     prefix="/machines",
@@ -24,7 +26,8 @@ router = APIRouter(
 
 @router.get("/", response_model=List[Machine])
 async def list_machines(
-    skip: int = Query(0, ge=0, description="Number of machines to skip"),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of machines to return"),
     search: Optional[str] = Query(None, description="Search in serial_number, model, or type"),
     current_user: User = Depends(get_current_user),
@@ -44,14 +47,16 @@ async def list_machines(
         query = query.where(search_filter)
     
     # Apply pagination
-    query = query.offset(skip).limit(limit)
-    
-    machines = session.exec(query).all()
+    machines, next_cursor = paginate(
+        session, query, Machine.created_at, Machine.machine_id, cursor, limit
+    )
+    set_next_cursor(response, next_cursor)
     return machines
 
 @router.get("/my-machines", response_model=List[Machine])
 async def list_my_machines(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
@@ -69,9 +74,10 @@ async def list_my_machines(
         )
         query = query.where(search_filter)
     
-    query = query.offset(skip).limit(limit)
-    
-    machines = session.exec(query).all()
+    machines, next_cursor = paginate(
+        session, query, Machine.created_at, Machine.machine_id, cursor, limit
+    )
+    set_next_cursor(response, next_cursor)
     return machines
 
 @router.get("/{machine_id}", response_model=Machine)
@@ -194,6 +200,7 @@ async def update_machine(
     machine.updated_at = datetime.utcnow()
     session.add(machine)
     session.commit()
+    machine_scope_cache.invalidate(machine_id)
     session.refresh(machine)
 
     return machine
@@ -222,6 +229,7 @@ async def delete_machine(
     
     session.delete(machine)
     session.commit()
+    machine_scope_cache.invalidate(machine_id)
     return None
 
 # ============================================================================
@@ -230,7 +238,8 @@ async def delete_machine(
 
 @router.get("/admin/all", response_model=List[Machine])
 async def list_all_machines_admin(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None),
     owner_id: Optional[int] = Query(None, description="Filter by owner ID"),
@@ -255,9 +264,10 @@ async def list_all_machines_admin(
         query = query.where(search_filter)
     
     # Apply pagination
-    query = query.offset(skip).limit(limit)
-    
-    machines = session.exec(query).all()
+    machines, next_cursor = paginate(
+        session, query, Machine.created_at, Machine.machine_id, cursor, limit
+    )
+    set_next_cursor(response, next_cursor)
     return machines
 
 @router.get("/admin/statistics", response_model=dict)
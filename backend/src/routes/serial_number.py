@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 
 from ..model.models import MachineModel, Employee
 from .utils.database import get_session
 from .utils.auth import get_current_active_admin
+from .utils.pagination import paginate, set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 router = APIRouter(
     prefix="/serial-number",
     tags=["Machine Serial number"]
@@ -35,23 +36,40 @@ def create_machine_model(
     session.refresh(machine)
     return machine
 
+# serial_number is the primary key, so it doubles as the keyset tiebreaker
+def _page_machine_models(session: Session, query, response: Response, cursor: Optional[str], limit: int):
+    machines, next_cursor = paginate(
+        session, query, MachineModel.serial_number, MachineModel.serial_number, cursor, limit
+    )
+    set_next_cursor(response, next_cursor)
+    return machines
+
 @router.get("/", response_model=List[MachineModel])
 def list_machine_models(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     admin=Depends(get_current_active_admin),
     session: Session = Depends(get_session)):
-    return session.exec(select(MachineModel)).all()
+    return _page_machine_models(session, select(MachineModel), response, cursor, limit)
 
 @router.get("/not-owned", response_model=List[MachineModel])
-def get_not_owned( admin=Depends(get_current_active_admin),
+def get_not_owned(response: Response,
+                  cursor: Optional[str] = None,
+                  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                  admin=Depends(get_current_active_admin),
                   session: Session = Depends(get_session)):
-    machines = session.exec(select(MachineModel).where(MachineModel.owned == False)).all()
-    return machines
+    query = select(MachineModel).where(MachineModel.owned == False)
+    return _page_machine_models(session, query, response, cursor, limit)
 
 @router.get("/owned", response_model=List[MachineModel])
-def get_owned( admin=Depends(get_current_active_admin),
+def get_owned(response: Response,
+              cursor: Optional[str] = None,
+              limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+              admin=Depends(get_current_active_admin),
               session: Session = Depends(get_session)):
-    machines = session.exec(select(MachineModel).where(MachineModel.owned == True)).all()
-    return machines
+    query = select(MachineModel).where(MachineModel.owned == True)
+    return _page_machine_models(session, query, response, cursor, limit)
 
 @router.delete("/{serial_number}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_machine_model(
@@ -0,0 +1,125 @@
+# src/routes/usage.py
+from typing import List, Optional
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlmodel import Session, select
+
+from ..model.models import (
+    User, UsageScope, TokenBudget, TokenBudgetUpdate, TokenBudgetRead,
+    TokenUsageDailyRead, UsageSummary
+)
+from .utils.database import get_session
+from .utils.auth import get_current_active_admin
+from .utils.usage_meter import usage_meter, month_start
+
+router = APIRouter(
+    prefix="/admin/usage",
+    tags=["Usage"]
+)
+
+
+def _period(start: Optional[date], end: Optional[date]):
+    """Default to the current month to date"""
+    end = end or datetime.utcnow().date()
+    start = start or month_start(end)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    return start, end
+
+
+@router.get("/{scope}/{scope_key}", response_model=UsageSummary)
+async def get_usage_summary(
+    scope: UsageScope,
+    scope_key: str,
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    current_admin: User = Depends(get_current_active_admin),
+    session: Session = Depends(get_session)
+):
+    """Token and cost totals for a user (by user_id) or company (by name)"""
+    start, end = _period(start, end)
+    try:
+        totals = usage_meter.totals(session, scope, scope_key, start, end)
+        return UsageSummary(scope=scope, scope_key=scope_key, start=start, end=end, **totals)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get usage: {str(e)}"
+        )
+
+
+@router.get("/{scope}/{scope_key}/daily", response_model=List[TokenUsageDailyRead])
+async def get_daily_usage(
+    scope: UsageScope,
+    scope_key: str,
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    current_admin: User = Depends(get_current_active_admin),
+    session: Session = Depends(get_session)
+):
+    start, end = _period(start, end)
+    return usage_meter.daily(session, scope, scope_key, start, end)
+
+
+@router.get("/{scope}/{scope_key}/budget", response_model=TokenBudgetRead)
+async def get_budget(
+    scope: UsageScope,
+    scope_key: str,
+    current_admin: User = Depends(get_current_active_admin),
+    session: Session = Depends(get_session)
+):
+    """Monthly limits alongside month-to-date usage"""
+    return usage_meter.budget_status(session, scope, scope_key)
+
+
+@router.put("/{scope}/{scope_key}/budget", response_model=TokenBudgetRead)
+async def set_budget(
+    scope: UsageScope,
+    scope_key: str,
+    budget_update: TokenBudgetUpdate,
+    current_admin: User = Depends(get_current_active_admin),
+    session: Session = Depends(get_session)
+):
+    try:
+        budget = session.exec(
+            select(TokenBudget).where(TokenBudget.scope == scope.value, TokenBudget.scope_key == scope_key)
+        ).first()
+        if budget is None:
+            budget = TokenBudget(scope=scope, scope_key=scope_key)
+        budget.monthly_token_limit = budget_update.monthly_token_limit
+        budget.monthly_cost_limit = budget_update.monthly_cost_limit
+        budget.updated_at = datetime.utcnow()
+        session.add(budget)
+        session.commit()
+        usage_meter.invalidate_budget(scope, scope_key)
+        return usage_meter.budget_status(session, scope, scope_key)
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to set budget: {str(e)}"
+        )
+
+
+@router.delete("/{scope}/{scope_key}/budget", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_budget(
+    scope: UsageScope,
+    scope_key: str,
+    current_admin: User = Depends(get_current_active_admin),
+    session: Session = Depends(get_session)
+):
+    budget = session.exec(
+        select(TokenBudget).where(TokenBudget.scope == scope.value, TokenBudget.scope_key == scope_key)
+    ).first()
+    if not budget:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Budget not found"
+        )
+    session.delete(budget)
+    session.commit()
+    usage_meter.invalidate_budget(scope, scope_key)
+    return None
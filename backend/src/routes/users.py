@@ -1,6 +1,6 @@
 # src/routes/users.py
 from typing import Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlmodel import Session, select
 from datetime import datetime
 from .utils.helpers import generate_8_digit_password
@@ -9,13 +9,15 @@ from ..model.models import (
 )
 from .utils.database import get_session
 from .utils.auth import (
-    get_password_hash, verify_password,
+    get_password_hash_async,
     get_current_user, get_current_active_admin, get_current_active_employee
 )
 from .utils.helpers import (
     is_password_strong_enough, validate_password_strength, generate_8_digit_password
 )
 from .utils.email_service import send_email
+from .utils.pagination import paginate, set_next_cursor
+from .utils.auth_cache import auth_cache
 
 router = APIRouter(
     prefix="",
@@ -40,6 +42,7 @@ async def update_users_me(
     
     session.add(current_user)
     session.commit()
+    auth_cache.invalidate_user(current_user.user_id)
     session.refresh(current_user)
     return current_user
 
@@ -48,8 +51,10 @@ async def delete_users_me(
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
+    user_id = current_user.user_id
     session.delete(current_user)
     session.commit()
+    auth_cache.invalidate_user(user_id)
     return None
 
 @router.post("/admin/users/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
@@ -87,7 +92,7 @@ async def create_user_admin(
     user_create.password=password
     
 
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
 
     db_user = User(
         email=user_create.email,
@@ -107,7 +112,8 @@ async def create_user_admin(
 
 @router.get("/admin/users/", response_model=List[UserRead])
 async def list_users_admin(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
     role: Optional[UserRole] = Query(None),
     search: Optional[str] = Query(None),
@@ -127,9 +133,10 @@ async def list_users_admin(
         )
         query = query.where(search_filter)
     
-    query = query.offset(skip).limit(limit)
-    
-    users = session.exec(query).all()
+    users, next_cursor = paginate(
+        session, query, User.created_at, User.user_id, cursor, limit
+    )
+    set_next_cursor(response, next_cursor)
     return users
 
 @router.get("/admin/users/{user_id}", response_model=UserRead)
@@ -167,6 +174,7 @@ async def update_user_admin(
     
     session.add(user)
     session.commit()
+    auth_cache.invalidate_user(user_id)
     session.refresh(user)
     return user
 
@@ -191,6 +199,7 @@ async def delete_user_admin(
     
     session.delete(user)
     session.commit()
+    auth_cache.invalidate_user(user_id)
     return None
 
 
@@ -1,6 +1,10 @@
 # src/routes/utils/auth.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from functools import partial
+from typing import Optional, Dict, Any, Callable, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -12,6 +16,7 @@ import os
 
 from ...model.models import User, UserRole
 from ...routes.utils.database import get_session
+from ...routes.utils.auth_cache import auth_cache
 
 # Load environment variables
 load_dotenv()
@@ -20,12 +25,22 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY") or os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM") or os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+# Hashes below BCRYPT_ROUNDS are upgraded transparently on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
 if not SECRET_KEY:
     raise ValueError("JWT_SECRET_KEY environment variable is not set.")
 
 # Try to use bcrypt, fallback to sha256_crypt if there are compatibility issues
 try:
-    pwd_context = CryptContext(schemes=["bcrypt", "sha256_crypt"], deprecated="auto")
+    pwd_context = CryptContext(
+        schemes=["bcrypt", "sha256_crypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+    )
 except Exception:
     # Fallback to sha256_crypt if bcrypt has issues
     pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
@@ -38,6 +53,66 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+class PasswordHashExecutor:
+    """
+    Runs bcrypt off the event loop on a fixed-size thread pool.
+
+    bcrypt releases the GIL, so the workers hash in parallel while the loop
+    keeps serving requests. Admission is capped at max_pending jobs (running
+    plus queued); beyond that callers get a 503 with Retry-After instead of
+    piling up behind a login storm.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+
+    async def run(self, func: Callable, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "rejected": self.rejected,
+            }
+
+
+# Create global instance
+password_hash_executor = PasswordHashExecutor()
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_executor.run(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_executor.run(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, returning a replacement hash when the stored one is outdated"""
+    return await password_hash_executor.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 # --- JWT Token Functions ---
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -54,30 +129,43 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     return encoded_jwt
 
 # --- Dependency for Current Authenticated User ---
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security), 
-    session: Session = Depends(get_session)
-) -> User:
+def authenticate_token(token: str, session: Session) -> User:
+    """Resolve a bearer token to its user; shared by HTTP and WebSocket auth"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]) # type: ignore
-        user_id: str = payload.get("sub") # type: ignore # 'sub' is standard for subject (user ID)
-        if user_id is None:
+    user_id = auth_cache.get_token_user_id(token)
+    if user_id is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]) # type: ignore
+            user_id: str = payload.get("sub") # type: ignore # 'sub' is standard for subject (user ID)
+            if user_id is None:
+                raise credentials_exception
+            # Convert back to int for database lookup
+            user_id = int(user_id) # type: ignore
+        except (JWTError, ValueError):
             raise credentials_exception
-        # Convert back to int for database lookup
-        user_id = int(user_id) # type: ignore
-    except (JWTError, ValueError):
-        raise credentials_exception
+        auth_cache.put_token(token, user_id, payload.get("exp")) # type: ignore
+
+    # Fast path: cached row re-attached to this session, no DB round trip
+    user = auth_cache.get_user(user_id, session) # type: ignore
+    if user is not None:
+        return user
 
     user = session.get(User, user_id)
     if user is None:
         raise credentials_exception
+    auth_cache.put_user(user)
     return user
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security), 
+    session: Session = Depends(get_session)
+) -> User:
+    return authenticate_token(credentials.credentials, session)
+
 # --- Dependencies for Role-Based Access Control (RBAC) ---
 async def get_current_active_admin(current_user: User = Depends(get_current_user)) -> User:
     # Debug: Print the actual role values for troubleshooting
@@ -0,0 +1,90 @@
+# src/routes/utils/auth_cache.py
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+
+from ...model.models import User
+
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 60))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+
+
+class AuthCache:
+    """
+    Short-TTL cache for the get_current_user fast path.
+
+    Verified tokens map to their user id so repeat requests skip jwt.decode,
+    and user rows are kept as plain column snapshots keyed by user id so the
+    per-request session.get() can be skipped. Writes to a user row in this
+    process must call invalidate_user(); other workers converge within the TTL.
+    """
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: int = AUTH_CACHE_TTL):
+        self._lock = threading.Lock()
+        self._tokens: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._users: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._columns = [attr.key for attr in inspect(User).column_attrs]
+
+    # --- Tokens ---
+    def get_token_user_id(self, token: str) -> Optional[int]:
+        with self._lock:
+            entry = self._tokens.get(token)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        # Never serve a token past its own exp, even if the TTL has not lapsed
+        if expires_at is not None and expires_at <= time.time():
+            with self._lock:
+                self._tokens.pop(token, None)
+            return None
+        return user_id
+
+    def put_token(self, token: str, user_id: int, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._tokens[token] = (user_id, expires_at)
+
+    # --- Users ---
+    def get_user(self, user_id: int, session: Session) -> Optional[User]:
+        """Rebuild a cached user as a persistent instance of the given session"""
+        with self._lock:
+            snapshot = self._users.get(user_id)
+        if snapshot is None:
+            return None
+
+        # Already loaded in this session (e.g. a second dependency) - reuse it
+        existing = session.identity_map.get(session.identity_key(User, user_id))
+        if existing is not None:
+            return existing # type: ignore
+
+        user = User(**snapshot)
+        # Treat the attributes as freshly loaded so later edits flush as UPDATEs
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+    def put_user(self, user: User) -> None:
+        snapshot: Dict[str, Any] = {key: getattr(user, key) for key in self._columns}
+        with self._lock:
+            self._users[user.user_id] = snapshot
+
+    # --- Invalidation ---
+    def invalidate_user(self, user_id: Optional[int]) -> None:
+        if user_id is None:
+            return
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+
+
+# Create global instance
+auth_cache = AuthCache()
@@ -0,0 +1,132 @@
+# src/routes/utils/conversation_cache.py
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", 10))
+CHAT_WINDOW_MAX_SESSIONS = int(os.getenv("CHAT_WINDOW_MAX_SESSIONS", 5000))
+CHAT_WINDOW_MAX_BYTES = int(os.getenv("CHAT_WINDOW_MAX_BYTES", 64 * 1024 * 1024))
+CHAT_WINDOW_IDLE_SECONDS = int(os.getenv("CHAT_WINDOW_IDLE_SECONDS", 1800))
+
+
+class _Window:
+    __slots__ = ("messages", "version", "size", "last_access")
+
+    def __init__(self, window: int, version: Optional[datetime]):
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=window)
+        self.version = version
+        self.size = 0
+        self.last_access = time.monotonic()
+
+
+class ConversationWindowCache:
+    """
+    Per-session ring buffer of the most recent chat messages.
+
+    Entries are versioned by ChatSession.updated_at, which every chat turn
+    bumps and which the handler has already loaded. If another worker handled
+    a turn in between (or this worker restarted) the versions differ and the
+    caller falls back to the DB. Memory is capped by session count and by
+    total content size, evicting least recently used sessions first; sessions
+    idle longer than idle_seconds are dropped as well.
+    """
+
+    def __init__(self, window: int = CHAT_HISTORY_WINDOW, max_sessions: int = CHAT_WINDOW_MAX_SESSIONS,
+                 max_bytes: int = CHAT_WINDOW_MAX_BYTES, idle_seconds: int = CHAT_WINDOW_IDLE_SECONDS):
+        self.window = window
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[int, _Window]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: int, version: Optional[datetime]) -> Optional[List[Dict[str, Any]]]:
+        """Recent messages oldest first, or None if missing or stale"""
+        with self._lock:
+            self._evict_idle()
+            entry = self._sessions.get(session_id)
+            if entry is None or entry.version != version:
+                if entry is not None:
+                    self._drop(session_id)
+                self.misses += 1
+                return None
+            entry.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return list(entry.messages)
+
+    def load(self, session_id: int, version: Optional[datetime], messages: Iterable[Dict[str, Any]]) -> None:
+        """Seed a session's window from the DB (messages oldest first)"""
+        with self._lock:
+            self._drop(session_id)
+            entry = _Window(self.window, version)
+            self._sessions[session_id] = entry
+            for message in messages:
+                self._push(entry, message)
+            self._enforce_limits()
+
+    def append(self, session_id: int, role: str, content: str, version: Optional[datetime] = None,
+               message_id: Optional[int] = None) -> None:
+        """
+        Record a message written by this worker. Only sessions already cached
+        are updated; a partial window must never be mistaken for the history.
+        Pass version when the write also bumped ChatSession.updated_at.
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            self._push(entry, {"role": role, "content": content, "message_id": message_id})
+            if version is not None:
+                entry.version = version
+            entry.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._enforce_limits()
+
+    def invalidate(self, session_id: int) -> None:
+        with self._lock:
+            self._drop(session_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"sessions": len(self._sessions), "bytes": self._bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+    # --- Internals (caller holds the lock) ---
+    def _push(self, entry: _Window, message: Dict[str, Any]) -> None:
+        if len(entry.messages) == entry.messages.maxlen:
+            evicted = entry.messages[0]
+            entry.size -= len(evicted["content"])
+            self._bytes -= len(evicted["content"])
+        entry.messages.append(message)
+        entry.size += len(message["content"])
+        self._bytes += len(message["content"])
+
+    def _drop(self, session_id: int) -> None:
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict_idle(self) -> None:
+        # Sessions are kept in access order, so idle ones sit at the front
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if entry.last_access >= cutoff:
+                break
+            self._drop(session_id)
+
+    def _enforce_limits(self) -> None:
+        self._evict_idle()
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._sessions)))
+
+
+# Create global instance
+conversation_cache = ConversationWindowCache()
@@ -1,34 +1,213 @@
 import os
+import time
+import queue
+import random
+import logging
 import smtplib
+import threading
 from email.mime.text import MIMEText
-from fastapi import HTTPException,status
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from .helpers import generate_8_digit_password
 
 
 load_dotenv()
 
-
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 smtp_server = os.getenv("SMTP_SERVER")
 smtp_port = os.getenv("SMTP_PORT")
 smtp_user = os.getenv("SMTP_USER")
 smtp_password=os.getenv("SMTP_PASSWORD")
-def send_email(recipient_email: str,data) -> str:
-    try:
-        subject = data['subject']
-        body =data['body']
-
-        msg = MIMEText(body)
-        msg["Subject"] = subject
-        msg["From"] = smtp_user
-        msg["To"] = recipient_email
-        print(recipient_email,smtp_password)
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.sendmail(smtp_user, recipient_email, msg.as_string())
+smtp_starttls = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", 2))
+EMAIL_QUEUE_SIZE = int(os.getenv("EMAIL_QUEUE_SIZE", 1000))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", 5))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 1))
+# Servers drop idle sessions; reconnect rather than discover it mid-send
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 60))
+
+
+class EmailJob:
+    def __init__(self, recipient: str, subject: str, body: str):
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.attempts = 0
+
+
+class EmailQueue:
+    """
+    Outbound mail queue drained by background worker threads.
+
+    Each worker keeps one authenticated SMTP connection open and reuses it
+    across messages, so STARTTLS and login happen once per connection rather
+    than once per email. Transient failures are retried with exponential
+    backoff and jitter; permanent (5xx) rejections are dropped and logged.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = smtp_server,
+        port: Optional[str] = smtp_port,
+        user: Optional[str] = smtp_user,
+        password: Optional[str] = smtp_password,
+        starttls: bool = smtp_starttls,
+        workers: int = EMAIL_WORKERS,
+        max_queue: int = EMAIL_QUEUE_SIZE,
+        max_retries: int = EMAIL_MAX_RETRIES,
+        retry_base_seconds: float = EMAIL_RETRY_BASE_SECONDS,
+    ):
+        self.host = host
+        self.port = int(port) if port else 587
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self._queue: "queue.Queue[Optional[EmailJob]]" = queue.Queue(maxsize=max_queue)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "sent": 0, "retried": 0, "failed": 0, "dropped": 0, "connections": 0}
+
+    # --- Lifecycle ---
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"email-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Email queue started with {self.workers} workers")
+
+    def stop(self, timeout: float = 10) -> None:
+        """Let queued mail drain, then shut the workers down"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    # --- Producer side ---
+    def enqueue(self, recipient: str, subject: str, body: str) -> bool:
+        """Queue a message without blocking; False when the queue is full"""
+        self.start()
+        try:
+            self._queue.put_nowait(EmailJob(recipient, subject, body))
+        except queue.Full:
+            self._bump("dropped")
+            logger.error(f"Email queue full, dropping message to {recipient}")
+            return False
+        self._bump("queued")
         return True
-    except Exception as e:
-       return False
 
+    def join(self) -> None:
+        """Block until every queued message has been sent or given up on"""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, pending=self._queue.qsize())
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    # --- Worker side ---
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=30) # type: ignore
+        if self.starttls:
+            conn.starttls()
+        if self.user and self.password:
+            conn.login(self.user, self.password)
+        self._bump("connections")
+        return conn
+
+    @staticmethod
+    def _close(conn: Optional[smtplib.SMTP]) -> None:
+        if conn is None:
+            return
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    def _worker(self) -> None:
+        conn: Optional[smtplib.SMTP] = None
+        last_used = 0.0
+        while True:
+            try:
+                job = self._queue.get(timeout=SMTP_IDLE_TIMEOUT)
+            except queue.Empty:
+                self._close(conn)
+                conn = None
+                continue
+
+            if job is None:
+                self._queue.task_done()
+                self._close(conn)
+                return
+
+            try:
+                while True:
+                    job.attempts += 1
+                    try:
+                        if conn is not None and time.monotonic() - last_used > SMTP_IDLE_TIMEOUT:
+                            self._close(conn)
+                            conn = None
+                        if conn is None:
+                            conn = self._connect()
+                        self._send(conn, job)
+                        last_used = time.monotonic()
+                        self._bump("sent")
+                        break
+                    except Exception as e:
+                        if _is_permanent(e):
+                            self._bump("failed")
+                            logger.error(f"Email to {job.recipient} rejected permanently: {str(e)}")
+                            break
+                        # Connection state is unknown after an error; start fresh next try
+                        self._close(conn)
+                        conn = None
+                        if job.attempts >= self.max_retries:
+                            self._bump("failed")
+                            logger.error(f"Email to {job.recipient} failed after {job.attempts} attempts: {str(e)}")
+                            break
+                        self._bump("retried")
+                        delay = self.retry_base_seconds * (2 ** (job.attempts - 1))
+                        time.sleep(delay + random.uniform(0, delay / 2))
+            finally:
+                self._queue.task_done()
+
+    def _send(self, conn: smtplib.SMTP, job: EmailJob) -> None:
+        msg = MIMEText(job.body)
+        msg["Subject"] = job.subject
+        msg["From"] = self.user or ""
+        msg["To"] = job.recipient
+        conn.sendmail(self.user or "", job.recipient, msg.as_string())
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies and refused addresses will not succeed on retry"""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPAuthenticationError)):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+# Create global instance
+email_queue = EmailQueue()
+
+
+def send_email(recipient_email: str, data) -> bool:
+    """Queue an email for background delivery; False only if it could not be queued"""
+    try:
+        return email_queue.enqueue(recipient_email, data['subject'], data['body'])
+    except Exception as e:
+        logger.error(f"Failed to queue email to {recipient_email}: {str(e)}")
+        return False
@@ -0,0 +1,147 @@
+# src/routes/utils/error_code_cache.py
+import os
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from cachetools import TTLCache
+from sqlmodel import Session, select
+
+from ...model.models import ErrorCode, ErrorCodeRead
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ERROR_CODE_CACHE_TTL = int(os.getenv("ERROR_CODE_CACHE_TTL", 600))
+ERROR_CODE_CACHE_SIZE = int(os.getenv("ERROR_CODE_CACHE_SIZE", 10000))
+
+
+class ErrorCodeCache:
+    """
+    In-process read-through cache for error code lookups.
+
+    Entries are detached ErrorCodeRead snapshots, so they can be served
+    without a DB session. Writes in this process invalidate the affected
+    keys immediately; other workers converge once the TTL expires.
+    """
+
+    def __init__(self, maxsize: int = ERROR_CODE_CACHE_SIZE, ttl: int = ERROR_CODE_CACHE_TTL):
+        self._lock = threading.Lock()
+        self._by_id: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._by_code: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Manufacturer origins are a small enum, but each bucket holds a full list
+        self._by_manufacturer: TTLCache = TTLCache(maxsize=64, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    # --- Reads ---
+    def get_by_id(self, error_code_id: int) -> Optional[ErrorCodeRead]:
+        with self._lock:
+            return self._count(self._by_id.get(error_code_id))
+
+    def get_by_code(self, code: str) -> Optional[ErrorCodeRead]:
+        with self._lock:
+            return self._count(self._by_code.get(code))
+
+    def get_manufacturer(self, manufacturer_origin: str) -> Optional[List[ErrorCodeRead]]:
+        with self._lock:
+            return self._count(self._by_manufacturer.get(_manufacturer_key(manufacturer_origin)))
+
+    def _count(self, value):
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    # --- Writes ---
+    def put(self, error_code: ErrorCode) -> ErrorCodeRead:
+        """Cache one row under its id and code, returning the snapshot"""
+        snapshot = ErrorCodeRead.model_validate(error_code)
+        with self._lock:
+            self._by_id[snapshot.error_code_id] = snapshot
+            self._by_code[snapshot.code] = snapshot
+        return snapshot
+
+    def put_manufacturer(self, manufacturer_origin: str, error_codes: Iterable[ErrorCode]) -> List[ErrorCodeRead]:
+        """Cache the full code-ordered list for one manufacturer origin"""
+        snapshots = [self.put(error_code) for error_code in error_codes]
+        # Sort in Python so in-memory keyset pagination does not depend on DB collation
+        snapshots.sort(key=lambda snapshot: (snapshot.code, snapshot.error_code_id))
+        with self._lock:
+            self._by_manufacturer[_manufacturer_key(manufacturer_origin)] = snapshots
+        return snapshots
+
+    # --- Invalidation ---
+    def invalidate(
+        self,
+        error_code_id: Optional[int] = None,
+        codes: Iterable[Optional[str]] = (),
+        manufacturers: Iterable[Optional[str]] = (),
+    ) -> None:
+        """Drop exactly the keys a write could have made stale"""
+        with self._lock:
+            if error_code_id is not None:
+                self._by_id.pop(error_code_id, None)
+            for code in codes:
+                if code is None:
+                    continue
+                snapshot = self._by_code.pop(code, None)
+                if snapshot is not None:
+                    self._by_id.pop(snapshot.error_code_id, None)
+            for manufacturer in manufacturers:
+                if manufacturer is not None:
+                    self._by_manufacturer.pop(_manufacturer_key(manufacturer), None)
+
+    def invalidate_all_manufacturers(self) -> None:
+        """Used by bulk writes that may move codes between manufacturers"""
+        with self._lock:
+            self._by_manufacturer.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._by_code.clear()
+            self._by_manufacturer.clear()
+
+    # --- Startup ---
+    def preload(self, session: Session) -> int:
+        """Warm the cache with every error code (up to the size bound)"""
+        rows = session.exec(
+            select(ErrorCode)
+            .order_by(ErrorCode.code, ErrorCode.error_code_id)
+            .limit(self._by_id.maxsize)
+        ).all()
+
+        grouped: Dict[str, List[ErrorCode]] = {}
+        for row in rows:
+            self.put(row)
+            if row.manufacturer_origin:
+                grouped.setdefault(_manufacturer_key(row.manufacturer_origin), []).append(row)
+
+        # Only publish manufacturer lists when every row fitted in the cache
+        if len(rows) < self._by_id.maxsize:
+            for manufacturer, error_codes in grouped.items():
+                self.put_manufacturer(manufacturer, error_codes)
+
+        logger.info(f"Preloaded {len(rows)} error codes into cache")
+        return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._by_id),
+                "manufacturers": len(self._by_manufacturer),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _manufacturer_key(manufacturer) -> str:
+    # Enum members and raw path strings must land on the same key
+    return getattr(manufacturer, "value", manufacturer)
+
+
+# Create global instance
+error_code_cache = ErrorCodeCache()
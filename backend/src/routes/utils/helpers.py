@@ -1,58 +1,34 @@
 # src/routes/utils/helpers.py
 from typing import Dict, Optional
 import re
-import time
 from fastapi import UploadFile
 
+from .rate_limiter import login_rate_limiter
+
 import random
 # ============================================================================
 # LOGIN ATTEMPT TRACKING
 # ============================================================================
-login_attempts = {}
-
+# Backed by a bounded sliding-window limiter; see rate_limiter.py for backends
 def is_ip_locked(ip: str) -> bool:
     """Check if IP is locked due to too many failed login attempts"""
-    if ip not in login_attempts:
-        return False
-    
-    attempt_data = login_attempts[ip]
-    if "locked_until" in attempt_data and attempt_data["locked_until"] > time.time():
-        return True
-    
-    if "locked_until" in attempt_data and attempt_data["locked_until"] <= time.time():
-        del login_attempts[ip]
-    
-    return False
+    return login_rate_limiter.is_locked(ip)
 
 def record_failed_login(ip: str):
     """Record a failed login attempt"""
-    if ip not in login_attempts:
-        login_attempts[ip] = {"count": 0, "last_attempt": time.time()}
-    
-    login_attempts[ip]["count"] += 1
-    login_attempts[ip]["last_attempt"] = time.time()
-    
-    if login_attempts[ip]["count"] >= 5:
-        login_attempts[ip]["locked_until"] = time.time() + 900  # 15 minutes
+    login_rate_limiter.record_failure(ip)
 
 def record_successful_login(ip: str):
     """Record a successful login and reset attempts"""
-    if ip in login_attempts:
-        del login_attempts[ip]
+    login_rate_limiter.reset(ip)
 
 def get_remaining_attempts(ip: str) -> int:
     """Get remaining login attempts for an IP"""
-    if ip not in login_attempts:
-        return 5
-    return max(0, 5 - login_attempts[ip]["count"])
+    return login_rate_limiter.remaining(ip)
 
 def get_lockout_time_remaining(ip: str) -> Optional[int]:
     """Get remaining lockout time in seconds"""
-    if ip not in login_attempts or "locked_until" not in login_attempts[ip]:
-        return None
-    
-    remaining = login_attempts[ip]["locked_until"] - time.time()
-    return max(0, int(remaining))
+    return login_rate_limiter.lockout_remaining(ip)
 
 # ============================================================================
 # PASSWORD VALIDATION
@@ -0,0 +1,22 @@
+# src/routes/utils/json_filters.py
+from typing import List
+
+from sqlalchemy import or_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+# ============================================================================
+# JSONB ARRAY FILTERS
+# ============================================================================
+# Both helpers only emit the @> containment operator, which is the one a
+# GIN jsonb_path_ops index can serve. "Any of" is expressed as an OR of
+# single-element containments so Postgres can BitmapOr the index scans
+# instead of falling back to ?| (not supported by jsonb_path_ops).
+
+def json_array_contains_all(column, values: List[str]):
+    """Match rows whose JSONB array contains every value"""
+    return type_coerce(column, JSONB).contains(list(values))
+
+
+def json_array_contains_any(column, values: List[str]):
+    """Match rows whose JSONB array contains at least one value"""
+    return or_(*[type_coerce(column, JSONB).contains([value]) for value in values])
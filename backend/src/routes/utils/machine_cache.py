@@ -0,0 +1,68 @@
+# src/routes/utils/machine_cache.py
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from cachetools import TTLCache
+from sqlmodel import Session, select
+
+from ...model.models import Machine
+
+MACHINE_CACHE_TTL = int(os.getenv("MACHINE_CACHE_TTL", 600))
+MACHINE_CACHE_SIZE = int(os.getenv("MACHINE_CACHE_SIZE", 10000))
+
+# (model, type)
+MachineScope = Tuple[Optional[str], Optional[str]]
+
+
+class MachineScopeCache:
+    """
+    machine_id -> (model, type) for scoping chat retrieval.
+
+    Bounded LRU with a TTL: edits made in this process invalidate at once,
+    other workers converge once the TTL expires. Missing machines are not
+    cached, so a machine created later is picked up on the next lookup.
+    """
+
+    def __init__(self, maxsize: int = MACHINE_CACHE_SIZE, ttl: int = MACHINE_CACHE_TTL):
+        self._lock = threading.Lock()
+        self._scopes: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, machine_id: Optional[int], session: Session) -> Optional[MachineScope]:
+        if machine_id is None:
+            return None
+        with self._lock:
+            scope = self._scopes.get(machine_id)
+            if scope is not None:
+                self.hits += 1
+                return scope
+            self.misses += 1
+
+        # Only the two columns retrieval needs, not the whole row
+        row = session.exec(
+            select(Machine.model, Machine.type).where(Machine.machine_id == machine_id)
+        ).first()
+        if row is None:
+            return None
+        scope = (row[0], row[1])
+        with self._lock:
+            self._scopes[machine_id] = scope
+        return scope
+
+    def invalidate(self, machine_id: Optional[int]) -> None:
+        with self._lock:
+            self._scopes.pop(machine_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._scopes), "hits": self.hits, "misses": self.misses}
+
+
+# Create global instance
+machine_scope_cache = MachineScopeCache()
@@ -0,0 +1,131 @@
+# src/routes/utils/pagination.py
+import base64
+import json
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+from sqlmodel import Session
+
+# ============================================================================
+# KEYSET (CURSOR) PAGINATION
+# ============================================================================
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _encode_value(value: Any) -> Any:
+    """Tag values that JSON cannot round-trip on its own"""
+    if isinstance(value, datetime):
+        return {"t": "dt", "v": value.isoformat()}
+    if isinstance(value, date):
+        return {"t": "d", "v": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value.get("t") == "dt":
+            return datetime.fromisoformat(value["v"])
+        if value.get("t") == "d":
+            return date.fromisoformat(value["v"])
+    return value
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    """Build an opaque cursor from the last row's (sort_key, id) pair"""
+    payload = json.dumps([_encode_value(sort_value), _encode_value(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Decode a cursor produced by encode_cursor, raising 400 on garbage"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return _decode_value(sort_value), _decode_value(row_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def paginate(
+    session: Session,
+    query,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Apply keyset pagination on (sort_column, id_column) to a select() query.
+
+    Returns the page of rows and the cursor for the next page, or None when
+    this is the last page. One extra row is fetched to detect the end.
+    """
+    if cursor:
+        last_sort, last_id = decode_cursor(cursor)
+        if descending:
+            query = query.where(or_(
+                sort_column < last_sort,
+                and_(sort_column == last_sort, id_column < last_id)
+            ))
+        else:
+            query = query.where(or_(
+                sort_column > last_sort,
+                and_(sort_column == last_sort, id_column > last_id)
+            ))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = list(session.exec(query.limit(limit + 1)).all())
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(
+        getattr(last, sort_column.key),
+        getattr(last, id_column.key)
+    )
+    return rows, next_cursor
+
+
+def paginate_list(
+    rows: List[Any],
+    sort_key: str,
+    id_key: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Keyset-paginate an in-memory list already sorted ascending by (sort_key, id_key).
+
+    Cursors are interchangeable with those produced by paginate(), so cached
+    and database-backed responses can serve the same endpoint.
+    """
+    keys = [(getattr(row, sort_key), getattr(row, id_key)) for row in rows]
+    start = 0
+    if cursor:
+        start = bisect_right(keys, decode_cursor(cursor))
+
+    page = rows[start:start + limit]
+    if start + limit >= len(rows):
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(getattr(last, sort_key), getattr(last, id_key))
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the next-page cursor to clients without changing the list body"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
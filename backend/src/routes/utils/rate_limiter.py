@@ -0,0 +1,275 @@
+# src/routes/utils/rate_limiter.py
+import os
+import math
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOGIN_MAX_ATTEMPTS = int(os.getenv("LOGIN_MAX_ATTEMPTS", 5))
+LOGIN_WINDOW_SECONDS = int(os.getenv("LOGIN_WINDOW_SECONDS", 900))
+LOGIN_LOCKOUT_SECONDS = int(os.getenv("LOGIN_LOCKOUT_SECONDS", 900))
+LOGIN_LIMITER_MAX_KEYS = int(os.getenv("LOGIN_LIMITER_MAX_KEYS", 100000))
+# memory | sqlite | postgres
+LOGIN_LIMITER_BACKEND = os.getenv("LOGIN_LIMITER_BACKEND", "memory").lower()
+LOGIN_LIMITER_SQLITE_PATH = os.getenv("LOGIN_LIMITER_SQLITE_PATH", "/tmp/mst_login_limits.db")
+
+# (window_start, current_count, previous_count, locked_until)
+WindowState = Tuple[float, float, float, float]
+
+
+# ============================================================================
+# STORAGE BACKENDS
+# ============================================================================
+class RateLimitBackend(ABC):
+    """Key -> WindowState storage. update() must be atomic per key."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[WindowState]:
+        ...
+
+    @abstractmethod
+    def update(self, key: str, func: Callable[[Optional[WindowState]], WindowState]) -> WindowState:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process backend with a hard key cap and LRU eviction"""
+
+    def __init__(self, max_keys: int = LOGIN_LIMITER_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._states: "OrderedDict[str, WindowState]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[WindowState]:
+        with self._lock:
+            return self._states.get(key)
+
+    def update(self, key: str, func: Callable[[Optional[WindowState]], WindowState]) -> WindowState:
+        with self._lock:
+            state = func(self._states.get(key))
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+            return state
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._states.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+class SQLRateLimitBackend(RateLimitBackend):
+    """
+    Shared backend so every worker enforces the same limit.
+
+    Uses a SQLite file (one host) or a Postgres UNLOGGED table (no WAL
+    traffic; contents are disposable). Each update is one short transaction
+    that locks just the key's row. Stale rows are swept every
+    sweep_every writes, and the oldest rows are trimmed past max_keys.
+    """
+
+    TABLE = "login_rate_limits"
+
+    def __init__(self, engine: Engine, max_keys: int = LOGIN_LIMITER_MAX_KEYS,
+                 ttl_seconds: int = LOGIN_WINDOW_SECONDS * 2 + LOGIN_LOCKOUT_SECONDS,
+                 sweep_every: int = 1000):
+        self.engine = engine
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self._is_postgres = engine.dialect.name == "postgresql"
+        self._create_table()
+
+    def _create_table(self) -> None:
+        unlogged = "UNLOGGED " if self._is_postgres else ""
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE {unlogged}TABLE IF NOT EXISTS {self.TABLE} ("
+                "key VARCHAR(255) PRIMARY KEY, "
+                "window_start DOUBLE PRECISION NOT NULL, "
+                "current_count DOUBLE PRECISION NOT NULL, "
+                "previous_count DOUBLE PRECISION NOT NULL, "
+                "locked_until DOUBLE PRECISION NOT NULL, "
+                "updated_at DOUBLE PRECISION NOT NULL)"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{self.TABLE}_updated_at ON {self.TABLE} (updated_at)"
+            ))
+
+    def get(self, key: str) -> Optional[WindowState]:
+        with self.engine.connect() as conn:
+            row = conn.execute(text(
+                f"SELECT window_start, current_count, previous_count, locked_until "
+                f"FROM {self.TABLE} WHERE key = :key"
+            ), {"key": key}).first()
+        return tuple(row) if row else None # type: ignore
+
+    def update(self, key: str, func: Callable[[Optional[WindowState]], WindowState]) -> WindowState:
+        now = time.time()
+        lock_clause = " FOR UPDATE" if self._is_postgres else ""
+        with self.engine.begin() as conn:
+            row = conn.execute(text(
+                f"SELECT window_start, current_count, previous_count, locked_until "
+                f"FROM {self.TABLE} WHERE key = :key{lock_clause}"
+            ), {"key": key}).first()
+            state = func(tuple(row) if row else None) # type: ignore
+            params = {
+                "key": key, "window_start": state[0], "current_count": state[1],
+                "previous_count": state[2], "locked_until": state[3], "updated_at": now,
+            }
+            # Upsert so two workers racing on a brand-new key cannot both insert
+            conn.execute(text(
+                f"INSERT INTO {self.TABLE} "
+                "(key, window_start, current_count, previous_count, locked_until, updated_at) "
+                "VALUES (:key, :window_start, :current_count, :previous_count, :locked_until, :updated_at) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "window_start = excluded.window_start, current_count = excluded.current_count, "
+                "previous_count = excluded.previous_count, locked_until = excluded.locked_until, "
+                "updated_at = excluded.updated_at"
+            ), params)
+
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.sweep(now)
+        return state
+
+    def delete(self, key: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.TABLE} WHERE key = :key"), {"key": key})
+
+    def sweep(self, now: Optional[float] = None) -> None:
+        """Drop expired rows, then the least recently updated ones beyond max_keys"""
+        now = time.time() if now is None else now
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    f"DELETE FROM {self.TABLE} WHERE updated_at < :cutoff AND locked_until < :now"
+                ), {"cutoff": now - self.ttl_seconds, "now": now})
+                total = conn.execute(text(f"SELECT COUNT(*) FROM {self.TABLE}")).scalar() or 0
+                if total > self.max_keys:
+                    conn.execute(text(
+                        f"DELETE FROM {self.TABLE} WHERE key IN ("
+                        f"SELECT key FROM {self.TABLE} ORDER BY updated_at LIMIT :excess)"
+                    ), {"excess": total - self.max_keys})
+        except Exception as e:
+            logger.warning(f"Login limiter sweep failed: {str(e)}")
+
+
+def create_sqlite_limiter_engine(path: str = LOGIN_LIMITER_SQLITE_PATH) -> Engine:
+    """SQLite engine whose transactions take the write lock up front (BEGIN IMMEDIATE)"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 5})
+
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+# ============================================================================
+# SLIDING WINDOW LIMITER
+# ============================================================================
+class SlidingWindowLimiter:
+    """
+    Sliding-window counter: failures in the current fixed window plus the
+    previous window's count weighted by how much of it still overlaps.
+    O(1) time and state per key, and no per-attempt timestamps.
+    """
+
+    def __init__(self, backend: RateLimitBackend, max_attempts: int = LOGIN_MAX_ATTEMPTS,
+                 window_seconds: int = LOGIN_WINDOW_SECONDS, lockout_seconds: int = LOGIN_LOCKOUT_SECONDS):
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+
+    def _roll(self, state: Optional[WindowState], now: float) -> WindowState:
+        if state is None:
+            return (now, 0, 0, 0)
+        window_start, current, previous, locked_until = state
+        elapsed_windows = int((now - window_start) // self.window_seconds)
+        if elapsed_windows == 1:
+            return (window_start + self.window_seconds, 0, current, locked_until)
+        if elapsed_windows > 1:
+            return (window_start + elapsed_windows * self.window_seconds, 0, 0, locked_until)
+        return state
+
+    def _estimate(self, state: WindowState, now: float) -> float:
+        window_start, current, previous, _ = state
+        overlap = 1 - (now - window_start) / self.window_seconds
+        return current + previous * max(0.0, overlap)
+
+    def is_locked(self, key: str, now: Optional[float] = None) -> bool:
+        return self.lockout_remaining(key, now) is not None
+
+    def lockout_remaining(self, key: str, now: Optional[float] = None) -> Optional[int]:
+        now = time.time() if now is None else now
+        state = self.backend.get(key)
+        if state is None or state[3] <= now:
+            return None
+        return max(0, int(state[3] - now))
+
+    def remaining(self, key: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        state = self.backend.get(key)
+        if state is None:
+            return self.max_attempts
+        if state[3] > now:
+            return 0
+        used = math.ceil(self._estimate(self._roll(state, now), now) - 1e-9)
+        return max(0, self.max_attempts - used)
+
+    def record_failure(self, key: str, now: Optional[float] = None) -> WindowState:
+        now = time.time() if now is None else now
+
+        def apply(state: Optional[WindowState]) -> WindowState:
+            window_start, current, previous, locked_until = self._roll(state, now)
+            state = (window_start, current + 1, previous, locked_until)
+            if self._estimate(state, now) >= self.max_attempts - 1e-9:
+                # Lock and start over with a clean window once the lockout ends
+                return (now + self.lockout_seconds, 0, 0, now + self.lockout_seconds)
+            return state
+
+        return self.backend.update(key, apply)
+
+    def reset(self, key: str) -> None:
+        self.backend.delete(key)
+
+
+def create_login_limiter() -> SlidingWindowLimiter:
+    """Build the limiter for LOGIN_LIMITER_BACKEND, falling back to memory"""
+    try:
+        if LOGIN_LIMITER_BACKEND == "sqlite":
+            return SlidingWindowLimiter(SQLRateLimitBackend(create_sqlite_limiter_engine()))
+        if LOGIN_LIMITER_BACKEND == "postgres":
+            from .database import engine
+            return SlidingWindowLimiter(SQLRateLimitBackend(engine))
+    except Exception as e:
+        logger.error(f"Shared login limiter unavailable, using in-process limiter: {str(e)}")
+    return SlidingWindowLimiter(MemoryRateLimitBackend())
+
+
+# Create global instance
+login_rate_limiter = create_login_limiter()
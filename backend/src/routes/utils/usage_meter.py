@@ -0,0 +1,216 @@
+# src/routes/utils/usage_meter.py
+import os
+import json
+import logging
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlmodel import Session, select, func
+
+from ...model.models import TokenBudget, TokenUsage, TokenUsageDaily, UsageScope
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOKEN_BUDGET_CACHE_TTL = int(os.getenv("TOKEN_BUDGET_CACHE_TTL", 60))
+# USD per million (prompt, completion) tokens; override with LLM_PRICING_JSON
+DEFAULT_LLM_PRICING: Dict[str, Tuple[float, float]] = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+LLM_PRICING: Dict[str, Tuple[float, float]] = {
+    **DEFAULT_LLM_PRICING,
+    **{model: tuple(prices) for model, prices in json.loads(os.getenv("LLM_PRICING_JSON", "{}")).items()},
+}
+# Canned responses produced without calling the provider
+UNMETERED_MODELS = {"fallback-model", "rag-fallback", "error-fallback"}
+
+_DAILY_COUNTERS = ("request_count", "prompt_tokens", "completion_tokens", "total_tokens", "cost_usd")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+class UsageMeter:
+    """
+    Token metering for LLM calls.
+
+    Every metered call adds one TokenUsage ledger row and bumps the matching
+    TokenUsageDaily rows for the user and their company, in the caller's
+    transaction. Quota and cost questions then read at most one rollup row
+    per day and model instead of parsing chat message metadata.
+    """
+
+    def __init__(self, budget_ttl: int = TOKEN_BUDGET_CACHE_TTL):
+        self._lock = threading.Lock()
+        self._budgets: TTLCache = TTLCache(maxsize=10000, ttl=budget_ttl)
+
+    # --- Writes ---
+    def record(
+        self,
+        db: Session,
+        user_id: int,
+        company_name: Optional[str],
+        model: Optional[str],
+        usage: Optional[Dict[str, Any]],
+        purpose: str = "chat",
+        session_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        when: Optional[datetime] = None,
+    ) -> Optional[TokenUsage]:
+        """Add a ledger row and update the rollups; the caller commits"""
+        if not usage or not model or model in UNMETERED_MODELS:
+            return None
+        when = when or datetime.utcnow()
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        total_tokens = int(usage.get("total_tokens") or prompt_tokens + completion_tokens)
+        entry = TokenUsage(
+            user_id=user_id,
+            company_name=company_name,
+            session_id=session_id,
+            message_id=message_id,
+            purpose=purpose,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            cost_usd=self.cost(model, prompt_tokens, completion_tokens),
+            created_at=when,
+        )
+        db.add(entry)
+
+        counters = {
+            "request_count": 1, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens, "cost_usd": entry.cost_usd,
+        }
+        self._bump_daily(db, UsageScope.USER, str(user_id), when.date(), model, counters)
+        if company_name:
+            self._bump_daily(db, UsageScope.COMPANY, company_name, when.date(), model, counters)
+        return entry
+
+    @staticmethod
+    def cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_price, completion_price = LLM_PRICING.get(model, (0.0, 0.0))
+        return round((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000, 8)
+
+    def _bump_daily(self, db: Session, scope: UsageScope, scope_key: str, day: date, model: str,
+                    counters: Dict[str, Any]) -> None:
+        table = TokenUsageDaily.__table__ # type: ignore
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            # Single-statement upsert: concurrent turns add to the same row safely
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(table).values(scope=scope.value, scope_key=scope_key, day=day, model=model, **counters)
+            db.exec(stmt.on_conflict_do_update( # type: ignore
+                index_elements=["scope", "scope_key", "day", "model"],
+                set_={name: table.c[name] + stmt.excluded[name] for name in _DAILY_COUNTERS}
+            ))
+            return
+
+        row = db.exec(
+            select(TokenUsageDaily)
+            .where(TokenUsageDaily.scope == scope.value, TokenUsageDaily.scope_key == scope_key)
+            .where(TokenUsageDaily.day == day, TokenUsageDaily.model == model)
+            .with_for_update()
+        ).first()
+        if row is None:
+            db.exec(insert(table).values(scope=scope.value, scope_key=scope_key, day=day, model=model, **counters)) # type: ignore
+            return
+        for name in _DAILY_COUNTERS:
+            setattr(row, name, getattr(row, name) + counters[name])
+        db.add(row)
+
+    # --- Reads ---
+    def daily(self, db: Session, scope: UsageScope, scope_key: str, start: date, end: date) -> List[TokenUsageDaily]:
+        return list(db.exec(
+            select(TokenUsageDaily)
+            .where(TokenUsageDaily.scope == scope.value, TokenUsageDaily.scope_key == scope_key)
+            .where(TokenUsageDaily.day >= start, TokenUsageDaily.day <= end)
+            .order_by(TokenUsageDaily.day, TokenUsageDaily.model)
+        ).all())
+
+    def totals(self, db: Session, scope: UsageScope, scope_key: str, start: date, end: date) -> Dict[str, Any]:
+        """Totals and a per-model breakdown over [start, end], from the rollups"""
+        rows = db.exec(
+            select(
+                TokenUsageDaily.model,
+                *[func.coalesce(func.sum(getattr(TokenUsageDaily, name)), 0) for name in _DAILY_COUNTERS]
+            )
+            .where(TokenUsageDaily.scope == scope.value, TokenUsageDaily.scope_key == scope_key)
+            .where(TokenUsageDaily.day >= start, TokenUsageDaily.day <= end)
+            .group_by(TokenUsageDaily.model)
+            .order_by(TokenUsageDaily.model)
+        ).all()
+        by_model = [dict(zip(("model",) + _DAILY_COUNTERS, row)) for row in rows]
+        summary: Dict[str, Any] = {
+            name: sum(item[name] for item in by_model) for name in _DAILY_COUNTERS
+        }
+        summary["cost_usd"] = round(summary["cost_usd"], 8)
+        summary["by_model"] = by_model
+        return summary
+
+    # --- Budgets ---
+    def get_budget(self, db: Session, scope: UsageScope, scope_key: str) -> Optional[Tuple[Optional[int], Optional[float]]]:
+        """(monthly_token_limit, monthly_cost_limit), or None when there is no budget"""
+        key = (scope.value, scope_key)
+        with self._lock:
+            if key in self._budgets:
+                return self._budgets[key]
+        budget = db.exec(
+            select(TokenBudget).where(TokenBudget.scope == scope.value, TokenBudget.scope_key == scope_key)
+        ).first()
+        limits = (budget.monthly_token_limit, budget.monthly_cost_limit) if budget else None
+        with self._lock:
+            self._budgets[key] = limits
+        return limits
+
+    def invalidate_budget(self, scope: UsageScope, scope_key: str) -> None:
+        with self._lock:
+            self._budgets.pop((scope.value, scope_key), None)
+
+    def budget_status(self, db: Session, scope: UsageScope, scope_key: str,
+                      today: Optional[date] = None) -> Dict[str, Any]:
+        today = today or datetime.utcnow().date()
+        limits = self.get_budget(db, scope, scope_key)
+        token_limit, cost_limit = limits or (None, None)
+        month = self.totals(db, scope, scope_key, month_start(today), today)
+        exceeded = (
+            (token_limit is not None and month["total_tokens"] >= token_limit)
+            or (cost_limit is not None and month["cost_usd"] >= cost_limit)
+        )
+        return {
+            "scope": scope,
+            "scope_key": scope_key,
+            "monthly_token_limit": token_limit,
+            "monthly_cost_limit": cost_limit,
+            "month_tokens": month["total_tokens"],
+            "month_cost_usd": month["cost_usd"],
+            "exceeded": bool(exceeded),
+        }
+
+    def check_budget(self, db: Session, user_id: int, company_name: Optional[str],
+                     today: Optional[date] = None) -> None:
+        """Raise 429 if the user's or company's monthly budget is used up"""
+        for scope, scope_key in ((UsageScope.USER, str(user_id)), (UsageScope.COMPANY, company_name)):
+            # Budget lookups are cached, so unbudgeted scopes cost no query
+            if not scope_key or self.get_budget(db, scope, scope_key) is None:
+                continue
+            if self.budget_status(db, scope, scope_key, today)["exceeded"]:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Monthly AI token budget exceeded for this {scope.value}"
+                )
+
+
+# Create global instance
+usage_meter = UsageMeter()
@@ -43,7 +43,8 @@ class AutomationService:
                 "machine_type": metadata.get("applies_to_models", ["general"]),
                 "source": "knowledge_base_upload",
                 "uploader_id": metadata.get("uploader_id"),
-                "kb_id": metadata.get("kb_id")
+                "kb_id": metadata.get("kb_id"),
+                "document_id": metadata.get("document_id")
             }
             
             # Add to RAG system in background
@@ -74,7 +75,9 @@ class AutomationService:
                 title=metadata["title"],
                 document_type=metadata["document_type"],
                 machine_type=metadata["machine_type"][0] if metadata["machine_type"] else "general",
-                use_smart_chunking=True
+                use_smart_chunking=True,
+                kb_id=metadata.get("kb_id"),
+                document_id=metadata.get("document_id")
             )
             
             logger.info(f"Successfully added document to RAG system: {metadata['title']}")
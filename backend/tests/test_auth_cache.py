@@ -0,0 +1,64 @@
+"""
+Tests for the cached get_current_user fast path.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from src.main import app
+from src.model.models import User, UserRole
+from src.routes.utils.auth import create_access_token
+from src.routes.utils.auth_cache import auth_cache
+from src.routes.utils.database import get_session
+
+
+@pytest.fixture
+def auth_client():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(user_id=1, email="tech@example.com", password_hash="x",
+                         full_name="Tech", role=UserRole.TECHNICIAN))
+        session.commit()
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    auth_cache.clear()
+    app.dependency_overrides[get_session] = override_session
+    token = create_access_token({"sub": 1, "role": UserRole.TECHNICIAN})
+    with TestClient(app, headers={"Authorization": f"Bearer {token}"}) as test_client:
+        yield test_client, statements
+    app.dependency_overrides.clear()
+    auth_cache.clear()
+
+
+class TestAuthCache:
+    """Repeat requests skip the user lookup until the row is written."""
+
+    def test_second_request_does_not_query_users(self, auth_client):
+        client, statements = auth_client
+
+        assert client.get("/users/me/").status_code == 200
+        statements.clear()
+        assert client.get("/users/me/").status_code == 200
+
+        assert not any("FROM users" in statement for statement in statements)
+
+    def test_update_me_invalidates_cached_row(self, auth_client):
+        client, _ = auth_client
+        assert client.get("/users/me/").json()["full_name"] == "Tech"
+
+        response = client.put("/users/me/", json={"full_name": "Lead Tech"})
+
+        assert response.status_code == 200
+        assert client.get("/users/me/").json()["full_name"] == "Lead Tech"
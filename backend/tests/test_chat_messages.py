@@ -0,0 +1,116 @@
+"""
+Tests for incremental chat message paging.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.main import app
+from src.model.models import ChatMessage, ChatSession, MessageRole, User, UserRole
+from src.routes.utils.auth import get_current_user
+from src.routes.utils.database import get_session
+
+
+@pytest.fixture
+def chat_client():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    user = User(user_id=1, email="tech@example.com", password_hash="x",
+                full_name="Tech", role=UserRole.TECHNICIAN)
+    session.add(user)
+    session.add(ChatSession(session_id=1, user_id=1, title="Spindle"))
+    start = datetime(2026, 1, 1)
+    for i in range(5):
+        session.add(ChatMessage(message_id=i + 1, session_id=1, role=MessageRole.USER,
+                                content=f"m{i + 1}", timestamp=start + timedelta(seconds=i)))
+    session.commit()
+
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    with TestClient(app) as test_client:
+        yield test_client, session
+    app.dependency_overrides.clear()
+    session.close()
+
+
+class TestSessionMessages:
+    """before/after cursors, page size and ETag polling."""
+
+    def test_latest_page_then_older_history(self, chat_client):
+        client, _ = chat_client
+
+        latest = client.get("/chat/sessions/1/messages/?limit=2")
+        older = client.get("/chat/sessions/1/messages/?limit=2&before=4")
+
+        assert [m["content"] for m in latest.json()] == ["m4", "m5"]
+        assert latest.headers["X-Has-More"] == "true"
+        assert [m["content"] for m in older.json()] == ["m2", "m3"]
+
+    def test_after_returns_only_new_messages_and_etag_short_circuits(self, chat_client):
+        client, session = chat_client
+
+        first = client.get("/chat/sessions/1/messages/?after=3")
+        assert [m["content"] for m in first.json()] == ["m4", "m5"]
+        assert first.headers["X-Has-More"] == "false"
+
+        # A tag only vouches for the page it came from
+        assert client.get("/chat/sessions/1/messages/?after=5",
+                          headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+        etag = client.get("/chat/sessions/1/messages/?after=5").headers["ETag"]
+        assert client.get("/chat/sessions/1/messages/?after=5",
+                          headers={"If-None-Match": etag}).status_code == 304
+
+        session.add(ChatMessage(session_id=1, role=MessageRole.ASSISTANT, content="m6",
+                                timestamp=datetime(2026, 1, 2)))
+        session.commit()
+        fresh = client.get("/chat/sessions/1/messages/?after=5", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert [m["content"] for m in fresh.json()] == ["m6"]
+
+
+class TestSessionList:
+    """Session pages stay stable while sessions receive messages."""
+
+    def test_activity_during_scrolling_does_not_reshuffle_pages(self, chat_client):
+        client, session = chat_client
+        start = datetime(2026, 1, 1)
+        session.get(ChatSession, 1).created_at = start
+        for session_id in range(2, 6):
+            session.add(ChatSession(session_id=session_id, user_id=1, title=f"S{session_id}",
+                                    created_at=start + timedelta(hours=session_id)))
+        session.commit()
+
+        first = client.get("/chat/sessions/?limit=2")
+        # The oldest session gets a message, which bumps its updated_at
+        oldest = session.get(ChatSession, 1)
+        oldest.updated_at = datetime(2027, 1, 1)
+        session.add(oldest)
+        session.commit()
+        rest = client.get(f"/chat/sessions/?limit=10&cursor={first.headers['X-Next-Cursor']}")
+
+        seen = [s["session_id"] for s in first.json() + rest.json()]
+        assert seen == [5, 4, 3, 2, 1]
+
+
+class TestChatTurn:
+    """A chat turn writes everything in one transaction."""
+
+    def test_turn_commits_once_and_persists_both_messages(self, chat_client):
+        client, session = chat_client
+        commits = []
+        event.listen(session.get_bind(), "commit", lambda conn: commits.append(conn))
+
+        response = client.post("/chat/ai/chat", json={"message": "Coolant pump noisy", "session_id": 1})
+
+        assert response.status_code == 200
+        assert len(commits) == 1
+        messages = client.get("/chat/sessions/1/messages/?after=5").json()
+        assert [m["role"] for m in messages] == ["user", "assistant"]
+        assert messages[1]["message_id"] == response.json()["message_id"]
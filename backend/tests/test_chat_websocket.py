@@ -0,0 +1,110 @@
+"""
+Tests for the streaming WebSocket chat channel.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+from starlette.websockets import WebSocketDisconnect
+
+from src.main import app
+from src.model.models import ChatMessage, ChatSession, MessageRole, User, UserRole
+from src.rag.services.rag_service import rag_service
+from src.routes.utils.auth import create_access_token
+from src.routes.utils.auth_cache import auth_cache
+from src.routes.utils.database import get_session
+
+
+@pytest.fixture
+def ws_client():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    session.add(User(user_id=1, email="tech@example.com", password_hash="x",
+                     full_name="Tech", role=UserRole.TECHNICIAN))
+    session.add(ChatSession(session_id=1, user_id=1, title="Spindle"))
+    session.commit()
+
+    auth_cache.clear()
+    app.dependency_overrides[get_session] = lambda: session
+    with TestClient(app) as test_client:
+        yield test_client, session
+    app.dependency_overrides.clear()
+    auth_cache.clear()
+    session.close()
+
+
+def _connect(client, token=None):
+    websocket = client.websocket_connect("/chat/ws/1").__enter__()
+    websocket.send_json({"type": "auth", "token": token or create_access_token({"sub": 1})})
+    return websocket
+
+
+def _messages(session):
+    session.expire_all()
+    return session.exec(select(ChatMessage).order_by(ChatMessage.message_id)).all()
+
+
+class TestChatWebSocket:
+    """Auth handshake, token streaming and cancellation."""
+
+    def test_rejects_bad_token(self, ws_client):
+        client, _ = ws_client
+        websocket = _connect(client, token="not-a-jwt")
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+        assert closed.value.code == 1008
+
+    def test_streams_tokens_then_persists_turn(self, ws_client, monkeypatch):
+        client, session = ws_client
+
+        async def fake_stream(**kwargs):
+            for piece in ["Check ", "the ", "belt."]:
+                yield {"type": "token", "content": piece}
+            yield {"type": "final", "response": "Check the belt.", "model": "m",
+                   "usage": {"total_tokens": 3}, "confidence": 0.9, "sources": []}
+
+        monkeypatch.setattr(rag_service, "stream_rag_response", fake_stream)
+        websocket = _connect(client)
+        assert websocket.receive_json() == {"type": "ready", "session_id": 1}
+
+        websocket.send_json({"type": "message", "content": "Spindle squeals"})
+        tokens = [websocket.receive_json() for _ in range(3)]
+        done = websocket.receive_json()
+        websocket.close()
+
+        assert "".join(event["content"] for event in tokens) == "Check the belt."
+        assert done["type"] == "done"
+        messages = _messages(session)
+        assert [(m.role, m.content) for m in messages] == [
+            (MessageRole.USER, "Spindle squeals"), (MessageRole.ASSISTANT, "Check the belt.")
+        ]
+        assert done["message_id"] == messages[1].message_id
+
+    def test_cancel_keeps_partial_answer(self, ws_client, monkeypatch):
+        client, session = ws_client
+
+        async def slow_stream(**kwargs):
+            yield {"type": "token", "content": "Start by"}
+            await asyncio.sleep(30)
+
+        monkeypatch.setattr(rag_service, "stream_rag_response", slow_stream)
+        websocket = _connect(client)
+        websocket.receive_json()
+
+        websocket.send_json({"type": "message", "content": "Axis drifts"})
+        assert websocket.receive_json()["content"] == "Start by"
+        websocket.send_json({"type": "message", "content": "Second question"})
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_json({"type": "cancel"})
+        cancelled = websocket.receive_json()
+        websocket.close()
+
+        assert cancelled["type"] == "cancelled"
+        assistant = _messages(session)[-1]
+        assert assistant.content == "Start by"
+        assert assistant.message_metadata["cancelled"] is True
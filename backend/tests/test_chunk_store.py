@@ -0,0 +1,98 @@
+"""
+Tests for the RAG chunk store.
+"""
+import asyncio
+import sys
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+from src.rag.services.chunk_store import ChunkStore, chunk_vector_id
+from src.rag.services.local_vector_index import LocalIndex
+from src.rag.services.pinecone_service import PineconeService
+from src.rag.services.rag_service import RAGService
+
+# The package re-exports the rag_service instance under the module's name
+rag_module = sys.modules["src.rag.services.rag_service"]
+
+
+def _engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestChunkStore:
+    """Chunk text lives outside vector metadata and is fetched by id in batches."""
+
+    def test_batch_fetch_uses_one_query_then_cache(self):
+        engine = _engine()
+        store = ChunkStore(engine=engine)
+        store.put_many([
+            {"vector_id": f"v{i}", "content": f"Chunk {i} " + "x" * 2000, "title": "Manual", "chunk_index": i}
+            for i in range(5)
+        ], namespace="general")
+        queries = []
+        event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+        texts = store.get_many([("general", "v0"), ("general", "v3"), ("general", "missing")])
+        assert sorted(texts) == [("general", "v0"), ("general", "v3")]
+        assert len(texts[("general", "v3")]) > 2000
+        assert len(queries) == 1
+
+        store.get_many([("general", "v0"), ("general", "v3")])
+        assert len(queries) == 1
+        assert store.stats()["hits"] == 2
+
+    def test_rewrite_and_namespace_delete(self):
+        store = ChunkStore(engine=_engine())
+        key = ("t-acme.general", "a")
+        store.put_many([{"vector_id": "a", "content": "old", "title": "T"}], namespace="t-acme.general")
+        store.get_many([key])
+        store.put_many([{"vector_id": "a", "content": "new", "title": "T"}], namespace="t-acme.general")
+        assert store.get_many([key]) == {key: "new"}
+
+        assert store.delete_namespaces(["t-acme.general"]) == 1
+        assert store.get_many([key]) == {}
+
+    def test_same_id_in_two_namespaces_is_two_chunks(self):
+        store = ChunkStore(engine=_engine())
+        for namespace in ("t-acme.general", "t-globex.general"):
+            store.put_many([{"vector_id": "a", "content": f"{namespace} text", "title": "T", "kb_id": 1}], namespace)
+
+        assert store.delete_many([("t-globex.general", "a")]) == 1
+        assert store.get_many([("t-acme.general", "a"), ("t-globex.general", "a")]) == {
+            ("t-acme.general", "a"): "t-acme.general text"
+        }
+
+    def test_vector_ids_are_short_and_scoped_to_their_owner(self):
+        text = "Check the coolant level."
+        assert chunk_vector_id("Manual", 0, text) == chunk_vector_id("Manual", 0, text)
+        assert chunk_vector_id("Manual", 0, text, "kb-1") != chunk_vector_id("Manual", 0, text, "kb-2")
+        assert len(chunk_vector_id("x" * 500, 12345, text, "kb-1")) < 64
+
+    def test_ingest_keeps_metadata_small_and_retrieval_gets_full_text(self, monkeypatch):
+        store = ChunkStore(engine=_engine())
+        monkeypatch.setattr(rag_module, "chunk_store", store)
+        index = LocalIndex(dim=4, quantization="float32")
+        service = RAGService()
+        service.pinecone_service = PineconeService(index=index)
+        service._pinecone_enabled = True
+
+        async def embed(text):
+            return [1.0, float(len(text) % 7), 0.5, 0.1]
+
+        monkeypatch.setattr(service.ai_service, "generate_embeddings", embed)
+        long_text = "Replace the spindle drawbar springs when clamping force drops. " * 20
+        monkeypatch.setattr(service.document_service, "smart_text_split",
+                            lambda text, chunk_size, chunk_overlap: [{"content": long_text}])
+
+        result = asyncio.run(service.process_document(long_text, title="Spindle manual", machine_type="cnc_mill"))
+        assert result["vectors_stored"] == 1
+        stored = index.query([1.0, 0, 0.5, 0.1], top_k=1, namespace=result["namespace"], include_metadata=True)
+        assert "chunk_text" not in stored.matches[0].metadata
+
+        context, sources = asyncio.run(service._retrieve_context("drawbar", "cnc_mill", 1, None))
+        assert long_text.strip()[-60:] in context
+        assert sources[0]["title"] == "Spindle manual"
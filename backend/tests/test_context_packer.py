@@ -0,0 +1,44 @@
+"""
+Tests for MMR context packing.
+"""
+from src.rag.services.context_packer import ContextPacker
+
+
+def _match(text, vector, score, title="Manual"):
+    return {"score": score, "values": vector, "metadata": {"chunk_text": text, "title": title}}
+
+
+class TestContextPacker:
+    """Duplicates dropped, overlaps trimmed, budget respected."""
+
+    def test_near_duplicate_revision_is_skipped(self):
+        spindle = "Check the spindle belt tension and replace worn belts before restarting. " * 2
+        coolant = "Flush the coolant tank and clean the pump strainer every month. " * 2
+        candidates = [
+            _match(spindle, [1.0, 0.0, 0.0], 0.92, "Manual rev A"),
+            _match(spindle.replace("worn", "damaged"), [0.99, 0.01, 0.0], 0.91, "Manual rev B"),
+            _match(coolant, [0.0, 1.0, 0.0], 0.80),
+        ]
+
+        packed = ContextPacker(token_budget=1000).pack(candidates, max_chunks=3)
+
+        assert [c["metadata"]["title"] for c in packed] == ["Manual rev A", "Manual"]
+
+    def test_splitter_overlap_is_trimmed(self):
+        shared = "the overlap shared by both chunks"
+        first = "Power down the machine, then remove " + shared
+        second = shared + " and inspect the ball screw for wear."
+        candidates = [_match(first, [1.0, 0.0], 0.9), _match(second, [0.0, 1.0], 0.85)]
+
+        packed = ContextPacker(token_budget=1000).pack(candidates, max_chunks=2)
+
+        assert packed[1]["text"] == " and inspect the ball screw for wear."
+
+    def test_token_budget_caps_context(self):
+        candidates = [_match(f"Procedure {i}: " + "step " * 60, [float(i == j) for j in range(5)], 0.9)
+                      for i in range(5)]
+
+        packed = ContextPacker(token_budget=200).pack(candidates, max_chunks=5)
+
+        assert 0 < len(packed) < 5
+        assert sum(len(c["text"]) // 4 for c in packed) <= 200
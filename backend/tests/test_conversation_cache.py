@@ -0,0 +1,49 @@
+"""
+Tests for the per-session conversation window cache.
+"""
+from datetime import datetime
+
+from src.routes.utils.conversation_cache import ConversationWindowCache
+
+V1 = datetime(2026, 1, 1, 9, 0, 0)
+V2 = datetime(2026, 1, 1, 9, 5, 0)
+
+
+def _msg(i):
+    return {"role": "user", "content": f"message {i}"}
+
+
+class TestConversationWindowCache:
+    """Ring buffer, version checks and memory limits."""
+
+    def test_ring_buffer_keeps_latest_messages(self):
+        cache = ConversationWindowCache(window=3)
+        cache.load(1, V1, [_msg(1), _msg(2)])
+
+        cache.append(1, "assistant", "message 3")
+        cache.append(1, "user", "message 4", version=V2)
+
+        window = cache.get(1, V2)
+        assert [m["content"] for m in window] == ["message 2", "message 3", "message 4"]
+
+    def test_stale_version_and_unknown_session_fall_back(self):
+        cache = ConversationWindowCache()
+        cache.append(7, "user", "not cached yet")
+        assert cache.get(7, V1) is None
+
+        cache.load(7, V1, [_msg(1)])
+        # Another worker handled a turn, so updated_at moved on
+        assert cache.get(7, V2) is None
+        assert cache.stats()["sessions"] == 0
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        cache = ConversationWindowCache(window=10, max_bytes=25)
+        cache.load(1, V1, [_msg(1)])
+        cache.load(2, V1, [_msg(2)])
+        cache.get(1, V1)
+
+        cache.load(3, V1, [_msg(3)])
+
+        assert cache.get(2, V1) is None
+        assert cache.get(1, V1) is not None and cache.get(3, V1) is not None
+        assert cache.stats()["bytes"] <= 25
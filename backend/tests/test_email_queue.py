@@ -0,0 +1,101 @@
+"""
+Tests for the background email queue against a local SMTP stand-in.
+"""
+import socketserver
+import threading
+
+import pytest
+
+from src.routes.utils.email_service import EmailQueue
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 stand-in ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            verb = line.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-stand-in")
+                self.reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                self.reply("235 authenticated")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 ok")
+            elif verb == "RCPT":
+                recipients.append(line.split(":", 1)[1].strip("<> "))
+                self.reply("250 ok")
+            elif verb == "DATA":
+                if server.fail_next_data > 0:
+                    server.fail_next_data -= 1
+                    self.reply("421 try again later")
+                    return
+                self.reply("354 go ahead")
+                while self.rfile.readline().decode().rstrip("\r\n") != ".":
+                    pass
+                server.delivered.extend(recipients)
+                self.reply("250 queued")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp_stand_in():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.delivered = []
+    server.fail_next_data = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _queue_for(server, **kwargs):
+    host, port = server.server_address
+    return EmailQueue(host=host, port=str(port), user="noreply@example.com", password="secret",
+                      starttls=False, retry_base_seconds=0.01, **kwargs)
+
+
+class TestEmailQueue:
+    """Connection reuse and retry with backoff."""
+
+    def test_worker_reuses_one_connection(self, smtp_stand_in):
+        email_queue = _queue_for(smtp_stand_in, workers=1)
+
+        for i in range(3):
+            assert email_queue.enqueue(f"user{i}@example.com", "Hello", "Body")
+        email_queue.join()
+        email_queue.stop()
+
+        assert smtp_stand_in.delivered == ["user0@example.com", "user1@example.com", "user2@example.com"]
+        assert smtp_stand_in.connections == 1
+        assert email_queue.stats()["sent"] == 3
+
+    def test_transient_failure_is_retried(self, smtp_stand_in):
+        smtp_stand_in.fail_next_data = 1
+        email_queue = _queue_for(smtp_stand_in, workers=1, max_retries=3)
+
+        email_queue.enqueue("tech@example.com", "OTP", "1234")
+        email_queue.join()
+        email_queue.stop()
+
+        assert smtp_stand_in.delivered == ["tech@example.com"]
+        stats = email_queue.stats()
+        assert stats["retried"] == 1 and stats["failed"] == 0
@@ -0,0 +1,55 @@
+"""
+Tests for the in-process error code cache.
+"""
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.model.models import ErrorCode
+from src.routes.utils.error_code_cache import ErrorCodeCache
+from src.routes.utils.pagination import paginate_list
+
+
+@pytest.fixture
+def seeded_session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i, origin in enumerate(["drive", "drive", "chiller", "drive"]):
+            session.add(ErrorCode(code=f"E{i}", title=f"Error {i}", manufacturer_origin=origin))
+        session.commit()
+        yield session
+
+
+class TestErrorCodeCache:
+    """Lookups by id, code and manufacturer plus precise invalidation."""
+
+    def test_preload_serves_all_indexes(self, seeded_session):
+        cache = ErrorCodeCache(maxsize=100, ttl=60)
+        assert cache.preload(seeded_session) == 4
+
+        assert cache.get_by_code("E2").manufacturer_origin == "chiller"
+        assert cache.get_by_id(1).code == "E0"
+        assert [c.code for c in cache.get_manufacturer("drive")] == ["E0", "E1", "E3"]
+
+    def test_invalidate_drops_only_affected_keys(self, seeded_session):
+        cache = ErrorCodeCache(maxsize=100, ttl=60)
+        cache.preload(seeded_session)
+
+        cache.invalidate(codes=["E0"], manufacturers=["drive"])
+
+        assert cache.get_by_code("E0") is None
+        assert cache.get_by_id(1) is None
+        assert cache.get_manufacturer("drive") is None
+        assert cache.get_by_code("E2") is not None
+        assert cache.get_manufacturer("chiller") is not None
+
+    def test_cached_manufacturer_list_paginates_with_cursors(self, seeded_session):
+        cache = ErrorCodeCache(maxsize=100, ttl=60)
+        cache.preload(seeded_session)
+        rows = cache.get_manufacturer("drive")
+
+        first, cursor = paginate_list(rows, "code", "error_code_id", limit=2)
+        second, last_cursor = paginate_list(rows, "code", "error_code_id", cursor, limit=2)
+
+        assert [c.code for c in first + second] == ["E0", "E1", "E3"]
+        assert last_cursor is None
@@ -0,0 +1,110 @@
+"""
+Tests for the streaming error code import endpoint.
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from src.main import app
+from src.model.models import ErrorCode, User, UserRole
+from src.routes.utils.auth import get_current_active_admin
+from src.routes.utils.database import get_session
+
+
+@pytest.fixture
+def import_client():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    admin = User(user_id=1, email="admin@example.com", password_hash="x",
+                 full_name="Admin", role=UserRole.ADMIN)
+
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_active_admin] = lambda: admin
+    with TestClient(app) as test_client:
+        yield test_client, session
+    app.dependency_overrides.clear()
+    session.close()
+
+
+class TestErrorCodeImport:
+    """CSV and NDJSON imports with per-row reporting."""
+
+    def test_csv_insert_skips_existing_and_reports_errors(self, import_client):
+        client, session = import_client
+        session.add(ErrorCode(code="E1", title="Existing"))
+        session.commit()
+
+        csv_body = (
+            "code,title,severity,related_machine_model\n"
+            "E1,Spindle overload,critical,\n"
+            "E2,Coolant low,warning,LX-200;LX-300\n"
+            ",Missing code,,\n"
+            "E2,Repeated,,\n"
+        )
+        response = client.post(
+            "/error-codes/import",
+            files={"file": ("codes.csv", csv_body, "text/csv")}
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [row["status"] for row in body["rows"]] == ["skipped", "created", "error", "error"]
+        assert body["created"] == 1 and body["skipped"] == 1 and body["error"] == 2
+        created = session.exec(select(ErrorCode).where(ErrorCode.code == "E2")).one()
+        assert created.related_machine_model == ["LX-200", "LX-300"]
+
+    def test_ndjson_upsert_overwrites_existing(self, import_client):
+        client, session = import_client
+        session.add(ErrorCode(code="E1", title="Old title"))
+        session.commit()
+
+        lines = [
+            json.dumps({"code": "E1", "title": "New title"}),
+            json.dumps({"code": "E3", "title": "Fresh"}),
+            "{not json",
+        ]
+        response = client.post(
+            "/error-codes/import?mode=upsert",
+            files={"file": ("codes.ndjson", "\n".join(lines), "application/x-ndjson")}
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [row["status"] for row in body["rows"]] == ["updated", "created", "error"]
+        session.expire_all()
+        assert session.exec(select(ErrorCode.title).where(ErrorCode.code == "E1")).one() == "New title"
+
+    def test_upsert_keeps_columns_the_row_leaves_out(self, import_client):
+        client, session = import_client
+        session.add(ErrorCode(code="E1", title="Old title", description="Check the spindle",
+                              severity="critical", related_machine_model=["LX-200"]))
+        session.commit()
+
+        csv_body = (
+            "code,title,description,severity\n"
+            "E1,New title,,\n"
+        )
+        response = client.post(
+            "/error-codes/import?mode=upsert",
+            files={"file": ("codes.csv", csv_body, "text/csv")}
+        )
+        assert response.json()["updated"] == 1
+
+        ndjson_body = json.dumps({"code": "E1", "title": "Newer title", "severity": "warning"})
+        response = client.post(
+            "/error-codes/import?mode=upsert",
+            files={"file": ("codes.ndjson", ndjson_body, "application/x-ndjson")}
+        )
+        assert response.json()["updated"] == 1
+
+        session.expire_all()
+        stored = session.exec(select(ErrorCode).where(ErrorCode.code == "E1")).one()
+        assert stored.title == "Newer title" and stored.severity == "warning"
+        assert stored.description == "Check the spindle"
+        assert stored.related_machine_model == ["LX-200"]
@@ -0,0 +1,60 @@
+"""
+Tests for token-budgeted history packing and rolling summaries.
+"""
+import asyncio
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.model.models import ChatMessage, ChatSession, MessageRole, User, UserRole
+from src.rag.services import history_service as history_module
+from src.rag.services.ai_service import ai_service
+from src.rag.services.history_service import HistoryService, estimate_tokens
+
+
+class TestHistoryService:
+    """Packing to a budget and background summary refresh."""
+
+    def test_pack_keeps_newest_messages_within_budget(self):
+        service = HistoryService(token_budget=30)
+        messages = [{"role": "user", "content": "x" * 40, "message_id": i} for i in range(10)]
+
+        packed = service.pack(messages, summary="y" * 40)
+
+        assert [m["message_id"] for m in packed] == [8, 9]
+        assert sum(estimate_tokens(m["content"]) for m in packed) + estimate_tokens("y" * 40) <= 30
+
+    def test_refresh_summarises_messages_older_than_window(self, monkeypatch):
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as db:
+            db.add(User(user_id=1, email="t@example.com", password_hash="x",
+                        full_name="T", role=UserRole.TECHNICIAN))
+            db.add(ChatSession(session_id=1, user_id=1, title="Long"))
+            for i in range(1, 13):
+                db.add(ChatMessage(message_id=i, session_id=1, role=MessageRole.USER, content=f"turn {i}"))
+            db.commit()
+            version = db.get(ChatSession, 1).updated_at
+
+        prompts = []
+
+        async def fake_completion(messages, context=None, max_tokens=None, temperature=None):
+            prompts.append(messages[0]["content"])
+            return {"response": "Spindle alarm; coolant checked."}
+
+        monkeypatch.setattr(ai_service, "_enabled", True)
+        monkeypatch.setattr(ai_service, "chat_completion", fake_completion)
+        monkeypatch.setattr(history_module, "HISTORY_SUMMARY_BATCH", 6)
+
+        async def run():
+            service = HistoryService()
+            service.schedule_refresh(engine, 1, window_start_message_id=9)
+            await asyncio.gather(*service._tasks)
+
+        asyncio.run(run())
+
+        with Session(engine) as db:
+            chat_session = db.get(ChatSession, 1)
+            assert chat_session.summary == "Spindle alarm; coolant checked."
+            assert chat_session.summary_message_id == 8
+            assert chat_session.updated_at == version
+        assert "turn 8" in prompts[0] and "turn 9" not in prompts[0]
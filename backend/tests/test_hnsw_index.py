@@ -0,0 +1,138 @@
+"""
+Tests for the HNSW local vector index.
+"""
+import asyncio
+import threading
+from unittest import mock
+
+import numpy as np
+
+from src.rag.services.hnsw_index import HNSWIndex
+from src.rag.services.local_vector_index import LocalIndex, matches_filter
+from src.rag.services.pinecone_service import PineconeService
+
+
+def _clustered(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    basis = rng.normal(size=(16, dim)) / 4
+    points = centers[rng.integers(0, 20, n)] + rng.normal(size=(n, 16)) @ basis + 0.1 * rng.normal(size=(n, dim))
+    return points.astype(np.float32)
+
+
+class TestHNSWIndex:
+    """Graph search, tombstones and filters behind the Pinecone interface."""
+
+    dim = 64
+    data = _clustered(1200, 64)
+
+    def _index(self, **kwargs):
+        index = HNSWIndex(dim=self.dim, quantization="float32", ef_construction=64, **kwargs)
+        index.add([str(i) for i in range(len(self.data))], self.data, [{"n": i % 10} for i in range(len(self.data))])
+        return index
+
+    def test_recall_against_exact_search(self):
+        index = self._index()
+        unit = self.data / np.linalg.norm(self.data, axis=1, keepdims=True)
+        queries = self.data[:30] + 0.2 * np.random.default_rng(1).normal(size=(30, self.dim)).astype(np.float32)
+        hits = 0
+        for q in queries:
+            truth = set(np.argsort(-(unit @ (q / np.linalg.norm(q))))[:10].tolist())
+            hits += len(truth & {int(vector_id) for vector_id, _, _ in index.search(q, top_k=10)})
+        assert hits / 300 >= 0.95
+        assert index.stats()["levels"] > 1
+
+    def test_tombstones_hide_deleted_and_overwritten(self):
+        index = self._index(compact_ratio=0)
+        assert index.search(self.data[5], top_k=1)[0][0] == "5"
+
+        index.delete(["5"])
+        index.add(["6"], [self.data[7]], [{"n": "moved"}])
+        assert "5" not in [hit[0] for hit in index.search(self.data[5], top_k=10)]
+        assert {hit[0]: hit[2] for hit in index.search(self.data[7], top_k=2)} == {"7": {"n": 7}, "6": {"n": "moved"}}
+        assert len(index) == 1199
+        assert index.stats()["tombstones"] == 2
+
+        index.compact()
+        assert index.stats()["tombstones"] == 0
+        assert len(index) == 1199
+        assert index.get("6")[1] == {"n": "moved"}
+
+    def test_reingesting_the_same_ids_compacts(self):
+        index = HNSWIndex(dim=self.dim, quantization="float32", ef_construction=32, compact_ratio=0.3)
+        ids = [str(i) for i in range(50)]
+        for _ in range(10):
+            index.add(ids, self.data[:50])
+        assert index._compaction is not None
+        index._compaction.join()
+        assert len(index) == 50
+        assert index.stats()["tombstones"] <= 0.3 * index._size
+        assert index.search(self.data[7], top_k=1)[0][0] == "7"
+        assert index.get("7") is not None
+
+    def test_writes_during_compaction_are_kept(self):
+        index = self._index(compact_ratio=0)
+        index.delete([str(i) for i in range(600)])
+        build = HNSWIndex.add
+        found = []
+
+        def writer():
+            index.add(["new"], [-self.data[0]], [{"n": "new"}])
+            index.delete(["700"])
+            found.append(index.search(self.data[800], top_k=1)[0][0])
+
+        def slow_build(fresh, *args, **kwargs):
+            # The first add on the new graph is the rebuild; another thread writes to the old one meanwhile
+            if fresh is not index and not found:
+                thread = threading.Thread(target=writer)
+                thread.start()
+                thread.join(timeout=10)
+                assert found == ["800"]
+            return build(fresh, *args, **kwargs)
+
+        with mock.patch.object(HNSWIndex, "add", slow_build):
+            index.compact()
+        assert index.stats()["tombstones"] == 1
+        assert len(index) == 600
+        assert index.search(-self.data[0], top_k=1)[0][0] == "new"
+        assert index.get("700") is None and index.get("800") is not None
+
+    def test_filtered_search_including_selective_filters(self):
+        index = self._index()
+        broad = index.search(self.data[0], top_k=5, predicate=lambda md: md["n"] < 5)
+        assert len(broad) == 5 and all(md["n"] < 5 for _, _, md in broad)
+
+        index.add(["rare"], [-self.data[0]], [{"n": "rare"}])
+        selective = index.search(self.data[0], top_k=3, predicate=lambda md: md["n"] == "rare")
+        assert [hit[0] for hit in selective] == ["rare"]
+
+    def test_metadata_filter_operators(self):
+        metadata = {"machine_type": "cnc_mill", "page": 4, "tags": ["spindle", "alarm"]}
+        assert matches_filter(metadata, {"machine_type": "cnc_mill"})
+        assert matches_filter(metadata, {"machine_type": {"$in": ["lathe", "cnc_mill"]}, "page": {"$gte": 4}})
+        assert matches_filter(metadata, {"tags": "alarm"})
+        assert matches_filter(metadata, {"$or": [{"page": {"$lt": 2}}, {"tags": {"$in": ["spindle"]}}]})
+        assert matches_filter(metadata, {"kb_id": {"$exists": False}, "owner": {"$ne": "acme"}})
+        assert not matches_filter(metadata, {"page": {"$gt": "4"}})
+        assert not matches_filter(metadata, {"$and": [{"page": 4}, {"machine_type": {"$nin": ["cnc_mill"]}}]})
+
+    def test_pinecone_service_runs_on_local_index(self):
+        service = PineconeService(index=LocalIndex(dim=4, quantization="float32"))
+
+        async def scenario():
+            await service.upsert_vectors([
+                {"id": "a", "values": [1, 0, 0, 0], "metadata": {"machine_type": "lathe"}},
+                {"id": "b", "values": [0.9, 0.1, 0, 0], "metadata": {"machine_type": "cnc_mill"}},
+            ], namespace="mt-lathe")
+            await service.upsert_vectors([{"id": "c", "values": [1, 0.05, 0, 0], "metadata": {}}], namespace="general")
+            filtered = await service.query_vectors([1, 0, 0, 0], top_k=5, namespace="mt-lathe",
+                                                   filter_dict={"machine_type": "cnc_mill"}, include_values=True)
+            merged = await service.query_many([1, 0, 0, 0], [("mt-lathe", None), ("general", None)], top_k=2)
+            await service.delete_vectors(["a", "b"], namespace="mt-lathe")
+            return filtered, merged, await service.list_namespaces()
+
+        filtered, merged, namespaces = asyncio.run(scenario())
+        assert [m["id"] for m in filtered] == ["b"]
+        assert len(filtered[0]["values"]) == 4
+        assert [m["id"] for m in merged] == ["a", "c"]
+        assert namespaces == ["general"]
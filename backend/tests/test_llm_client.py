@@ -0,0 +1,90 @@
+"""
+Tests for the resilient LLM provider client.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.rag.services.llm_client import CircuitBreaker, LatencyTracker, ResilientLLMClient
+
+URL = "https://llm.test/v1/chat/completions"
+OK_BODY = {"choices": [{"message": {"content": "ok"}}], "model": "m", "usage": {}}
+
+
+def _client(handler, **kwargs):
+    return ResilientLLMClient(URL, transport=httpx.MockTransport(handler), **kwargs)
+
+
+class TestCircuitBreaker:
+    """Failure-rate breaker with a single half-open probe."""
+
+    def test_opens_fails_fast_then_recovers_through_probe(self):
+        now = [0.0]
+        breaker = CircuitBreaker(window_size=4, min_calls=4, failure_rate=0.5,
+                                 open_seconds=10, clock=lambda: now[0])
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503 if now[0] < 10 else 200, json=OK_BODY)
+
+        client = _client(handler, breaker=breaker, max_attempts=1)
+
+        async def call():
+            return await client.post_json({}, {})
+
+        for _ in range(4):
+            with pytest.raises(HTTPException):
+                asyncio.run(call())
+        assert breaker.state == CircuitBreaker.OPEN
+
+        with pytest.raises(HTTPException) as rejected:
+            asyncio.run(call())
+        assert rejected.value.status_code == 503
+        assert len(calls) == 4  # failed fast, provider not contacted
+
+        now[0] = 10
+        assert asyncio.run(call()) == OK_BODY
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestResilientLLMClient:
+    """Hedging and the in-flight cap."""
+
+    def test_hedge_wins_when_primary_is_slow(self):
+        latency = LatencyTracker()
+        for _ in range(50):
+            latency.record(0.02)
+        seen = []
+
+        async def handler(request):
+            seen.append(request)
+            if len(seen) == 1:
+                await asyncio.sleep(2)
+            return httpx.Response(200, json=OK_BODY)
+
+        client = _client(handler, hedge_enabled=True, latency=latency)
+
+        started = time.monotonic()
+        assert asyncio.run(client.post_json({}, {})) == OK_BODY
+        assert time.monotonic() - started < 1
+        assert client.stats()["hedge_wins"] == 1
+
+    def test_sheds_beyond_in_flight_cap(self):
+        async def handler(request):
+            await asyncio.sleep(0.1)
+            return httpx.Response(200, json=OK_BODY)
+
+        client = _client(handler, max_in_flight=1, max_attempts=1)
+
+        async def burst():
+            return await asyncio.gather(client.post_json({}, {}), client.post_json({}, {}),
+                                        return_exceptions=True)
+
+        results = asyncio.run(burst())
+        assert results[0] == OK_BODY
+        assert isinstance(results[1], HTTPException) and results[1].status_code == 503
+        assert client.breaker.state == CircuitBreaker.CLOSED
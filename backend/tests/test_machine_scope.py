@@ -0,0 +1,74 @@
+"""
+Tests for machine-scoped chat retrieval.
+"""
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.main import app
+from src.model.models import ChatSession, Machine, User, UserRole
+from src.rag.services.rag_service import RAGService, rag_service
+from src.routes.utils.auth import get_current_user
+from src.routes.utils.database import get_session
+from src.routes.utils.machine_cache import MachineScopeCache, machine_scope_cache
+
+
+def _db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    session.add(User(user_id=1, email="op@example.com", password_hash="x",
+                     full_name="Operator", role=UserRole.CUSTOMER))
+    session.add(Machine(machine_id=7, serial_number="SN-7", model="VF-2", type="cnc_mill", owner_id=1))
+    session.add(ChatSession(session_id=1, user_id=1, machine_id=7, title="Mill"))
+    session.commit()
+    return session
+
+
+class TestMachineScope:
+    """Cached machine resolution feeds the retrieval filter."""
+
+    def test_cache_resolves_once_until_invalidated(self):
+        db = _db()
+        cache = MachineScopeCache()
+        queries = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+        assert cache.get(7, db) == ("VF-2", "cnc_mill")
+        assert cache.get(7, db) == ("VF-2", "cnc_mill")
+        assert len(queries) == 1
+        cache.invalidate(7)
+        cache.get(7, db)
+        assert len(queries) == 2
+        assert cache.get(999, db) is None
+
+    def test_filter_includes_general_documents(self):
+        assert RAGService._machine_filter("cnc_mill", "VF-2") == {
+            "machine_type": {"$in": ["cnc_mill", "VF-2", "general"]}
+        }
+        assert RAGService._machine_filter(None, None) is None
+
+    def test_chat_passes_session_machine_to_rag(self, monkeypatch):
+        db = _db()
+        calls = []
+
+        async def fake_generate(**kwargs):
+            calls.append(kwargs)
+            return {"response": "ok", "model": "m", "usage": {}, "confidence": 0.5}
+
+        monkeypatch.setattr(rag_service, "generate_rag_response", fake_generate)
+        app.dependency_overrides[get_session] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+        machine_scope_cache.clear()
+        try:
+            with TestClient(app) as client:
+                response = client.post("/chat/ai/chat", json={"message": "Spindle alarm", "session_id": 1})
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert calls[0]["machine_type"] == "cnc_mill"
+        assert calls[0]["machine_model"] == "VF-2"
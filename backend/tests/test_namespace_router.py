@@ -0,0 +1,55 @@
+"""
+Tests for namespace sharding of the vector index.
+"""
+import asyncio
+
+from src.rag.services.namespace_router import NamespaceRouter
+
+
+class FakePinecone:
+    async def list_namespaces(self):
+        return ["default", "general", "mt-lathe", "t-acme.mt-lathe", "t-globex.general"]
+
+
+class TestNamespaceRouter:
+    """Writes land in type/tenant shards; reads fan out to the visible ones."""
+
+    def test_namespace_names(self):
+        router = NamespaceRouter(sharding=True)
+        assert router.namespace_for("CNC Mill") == "mt-cnc-mill"
+        assert router.namespace_for(None) == "general"
+        assert router.namespace_for("lathe", "Acme Corp") == "t-acme-corp.mt-lathe"
+
+    def test_only_writes_and_listings_are_remembered(self):
+        router = NamespaceRouter(sharding=True, cache_ttl=3600)
+        asyncio.run(router.read_targets(FakePinecone(), "Mill", "VF-2", "Acme", None))
+        assert router._known == set()
+
+        router.record("t-acme.mt-mill")
+        asyncio.run(router.known_namespaces(FakePinecone(), refresh=True))
+        assert "t-acme.mt-mill" not in router._known
+        assert router._known == set(asyncio.run(FakePinecone().list_namespaces()))
+
+    def test_machine_query_targets_tenant_shared_general_and_legacy(self):
+        router = NamespaceRouter(sharding=True, query_legacy=True)
+        legacy_filter = {"machine_type": {"$in": ["lathe", "general"]}}
+
+        targets = asyncio.run(router.read_targets(FakePinecone(), "lathe", None, "Acme", legacy_filter))
+
+        assert targets == [
+            ("t-acme.mt-lathe", None), ("t-acme.general", None),
+            ("mt-lathe", None), ("general", None),
+            ("default", legacy_filter),
+        ]
+
+    def test_unscoped_query_hides_other_tenants(self):
+        router = NamespaceRouter(sharding=True, query_legacy=False)
+
+        targets = asyncio.run(router.read_targets(FakePinecone(), None, None, "Acme", None))
+
+        assert [namespace for namespace, _ in targets] == ["general", "mt-lathe", "t-acme.mt-lathe"]
+
+    def test_sharding_off_uses_legacy_namespace_with_filter(self):
+        router = NamespaceRouter(sharding=False)
+        targets = asyncio.run(router.read_targets(FakePinecone(), "lathe", None, None, {"f": 1}))
+        assert targets == [("default", {"f": 1})]
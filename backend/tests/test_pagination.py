@@ -0,0 +1,78 @@
+"""
+Tests for the keyset pagination helpers.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from src.model.models import ErrorCode, ChatSession, User
+from src.routes.utils.pagination import decode_cursor, encode_cursor, paginate
+
+
+@pytest.fixture
+def memory_session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+class TestCursorEncoding:
+    """Cursor round-trips must preserve value types."""
+
+    def test_round_trip_datetime(self):
+        stamp = datetime(2025, 9, 1, 12, 30, 15, 123456)
+        assert decode_cursor(encode_cursor(stamp, 42)) == (stamp, 42)
+
+    def test_round_trip_string(self):
+        assert decode_cursor(encode_cursor("E-100", "E-100")) == ("E-100", "E-100")
+
+    def test_invalid_cursor_is_rejected(self):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor("not-a-cursor")
+        assert exc.value.status_code == 400
+
+
+class TestPaginate:
+    """Walking every page must return each row exactly once, in order."""
+
+    def test_ascending_walk(self, memory_session):
+        for i in range(25):
+            memory_session.add(ErrorCode(code=f"E{i:03d}", title=f"Error {i}"))
+        memory_session.commit()
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = paginate(
+                memory_session, select(ErrorCode), ErrorCode.code, ErrorCode.error_code_id,
+                cursor, limit=10
+            )
+            seen.extend(row.code for row in rows)
+            if cursor is None:
+                break
+
+        assert seen == [f"E{i:03d}" for i in range(25)]
+
+    def test_descending_walk_with_timestamp_ties(self, memory_session):
+        user = User(email="a@b.co", password_hash="x", full_name="A")
+        memory_session.add(user)
+        memory_session.commit()
+        base = datetime(2025, 1, 1)
+        for i in range(7):
+            # Pairs of sessions share the same timestamp to exercise the id tiebreaker
+            memory_session.add(ChatSession(user_id=user.user_id, updated_at=base + timedelta(minutes=i // 2)))
+        memory_session.commit()
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = paginate(
+                memory_session, select(ChatSession), ChatSession.updated_at, ChatSession.session_id,
+                cursor, limit=3, descending=True
+            )
+            seen.extend(row.session_id for row in rows)
+            if cursor is None:
+                break
+
+        assert seen == list(range(7, 0, -1))
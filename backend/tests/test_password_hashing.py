@@ -0,0 +1,67 @@
+"""
+Tests for off-loop password hashing and transparent rehashing.
+"""
+import asyncio
+import time
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.main import app
+from src.model.models import User, UserRole
+from src.routes.utils.auth import PasswordHashExecutor, pwd_context
+from src.routes.utils.database import get_session
+
+
+class TestPasswordHashing:
+    """Bounded executor admission and rehash-on-login."""
+
+    def test_executor_rejects_when_saturated(self):
+        executor = PasswordHashExecutor(workers=1, max_pending=1)
+
+        async def burst():
+            return await asyncio.gather(
+                executor.run(time.sleep, 0.2),
+                executor.run(time.sleep, 0.2),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(burst())
+
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+        assert len(rejected) == 1 and rejected[0].status_code == 503
+        assert executor.stats()["pending"] == 0
+
+    def test_login_upgrades_outdated_hash(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(engine)
+        legacy_hash = CryptContext(schemes=["sha256_crypt"]).hash("S3cure!pass")
+        with Session(engine) as session:
+            session.add(User(user_id=1, email="legacy@example.com", password_hash=legacy_hash,
+                             full_name="Legacy", role=UserRole.CUSTOMER))
+            session.commit()
+
+        def override_session():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = override_session
+        try:
+            with TestClient(app) as client:
+                response = client.post(
+                    "/token", data={"username": "legacy@example.com", "password": "S3cure!pass"}
+                )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        with Session(engine) as session:
+            stored = session.get(User, 1).password_hash
+        assert stored != legacy_hash
+        assert pwd_context.identify(stored) == "bcrypt"
+        assert not pwd_context.needs_update(stored)
@@ -0,0 +1,71 @@
+"""
+Tests for the non-blocking Pinecone wrapper.
+"""
+import asyncio
+import threading
+import time
+
+from src.rag.services.pinecone_service import PineconeService
+
+
+class _Match:
+    def __init__(self, id, score):
+        self.id, self.score, self.metadata, self.values = id, score, {"chunk_text": id}, []
+
+
+class FakeIndex:
+    """Blocking stand-in for the SDK index handle."""
+
+    def __init__(self):
+        self.upserts = []
+        self.deletes = []
+        self.lock = threading.Lock()
+
+    def upsert(self, vectors, namespace):
+        with self.lock:
+            self.upserts.append(len(vectors))
+
+    def delete(self, ids, namespace):
+        with self.lock:
+            self.deletes.append(len(ids))
+
+    def query(self, vector, top_k, namespace, filter, include_metadata, include_values):
+        time.sleep(0.1)
+        if namespace == "broken":
+            raise RuntimeError("namespace unavailable")
+        return type("Result", (), {"matches": [_Match(f"{namespace}-a", 0.5), _Match("shared", 0.9 if namespace == "b" else 0.4)]})
+
+
+class TestPineconeService:
+    """SDK calls run off the event loop, batched and fanned out."""
+
+    def test_upserts_and_deletes_are_batched(self):
+        index = FakeIndex()
+        service = PineconeService(index=index)
+
+        asyncio.run(service.upsert_vectors([{"id": str(i)} for i in range(250)]))
+        asyncio.run(service.delete_vectors([str(i) for i in range(2500)]))
+
+        assert sorted(index.upserts) == [50, 100, 100]
+        assert sorted(index.deletes) == [500, 1000, 1000]
+
+    def test_fan_out_runs_in_parallel_and_merges(self):
+        service = PineconeService(index=FakeIndex())
+
+        async def search():
+            ticks = 0
+            task = asyncio.ensure_future(
+                service.query_many([0.1], [("a", None), ("b", None), ("broken", None)], top_k=3)
+            )
+            while not task.done():
+                ticks += 1  # the loop keeps running while the SDK blocks
+                await asyncio.sleep(0.01)
+            return await task, ticks
+
+        started = time.monotonic()
+        matches, ticks = asyncio.run(search())
+
+        assert time.monotonic() - started < 0.25
+        assert ticks > 3
+        assert [m["id"] for m in matches] == ["shared", "a-a", "b-a"]
+        assert matches[0]["namespace"] == "b"
@@ -0,0 +1,38 @@
+"""
+Tests for single-flight coalescing in the RAG service.
+"""
+import asyncio
+
+from src.rag.services.rag_service import RAGService
+
+
+class TestRagSingleFlight:
+    """Identical concurrent requests share one computation."""
+
+    def test_identical_requests_are_coalesced(self, monkeypatch):
+        service = RAGService()
+        calls = []
+
+        async def slow_generate(query, machine_type, context_limit, history, summary, **scope):
+            calls.append(query)
+            await asyncio.sleep(0.05)
+            return {"response": f"answer to {query}", "sources": []}
+
+        monkeypatch.setattr(service, "_generate_rag_response", slow_generate)
+
+        async def burst():
+            same = [service.generate_rag_response("Spindle  alarm E12?", "lathe") for _ in range(4)]
+            same.append(service.generate_rag_response("spindle alarm e12?", "LATHE"))
+            other = service.generate_rag_response("Spindle alarm E12?", "mill")
+            return await asyncio.gather(*same, other)
+
+        results = asyncio.run(burst())
+
+        assert len(calls) == 2
+        assert results[1] == results[4] and results[1] is not results[4]
+        # Only the caller that made the call owns its usage
+        assert "coalesced" not in results[0] and "coalesced" not in results[5]
+        assert all(result["coalesced"] for result in results[1:5])
+        assert results[0]["response"] == results[4]["response"]
+        stats = service.single_flight_stats()
+        assert stats == {"in_flight": 0, "flights_started": 2, "coalesced_requests": 4}
@@ -0,0 +1,60 @@
+"""
+Tests for the sliding-window login rate limiter and its backends.
+"""
+from src.routes.utils.rate_limiter import (
+    MemoryRateLimitBackend, SQLRateLimitBackend, SlidingWindowLimiter,
+    create_sqlite_limiter_engine
+)
+
+
+class TestSlidingWindowLimiter:
+    """Lockout, window decay, LRU cap and cross-worker sharing."""
+
+    def test_locks_after_max_attempts_then_recovers(self):
+        limiter = SlidingWindowLimiter(MemoryRateLimitBackend(), max_attempts=3,
+                                       window_seconds=60, lockout_seconds=120)
+        for i in range(2):
+            limiter.record_failure("10.0.0.1", now=1000 + i)
+        assert limiter.remaining("10.0.0.1", now=1002) == 1
+
+        limiter.record_failure("10.0.0.1", now=1002)
+
+        assert limiter.is_locked("10.0.0.1", now=1003)
+        assert limiter.remaining("10.0.0.1", now=1003) == 0
+        assert limiter.lockout_remaining("10.0.0.1", now=1062) == 60
+        assert not limiter.is_locked("10.0.0.1", now=1123)
+        assert limiter.remaining("10.0.0.1", now=1123) == 3
+
+    def test_previous_window_decays(self):
+        limiter = SlidingWindowLimiter(MemoryRateLimitBackend(), max_attempts=5,
+                                       window_seconds=100, lockout_seconds=100)
+        for _ in range(4):
+            limiter.record_failure("ip", now=0)
+
+        # Halfway into the next window only half of the old failures still count
+        assert limiter.remaining("ip", now=150) == 3
+        assert limiter.remaining("ip", now=250) == 5
+
+    def test_memory_backend_evicts_least_recent_key(self):
+        backend = MemoryRateLimitBackend(max_keys=2)
+        limiter = SlidingWindowLimiter(backend, max_attempts=5)
+        limiter.record_failure("a", now=1)
+        limiter.record_failure("b", now=2)
+        limiter.record_failure("a", now=3)
+        limiter.record_failure("c", now=4)
+
+        assert len(backend) == 2
+        assert backend.get("b") is None
+        assert limiter.remaining("a", now=5) == 3
+
+    def test_sqlite_backend_is_shared_between_workers(self, tmp_path):
+        path = str(tmp_path / "limits.db")
+        worker_a = SlidingWindowLimiter(SQLRateLimitBackend(create_sqlite_limiter_engine(path)), max_attempts=2)
+        worker_b = SlidingWindowLimiter(SQLRateLimitBackend(create_sqlite_limiter_engine(path)), max_attempts=2)
+
+        worker_a.record_failure("10.0.0.9")
+        worker_b.record_failure("10.0.0.9")
+
+        assert worker_a.is_locked("10.0.0.9")
+        worker_b.reset("10.0.0.9")
+        assert worker_a.remaining("10.0.0.9") == 2
@@ -0,0 +1,116 @@
+"""
+Tests for LLM token metering, rollups and budgets.
+"""
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from src.main import app
+from src.rag.services.rag_service import rag_service
+from src.model.models import TokenUsage, TokenUsageDaily, UsageScope, User, UserRole
+from src.routes.utils.auth import get_current_active_admin, get_current_user
+from src.routes.utils.database import get_session
+from src.routes.utils.usage_meter import usage_meter
+
+USAGE = {"prompt_tokens": 300, "completion_tokens": 100, "total_tokens": 400}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    session.add(User(user_id=1, email="buyer@example.com", password_hash="x", full_name="Buyer",
+                     company_name="Acme", role=UserRole.CUSTOMER))
+    session.commit()
+    yield session
+    session.close()
+
+
+class TestUsageMeter:
+    """Ledger rows and incrementally maintained daily rollups."""
+
+    def test_rollups_accumulate_per_scope_and_model(self, db):
+        when = datetime(2026, 3, 4, 12)
+        for _ in range(2):
+            usage_meter.record(db, 1, "Acme", "llama-3.1-8b-instant", USAGE, when=when)
+        usage_meter.record(db, 1, "Acme", "rag-fallback", USAGE, when=when)
+        db.commit()
+
+        assert len(db.exec(select(TokenUsage)).all()) == 2
+        assert len(db.exec(select(TokenUsageDaily)).all()) == 2  # one user row, one company row
+        totals = usage_meter.totals(db, UsageScope.COMPANY, "Acme", date(2026, 3, 1), date(2026, 3, 31))
+        assert totals["request_count"] == 2
+        assert totals["total_tokens"] == 800
+        assert totals["cost_usd"] == pytest.approx(2 * (300 * 0.05 + 100 * 0.08) / 1_000_000)
+        assert [item["model"] for item in totals["by_model"]] == ["llama-3.1-8b-instant"]
+
+    def test_coalesced_chat_turns_are_not_metered_again(self, db, monkeypatch):
+        answers = [
+            {"response": "ok", "model": "llama-3.1-8b-instant", "usage": USAGE, "confidence": 0.5},
+            {"response": "ok", "model": "llama-3.1-8b-instant", "usage": USAGE, "confidence": 0.5, "coalesced": True},
+        ]
+
+        async def fake_generate(**kwargs):
+            return answers.pop(0)
+
+        monkeypatch.setattr(rag_service, "generate_rag_response", fake_generate)
+        app.dependency_overrides[get_session] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+        try:
+            with TestClient(app) as client:
+                for _ in range(2):
+                    assert client.post("/chat/ai/chat", json={"message": "Spindle alarm"}).status_code == 200
+        finally:
+            app.dependency_overrides.clear()
+
+        assert len(db.exec(select(TokenUsage)).all()) == 1
+
+    def test_rag_document_queries_are_metered(self, db, monkeypatch):
+        async def fake_generate(**kwargs):
+            return {"response": "ok", "model": "llama-3.1-8b-instant", "usage": USAGE, "confidence": 0.5}
+
+        monkeypatch.setattr(rag_service, "generate_rag_response", fake_generate)
+        app.dependency_overrides[get_session] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+        try:
+            with TestClient(app) as client:
+                assert client.post("/rag/documents/query", data={"query": "Spindle alarm"}).status_code == 200
+        finally:
+            app.dependency_overrides.clear()
+
+        entry = db.exec(select(TokenUsage)).one()
+        assert entry.purpose == "rag_query" and entry.company_name == "Acme"
+        assert entry.total_tokens == 400
+
+
+class TestUsageBudgets:
+    """Admin budgets are enforced before the LLM is called."""
+
+    def test_exhausted_company_budget_blocks_chat(self, db):
+        user = db.get(User, 1)
+        app.dependency_overrides[get_session] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: user
+        app.dependency_overrides[get_current_active_admin] = lambda: user
+        try:
+            with TestClient(app) as client:
+                budget = client.put("/admin/usage/company/Acme/budget", json={"monthly_token_limit": 500})
+                assert budget.json()["exceeded"] is False
+
+                usage_meter.record(db, 1, "Acme", "llama-3.1-8b-instant", USAGE)
+                usage_meter.record(db, 1, "Acme", "llama-3.1-8b-instant", USAGE)
+                db.commit()
+
+                assert client.post("/chat/ai/chat", json={"message": "Hi"}).status_code == 429
+                assert client.post("/rag/documents/query", data={"query": "Hi"}).status_code == 429
+                summary = client.get("/admin/usage/user/1").json()
+                assert summary["total_tokens"] == 800
+                assert client.get("/admin/usage/company/Acme/budget").json()["exceeded"] is True
+        finally:
+            app.dependency_overrides.clear()
+            usage_meter.invalidate_budget(UsageScope.COMPANY, "Acme")
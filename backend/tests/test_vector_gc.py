@@ -0,0 +1,115 @@
+"""
+Tests for vector garbage collection.
+"""
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.model.models import KnowledgeBaseContent, ContentType
+from src.rag.services import vector_gc
+from src.rag.services.chunk_store import ChunkStore
+from src.rag.services.local_vector_index import LocalIndex
+from src.rag.services.pinecone_service import PineconeService
+from src.rag.services.vector_gc import VectorSweeper
+
+
+def _setup(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        for kb_id in (1, 2):
+            db.add(KnowledgeBaseContent(
+                kb_id=kb_id, title=f"Manual {kb_id}", content_type=ContentType.document,
+                uploader_id=1, created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+            ))
+        db.commit()
+
+    store = ChunkStore(engine=engine)
+    index = LocalIndex(dim=4, quantization="float32")
+    monkeypatch.setattr(vector_gc, "chunk_store", store)
+    monkeypatch.setattr(vector_gc, "pinecone_service", PineconeService(index=index))
+
+    chunks = {
+        "general": [("kb1-0", 1, None), ("kb1-1", 1, None), ("kb2-0", 2, None)],
+        "t-acme.general": [("doc9-0", None, 9), ("upload-0", None, None)],
+    }
+    for namespace, rows in chunks.items():
+        store.put_many([
+            {"vector_id": vector_id, "content": "x" * 100, "title": "T", "kb_id": kb_id, "document_id": document_id}
+            for vector_id, kb_id, document_id in rows
+        ], namespace=namespace)
+        index.upsert([(vector_id, [1.0, 0.0, 0.0, 0.0], {}) for vector_id, _, _ in rows], namespace=namespace)
+    return engine, store, index
+
+
+def _ids(index, namespace):
+    return {match.id for match in index.query([1.0, 0.0, 0.0, 0.0], top_k=10, namespace=namespace).matches}
+
+
+class TestVectorSweeper:
+    """Vectors and chunks of deleted knowledge base rows are reclaimed; unowned chunks are kept."""
+
+    def test_delete_for_kb_removes_only_its_vectors(self, monkeypatch):
+        engine, store, index = _setup(monkeypatch)
+        report = asyncio.run(VectorSweeper(engine=engine).delete_for_kb(1))
+
+        assert report["vectors_deleted"] == 2
+        assert _ids(index, "general") == {"kb2-0"}
+        keys = [("general", vector_id) for vector_id in ("kb1-0", "kb1-1", "kb2-0")]
+        assert set(store.get_many(keys)) == {("general", "kb2-0")}
+
+    def test_sweep_reclaims_orphans_across_pages(self, monkeypatch):
+        engine, store, index = _setup(monkeypatch)
+        with Session(engine) as db:
+            db.delete(db.get(KnowledgeBaseContent, 2))
+            db.commit()
+
+        sweeper = VectorSweeper(engine=engine, batch_size=2)
+        report = asyncio.run(sweeper.sweep())
+
+        assert report["scanned"] == 5
+        assert report["orphaned_chunks"] == 2
+        assert report["vectors_deleted"] == 2
+        assert report["bytes_reclaimed"] == 200
+        assert sweeper.last_report == report
+        assert _ids(index, "general") == {"kb1-0", "kb1-1"}
+        assert _ids(index, "t-acme.general") == {"upload-0"}
+
+        assert asyncio.run(sweeper.sweep())["orphaned_chunks"] == 0
+
+    def test_failed_namespace_is_retried_without_losing_the_rest(self, monkeypatch):
+        engine, store, index = _setup(monkeypatch)
+        with Session(engine) as db:
+            db.delete(db.get(KnowledgeBaseContent, 2))
+            db.commit()
+        service = vector_gc.pinecone_service
+        delete_vectors = service.delete_vectors
+
+        async def flaky_delete(ids, namespace="default"):
+            if namespace == "general":
+                raise RuntimeError("index unavailable")
+            return await delete_vectors(ids, namespace)
+
+        monkeypatch.setattr(service, "delete_vectors", flaky_delete)
+        sweeper = VectorSweeper(engine=engine, batch_size=2)
+        report = asyncio.run(sweeper.sweep())
+        assert report["errors"] == 1
+        assert report["vectors_deleted"] == 1 and report["bytes_reclaimed"] == 100
+        assert _ids(index, "t-acme.general") == {"upload-0"}
+        assert "kb2-0" in _ids(index, "general")
+
+        monkeypatch.setattr(service, "delete_vectors", delete_vectors)
+        retry = asyncio.run(sweeper.sweep())
+        assert retry["orphaned_chunks"] == 1 and retry["errors"] == 0
+        assert _ids(index, "general") == {"kb1-0", "kb1-1"}
+
+    def test_disabled_backend_keeps_chunk_rows(self, monkeypatch):
+        engine, store, index = _setup(monkeypatch)
+        monkeypatch.setattr(vector_gc.pinecone_service, "_enabled", False)
+
+        report = asyncio.run(VectorSweeper(engine=engine).delete_for_kb(1))
+
+        assert report["errors"] == 1 and report["vectors_deleted"] == 0
+        assert len(store.get_many([("general", "kb1-0"), ("general", "kb1-1")])) == 2
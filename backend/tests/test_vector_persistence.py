@@ -0,0 +1,109 @@
+"""
+Tests for local vector index persistence.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from src.rag.services.local_vector_index import LocalIndex
+
+
+def _vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def _fill(index, n=200):
+    data = _vectors(n)
+    index.upsert([
+        {"id": f"v{i}", "values": data[i].tolist(), "metadata": {"page": i}} for i in range(n)
+    ], namespace="mt-lathe")
+    index.upsert([{"id": "g", "values": data[0].tolist(), "metadata": {"page": -1}}], namespace="general")
+    index.delete(ids=["v1", "v2"], namespace="mt-lathe")
+    return data
+
+
+def _top_ids(index, query, namespace="mt-lathe"):
+    return [m.id for m in index.query(query.tolist(), top_k=5, namespace=namespace).matches]
+
+
+class TestVectorPersistence:
+    """Writes survive restarts via the WAL and memory-mapped snapshots."""
+
+    def test_wal_replay_restores_writes(self, tmp_path):
+        index = LocalIndex(dim=16, quantization="int8", path=str(tmp_path))
+        data = _fill(index)
+        expected = _top_ids(index, data[3])
+        index.close()
+
+        reopened = LocalIndex(dim=16, quantization="int8", path=str(tmp_path))
+        assert _top_ids(reopened, data[3]) == expected
+        assert "v1" not in _top_ids(reopened, data[1])
+        assert reopened.describe_index_stats()["namespaces"] == {
+            "mt-lathe": {"vector_count": 198}, "general": {"vector_count": 1}
+        }
+
+    def test_snapshot_is_memory_mapped_and_accepts_new_writes(self, tmp_path):
+        index = LocalIndex(dim=16, quantization="int8", path=str(tmp_path), min_train=100)
+        data = _fill(index)
+        expected = _top_ids(index, data[3])
+        index.snapshot()
+        assert os.path.getsize(tmp_path / "wal.log") == 0
+        index.close()
+
+        reopened = LocalIndex(dim=16, quantization="int8", path=str(tmp_path), min_train=100)
+        lathe = reopened._namespaces["mt-lathe"]
+        assert lathe.quantized and not reopened._namespaces["general"].quantized
+        assert isinstance(lathe._codes, np.memmap) and isinstance(lathe._links0, np.memmap)
+        assert _top_ids(reopened, data[3]) == expected
+        assert reopened.query(data[5].tolist(), top_k=1, namespace="mt-lathe", include_metadata=True).matches[0].metadata == {"page": 5}
+
+        reopened.upsert([{"id": "new", "values": (-data[0]).tolist(), "metadata": {"page": 999}}], namespace="mt-lathe")
+        reopened.delete(delete_all=True, namespace="general")
+        reopened.close()
+
+        again = LocalIndex(dim=16, quantization="int8", path=str(tmp_path), min_train=100)
+        assert _top_ids(again, -data[0])[0] == "new"
+        assert list(again.describe_index_stats()["namespaces"]) == ["mt-lathe"]
+
+    def test_torn_wal_tail_is_discarded(self, tmp_path):
+        index = LocalIndex(dim=16, quantization="float32", path=str(tmp_path))
+        data = _fill(index, n=20)
+        index.close()
+        intact = os.path.getsize(tmp_path / "wal.log")
+        with open(tmp_path / "wal.log", "ab") as f:
+            f.write(b"\x40\x00\x00\x00garbage")
+
+        reopened = LocalIndex(dim=16, quantization="float32", path=str(tmp_path))
+        assert _top_ids(reopened, data[3])[0] == "v3"
+        assert intact > 0 and os.path.getsize(tmp_path / "wal.log") == 0
+
+    def test_replayed_log_is_folded_into_a_snapshot(self, tmp_path):
+        index = LocalIndex(dim=16, quantization="float32", path=str(tmp_path))
+        data = _fill(index, n=20)
+        index.close()
+        assert not (tmp_path / "CURRENT").exists()
+
+        reopened = LocalIndex(dim=16, quantization="float32", path=str(tmp_path))
+        assert (tmp_path / "CURRENT").exists()
+        assert os.path.getsize(tmp_path / "wal.log") == 0
+        reopened.close()
+
+        again = LocalIndex(dim=16, quantization="float32", path=str(tmp_path))
+        assert _top_ids(again, data[3])[0] == "v3"
+        again.close()
+
+    def test_second_writer_on_a_directory_is_refused(self, tmp_path):
+        index = LocalIndex(dim=16, quantization="float32", path=str(tmp_path))
+        with pytest.raises(RuntimeError):
+            LocalIndex(dim=16, quantization="float32", path=str(tmp_path))
+        index.close()
+
+        LocalIndex(dim=16, quantization="float32", path=str(tmp_path)).close()
+
+    def test_log_is_compacted_into_snapshot_past_threshold(self, tmp_path):
+        index = LocalIndex(dim=16, quantization="int8", path=str(tmp_path), snapshot_wal_bytes=1)
+        _fill(index, n=20)
+        assert (tmp_path / "CURRENT").exists()
+        assert os.path.getsize(tmp_path / "wal.log") == 0
+        assert len(os.listdir(tmp_path / "snapshots")) == 1
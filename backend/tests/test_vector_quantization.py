@@ -0,0 +1,82 @@
+"""
+Tests for quantized local vector storage.
+"""
+import numpy as np
+import pytest
+
+from src.rag.services.local_vector_index import FlatVectorIndex
+
+
+def _clustered(n, dim, clusters=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    points = centers[rng.integers(0, clusters, n)] + 0.5 * rng.normal(size=(n, dim))
+    return points.astype(np.float32)
+
+
+def _recall(index, data, queries, k=10):
+    unit = data / np.linalg.norm(data, axis=1, keepdims=True)
+    hits = 0
+    for q in queries:
+        truth = set(np.argsort(-(unit @ (q / np.linalg.norm(q))))[:k].tolist())
+        found = {int(vector_id) for vector_id, _, _ in index.search(q, top_k=k)}
+        hits += len(truth & found)
+    return hits / (k * len(queries))
+
+
+class TestVectorQuantization:
+    """int8 and PQ storage keep recall while shrinking memory."""
+
+    dim = 128
+    data = _clustered(3000, 128)
+    queries = data[:20] + 0.3 * np.random.default_rng(1).normal(size=(20, 128)).astype(np.float32)
+
+    def _index(self, **kwargs):
+        index = FlatVectorIndex(dim=self.dim, **kwargs)
+        index.add([str(i) for i in range(len(self.data))], self.data)
+        return index
+
+    def test_int8_recall_and_memory(self):
+        exact = self._index(quantization="float32")
+        int8 = self._index(quantization="int8")
+        assert _recall(exact, self.data, self.queries) == 1.0
+        assert _recall(int8, self.data, self.queries) >= 0.95
+        assert int8.memory_bytes() < exact.memory_bytes() / 3
+
+    def test_pq_rescoring_recovers_recall(self):
+        pq = self._index(quantization="pq", pq_subvectors=16, min_train=2000)
+        rescored = self._index(quantization="pq", pq_subvectors=16, rescore=True, rescore_factor=8, min_train=2000)
+        assert pq.memory_bytes() < self.data.nbytes / 5
+        assert _recall(rescored, self.data, self.queries) > _recall(pq, self.data, self.queries)
+        assert _recall(rescored, self.data, self.queries) >= 0.95
+
+    def test_small_first_batch_does_not_fix_the_codebook(self):
+        ids = [str(i) for i in range(len(self.data))]
+        for quantization, options in (("int8", {}), ("pq", {"pq_subvectors": 16, "min_train": 2000})):
+            index = FlatVectorIndex(dim=self.dim, quantization=quantization, **options)
+            index.add(ids[:1], self.data[:1])
+            assert not index.quantized
+            index.add(ids[1:], self.data[1:])
+            assert index.quantized
+
+            whole = self._index(quantization=quantization, **options)
+            assert _recall(index, self.data, self.queries) >= _recall(whole, self.data, self.queries) - 0.05
+
+    def test_upsert_delete_and_mask(self):
+        index = FlatVectorIndex(dim=4, quantization="int8")
+        index.add(["a", "b"], [[1, 0, 0, 0], [0, 1, 0, 0]], [{"n": 1}, {"n": 2}])
+        index.add(["a"], [[0, 0, 1, 0]], [{"n": 3}])
+        assert len(index) == 2
+        top = index.search([0, 0, 1, 0], top_k=1)[0]
+        assert top[0] == "a" and top[2] == {"n": 3}
+
+        assert index.delete(["a", "missing"]) == 1
+        assert [hit[0] for hit in index.search([0, 0, 1, 0], top_k=5)] == ["b"]
+        assert index.search([0, 1, 0, 0], top_k=5, allowed=np.zeros(2, dtype=bool)) == []
+
+        index.add(["c"], [[0, 0, 0, 1]])
+        assert len(index) == 2 and index.get("c") is not None
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError):
+            FlatVectorIndex(dim=4, quantization="int4")